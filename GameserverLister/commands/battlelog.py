@@ -7,7 +7,7 @@ import click
 from GameserverLister.commands.options import common, http, queryport
 from GameserverLister.commands.options.types import EnumChoice
 from GameserverLister.common.logger import logger
-from GameserverLister.common.types import BattlelogGame, BattlelogPlatform
+from GameserverLister.common.types import BattlelogGame, BattlelogPlatform, StoreBackend, QueryPortProber
 from GameserverLister.listers import BattlelogServerLister
 
 
@@ -30,8 +30,14 @@ from GameserverLister.listers import BattlelogServerLister
 @http.page_limit
 @http.sleep
 @http.max_attempts
+@http.concurrency
+@http.rate_limit
+@http.coverage_target
+@http.http2
 @http.proxy
 @queryport.find
+@queryport.prober
+@queryport.probe_concurrency
 @queryport.gamedig_bin
 @queryport.gamedig_concurrency
 @common.expire
@@ -40,6 +46,10 @@ from GameserverLister.listers import BattlelogServerLister
 @common.recover
 @common.add_links
 @common.txt
+@common.compact
+@common.snapshot
+@common.delta
+@common.store
 @common.debug
 def run(
         game: BattlelogGame,
@@ -47,8 +57,14 @@ def run(
         page_limit: int,
         sleep: float,
         max_attempts: int,
+        concurrency: int,
+        rate_limit: float,
+        coverage_target: float,
+        http2: bool,
         proxy: Optional[str],
         find_query_port: bool,
+        prober: QueryPortProber,
+        probe_concurrency: int,
         gamedig_bin: str,
         gamedig_concurrency: int,
         expire: bool,
@@ -56,6 +72,10 @@ def run(
         recover: bool,
         add_links: bool,
         txt: bool,
+        compact: bool,
+        snapshot: bool,
+        delta: bool,
+        store: StoreBackend,
         list_dir: str,
         debug: bool
 ):
@@ -76,25 +96,33 @@ def run(
         recover,
         add_links,
         txt,
+        compact,
+        snapshot,
+        delta,
+        store,
         list_dir,
         sleep,
         max_attempts,
+        concurrency,
+        rate_limit,
+        coverage_target,
+        http2,
         proxy
     )
 
 
 
-    before = len(lister.servers)
     lister.update_server_list()
 
     if find_query_port:
-        lister.find_query_ports(gamedig_bin, gamedig_concurrency, expired_ttl)
+        lister.find_query_ports(prober, gamedig_bin, gamedig_concurrency, probe_concurrency, expired_ttl)
 
-    removed, recovered = lister.remove_expired_servers()
+    lister.remove_expired_servers()
     lister.write_to_file()
 
     logger.info(f'Server list updated ('
                 f'total: {len(lister.servers)}, '
-                f'added: {len(lister.servers) + removed - before}, '
-                f'removed: {removed}, '
-                f'recovered: {recovered})')
+                f'added: {len(lister.changes.added)}, '
+                f'updated: {len(lister.changes.updated)}, '
+                f'removed: {len(lister.changes.expired)}, '
+                f'recovered: {len(lister.changes.recovered)})')
@@ -5,6 +5,7 @@ import click
 
 from GameserverLister.commands.options import common, queryport
 from GameserverLister.common.logger import logger
+from GameserverLister.common.types import StoreBackend, QueryPortProber
 from GameserverLister.listers import BadCompany2ServerLister
 
 
@@ -17,6 +18,8 @@ from GameserverLister.listers import BadCompany2ServerLister
     help='Timeout to use for server list retrieval request'
 )
 @queryport.find
+@queryport.prober
+@queryport.probe_concurrency
 @queryport.gamedig_bin
 @queryport.gamedig_concurrency
 @common.expire
@@ -25,10 +28,16 @@ from GameserverLister.listers import BadCompany2ServerLister
 @common.recover
 @common.add_links
 @common.txt
+@common.compact
+@common.snapshot
+@common.delta
+@common.store
 @common.debug
 def run(
         timeout: int,
         find_query_port: bool,
+        prober: QueryPortProber,
+        probe_concurrency: int,
         gamedig_bin: str,
         gamedig_concurrency: int,
         expire: bool,
@@ -36,6 +45,10 @@ def run(
         recover: bool,
         add_links: bool,
         txt: bool,
+        compact: bool,
+        snapshot: bool,
+        delta: bool,
+        store: StoreBackend,
         list_dir: str,
         debug: bool
 ):
@@ -50,21 +63,25 @@ def run(
         recover,
         add_links,
         txt,
+        compact,
+        snapshot,
+        delta,
+        store,
         list_dir,
         timeout
     )
 
-    before = len(lister.servers)
     lister.update_server_list()
 
     if find_query_port:
-        lister.find_query_ports(gamedig_bin, gamedig_concurrency, expired_ttl)
+        lister.find_query_ports(prober, gamedig_bin, gamedig_concurrency, probe_concurrency, expired_ttl)
 
-    removed, recovered = lister.remove_expired_servers()
+    lister.remove_expired_servers()
     lister.write_to_file()
 
     logger.info(f'Server list updated ('
                 f'total: {len(lister.servers)}, '
-                f'added: {len(lister.servers) + removed - before}, '
-                f'removed: {removed}, '
-                f'recovered: {recovered})')
+                f'added: {len(lister.changes.added)}, '
+                f'updated: {len(lister.changes.updated)}, '
+                f'removed: {len(lister.changes.expired)}, '
+                f'recovered: {len(lister.changes.recovered)})')
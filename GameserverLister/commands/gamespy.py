@@ -6,10 +6,10 @@ import click
 from GameserverLister.commands.options import common, gameport
 from GameserverLister.commands.options.types import EnumChoice
 from GameserverLister.common.logger import logger
-from GameserverLister.common.types import GamespyGame, GamespyPrincipal
+from GameserverLister.common.types import GamespyGame, GamespyPrincipal, StoreBackend, GamespyListProvider
 from GameserverLister.games.gamespy import GAMESPY_GAME_CONFIGS
 from GameserverLister.listers import GamespyServerLister
-from GameserverLister.providers import GamespyListProtocolProvider, CrympAPIProvider
+from GameserverLister.providers import GamespyListProtocolProvider, GamespyMasterProvider, CrympAPIProvider
 
 
 @click.command
@@ -27,6 +27,14 @@ from GameserverLister.providers import GamespyListProtocolProvider, CrympAPIProv
     required=True,
     help='Principal server to query'
 )
+@click.option(
+    '--list-provider',
+    type=EnumChoice(GamespyListProvider),
+    default=GamespyListProvider.GSLIST,
+    help='How to retrieve server lists from the principal (gslist = gslist binary, native = in-process, '
+         'experimental and not available for games using encrypted legacy lists, i.e. BF1942, BFVietnam and '
+         'Vietcong, which always use gslist)'
+)
 @click.option(
     '-b',
     '--gslist',
@@ -66,28 +74,53 @@ from GameserverLister.providers import GamespyListProtocolProvider, CrympAPIProv
     is_flag=True,
     help='(Attempt to) verify game servers returned by principal are game servers for the current game'
 )
+@click.option(
+    '--query-concurrency',
+    type=click.IntRange(min=1),
+    default=64,
+    help='Number of servers to query at once (when verifying/adding links/adding game ports or recovering servers)'
+)
+@click.option(
+    '--query-timeout',
+    type=click.FloatRange(min=0, min_open=True),
+    default=3.0,
+    help='Number of seconds to wait for a server to respond to a query'
+)
 @gameport.add
+@gameport.ttl
 @common.expire
 @common.expired_ttl
 @common.list_dir
 @common.recover
 @common.add_links
 @common.txt
+@common.compact
+@common.snapshot
+@common.delta
+@common.store
 @common.debug
 def run(
         game: GamespyGame,
         principal: GamespyPrincipal,
+        list_provider: GamespyListProvider,
         gslist_path: str,
         gslist_filter: str,
         gslist_super_query: bool,
         gslist_timeout: int,
         verify: bool,
+        query_concurrency: int,
+        query_timeout: float,
         add_game_port: bool,
+        game_port_ttl: float,
         expire: bool,
         expired_ttl: int,
         recover: bool,
         add_links: bool,
         txt: bool,
+        compact: bool,
+        snapshot: bool,
+        delta: bool,
+        store: StoreBackend,
         list_dir: str,
         debug: bool
 ):
@@ -107,40 +140,52 @@ def run(
     # Determine which provider to use
     if principal is GamespyPrincipal.Crymp_org:
         provider = CrympAPIProvider()
+    elif list_provider is GamespyListProvider.NATIVE and GamespyMasterProvider.supports(game) \
+            and not gslist_super_query:
+        provider = GamespyMasterProvider()
     else:
+        # Encrypted legacy server lists (enctype 2) and super queries require gslist
+        if list_provider is GamespyListProvider.NATIVE:
+            logging.warning(f'Native list provider does not support {"super queries" if gslist_super_query else game}, '
+                            f'using gslist instead')
         provider = GamespyListProtocolProvider(gslist_path)
 
     lister = GamespyServerLister(
         game,
         principal,
         provider,
-        gslist_path,
         gslist_filter,
         gslist_super_query,
         gslist_timeout,
         verify,
         add_game_port,
+        query_concurrency,
+        query_timeout,
+        game_port_ttl,
         expire,
         expired_ttl,
         recover,
         add_links,
         txt,
+        compact,
+        snapshot,
+        delta,
+        store,
         list_dir
     )
 
-    before = len(lister.servers)
-
     try:
         lister.update_server_list()
     except Exception as e:
         logging.critical(f'Failed to update server list: {e}')
         sys.exit(1)
 
-    removed, recovered = lister.remove_expired_servers()
+    lister.remove_expired_servers()
     lister.write_to_file()
 
     logger.info(f'Server list updated ('
                 f'total: {len(lister.servers)}, '
-                f'added: {len(lister.servers) + removed - before}, '
-                f'removed: {removed}, '
-                f'recovered: {recovered})')
+                f'added: {len(lister.changes.added)}, '
+                f'updated: {len(lister.changes.updated)}, '
+                f'removed: {len(lister.changes.expired)}, '
+                f'recovered: {len(lister.changes.recovered)})')
@@ -6,7 +6,7 @@ import click
 from GameserverLister.commands.options import common, http
 from GameserverLister.commands.options.types import EnumChoice
 from GameserverLister.common.logger import logger
-from GameserverLister.common.types import GametoolsGame, GametoolsPlatform
+from GameserverLister.common.types import GametoolsGame, GametoolsPlatform, StoreBackend
 from GameserverLister.listers import GametoolsServerLister
 
 
@@ -35,12 +35,20 @@ from GameserverLister.listers import GametoolsServerLister
 @http.page_limit
 @http.sleep
 @http.max_attempts
+@http.concurrency
+@http.rate_limit
+@http.coverage_target
+@http.http2
 @common.expire
 @common.expired_ttl
 @common.list_dir
 @common.recover
 @common.add_links
 @common.txt
+@common.compact
+@common.snapshot
+@common.delta
+@common.store
 @common.debug
 def run(
         game: GametoolsGame,
@@ -48,12 +56,20 @@ def run(
         page_limit: int,
         sleep: float,
         max_attempts: int,
+        concurrency: int,
+        rate_limit: float,
+        coverage_target: float,
+        http2: bool,
         include_official: bool,
         expire: bool,
         expired_ttl: int,
         recover: bool,
         add_links: bool,
         txt: bool,
+        compact: bool,
+        snapshot: bool,
+        delta: bool,
+        store: StoreBackend,
         list_dir: str,
         debug: bool
 ):
@@ -71,20 +87,28 @@ def run(
         recover,
         add_links,
         txt,
+        compact,
+        snapshot,
+        delta,
+        store,
         list_dir,
         sleep,
         max_attempts,
+        concurrency,
+        rate_limit,
+        coverage_target,
+        http2,
         include_official
     )
 
-    before = len(lister.servers)
     lister.update_server_list()
 
-    removed, recovered = lister.remove_expired_servers()
+    lister.remove_expired_servers()
     lister.write_to_file()
 
     logger.info(f'Server list updated ('
                 f'total: {len(lister.servers)}, '
-                f'added: {len(lister.servers) + removed - before}, '
-                f'removed: {removed}, '
-                f'recovered: {recovered})')
+                f'added: {len(lister.changes.added)}, '
+                f'updated: {len(lister.changes.updated)}, '
+                f'removed: {len(lister.changes.expired)}, '
+                f'recovered: {len(lister.changes.recovered)})')
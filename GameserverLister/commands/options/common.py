@@ -1,5 +1,8 @@
 import click
 
+from GameserverLister.commands.options.types import EnumChoice
+from GameserverLister.common.types import StoreBackend
+
 expire = click.option(
     '--no-expire',
     'expire',
@@ -41,6 +44,30 @@ txt = click.option(
     is_flag=True,
     help='Additionally output plain text server list in format "[ip] [game port] [[query port]]\n"'
 )
+compact = click.option(
+    '--compact',
+    default=False,
+    is_flag=True,
+    help='Write JSON server list without indentation (smaller files, faster to write)'
+)
+snapshot = click.option(
+    '--snapshot',
+    default=False,
+    is_flag=True,
+    help='Additionally output compact binary server list snapshot (preferred over JSON list when loading if newer)'
+)
+delta = click.option(
+    '--delta',
+    default=False,
+    is_flag=True,
+    help='Additionally output servers added, updated, expired and recovered during run as NDJSON delta file'
+)
+store = click.option(
+    '--store',
+    type=EnumChoice(StoreBackend),
+    default=str(StoreBackend.JSON),
+    help='Backend to persist servers in between runs (JSON server list is written either way)'
+)
 debug = click.option(
     '--debug',
     default=False,
@@ -6,3 +6,9 @@ add = click.option(
     is_flag=True,
     help='(Attempt to) add the game port for each server'
 )
+ttl = click.option(
+    '--game-port-ttl',
+    type=click.FloatRange(min=0),
+    default=24.0,
+    help='Number of hours to cache game ports discovered by querying servers (0 = disable caching)'
+)
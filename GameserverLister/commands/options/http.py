@@ -19,6 +19,31 @@ max_attempts = click.option(
     default=3,
     help='Max number of attempts for fetching a page of servers'
 )
+concurrency = click.option(
+    '--concurrency',
+    type=click.IntRange(min=1),
+    default=1,
+    help='Number of pages to request concurrently'
+)
+rate_limit = click.option(
+    '--rate-limit',
+    type=click.FloatRange(min=0),
+    default=0,
+    help='Max number of requests per second across all concurrent requests (0 = unlimited)'
+)
+coverage_target = click.option(
+    '--coverage-target',
+    type=click.FloatRange(min=0, max=1),
+    default=0.995,
+    help='Stop retrieval once the estimated share of servers found reaches this value (0 = disabled, '
+         'stop after [page-limit] pages without new servers only)'
+)
+http2 = click.option(
+    '--http2',
+    default=False,
+    is_flag=True,
+    help='Use HTTP/2 where supported by the server (requires httpx[http2])'
+)
 proxy = click.option(
     '--proxy',
     type=str,
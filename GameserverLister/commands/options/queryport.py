@@ -1,11 +1,27 @@
 import click
 
+from GameserverLister.commands.options.types import EnumChoice
+from GameserverLister.common.types import QueryPortProber
+
 find = click.option(
     '--find-query-port',
     default=False,
     is_flag=True,
     help='(Attempt to) find the query port for each server'
 )
+prober = click.option(
+    '--query-port-prober',
+    'prober',
+    type=EnumChoice(QueryPortProber),
+    default=QueryPortProber.GAMEDIG,
+    help='How to probe candidate query ports (native = in-process queries, gamedig = gamedig process per port)'
+)
+probe_concurrency = click.option(
+    '--probe-concurrency',
+    type=click.IntRange(min=1),
+    default=64,
+    help='Number of native query port probes to run in parallel'
+)
 gamedig_bin = click.option(
     '--gamedig-bin',
     type=str,
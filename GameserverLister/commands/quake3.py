@@ -6,10 +6,12 @@ import click
 from GameserverLister.commands.options import common
 from GameserverLister.commands.options.types import EnumChoice
 from GameserverLister.common.logger import logger
-from GameserverLister.common.types import Quake3Game
+from GameserverLister.common.types import Quake3Game, StoreBackend
 from GameserverLister.games.quake3 import QUAKE3_CONFIGS
 from GameserverLister.listers import Quake3ServerLister
 
+ALL_PRINCIPALS = 'all'
+
 
 @click.command
 @click.option(
@@ -22,9 +24,9 @@ from GameserverLister.listers import Quake3ServerLister
 @click.option(
     '-p',
     '--principal',
-    type=click.Choice([p for g in QUAKE3_CONFIGS for p in QUAKE3_CONFIGS[g]['servers'].keys()]),
+    type=click.Choice([ALL_PRINCIPALS, *[p for g in QUAKE3_CONFIGS for p in QUAKE3_CONFIGS[g]['servers'].keys()]]),
     required=True,
-    help='Principal server to query'
+    help=f'Principal server to query ("{ALL_PRINCIPALS}" to query all principals available for the game at once)'
 )
 @common.expire
 @common.expired_ttl
@@ -32,6 +34,10 @@ from GameserverLister.listers import Quake3ServerLister
 @common.recover
 @common.add_links
 @common.txt
+@common.compact
+@common.snapshot
+@common.delta
+@common.store
 @common.debug
 def run(
         game: Quake3Game,
@@ -41,42 +47,54 @@ def run(
         recover: bool,
         add_links: bool,
         txt: bool,
+        compact: bool,
+        snapshot: bool,
+        delta: bool,
+        store: StoreBackend,
         list_dir: str,
         debug: bool
 ):
     logging.basicConfig(level=logging.DEBUG if debug else logging.INFO, stream=sys.stdout,
                         format='%(asctime)s %(levelname)-8s %(message)s')
 
-    # Set principal
+    # Set principal(s)
     available_principals = list(QUAKE3_CONFIGS[game]['servers'].keys())
-    if principal.lower() not in available_principals:
+    if principal.lower() == ALL_PRINCIPALS:
+        principals = available_principals
+    elif principal.lower() not in available_principals:
         # Given principal is invalid => use default principal
         logging.warning(
             f'Principal {principal} is not available for {game}, '
             f'defaulting to {available_principals[0]} instead'
             )
-        principal = available_principals[0]
+        principals = [available_principals[0]]
+    else:
+        principals = [principal.lower()]
 
-    logger.info(f'Listing servers for {game} via quake3/{principal}')
+    logger.info(f'Listing servers for {game} via {", ".join(f"quake3/{p}" for p in principals)}')
 
     lister = Quake3ServerLister(
         game,
-        principal,
+        principals,
         expire,
         expired_ttl,
         recover,
         add_links,
         txt,
+        compact,
+        snapshot,
+        delta,
+        store,
         list_dir
     )
 
-    before = len(lister.servers)
     lister.update_server_list()
-    removed, recovered = lister.remove_expired_servers()
+    lister.remove_expired_servers()
     lister.write_to_file()
 
     logger.info(f'Server list updated ('
                 f'total: {len(lister.servers)}, '
-                f'added: {len(lister.servers) + removed - before}, '
-                f'removed: {removed}, '
-                f'recovered: {recovered})')
+                f'added: {len(lister.changes.added)}, '
+                f'updated: {len(lister.changes.updated)}, '
+                f'removed: {len(lister.changes.expired)}, '
+                f'recovered: {len(lister.changes.recovered)})')
@@ -6,7 +6,7 @@ import click
 from GameserverLister.commands.options import common
 from GameserverLister.commands.options.types import EnumChoice
 from GameserverLister.common.logger import logger
-from GameserverLister.common.types import Unreal2Game
+from GameserverLister.common.types import Unreal2Game, StoreBackend
 from GameserverLister.games.unreal2 import UNREAL2_CONFIGS
 from GameserverLister.listers import Unreal2ServerLister
 
@@ -46,6 +46,10 @@ from GameserverLister.listers import Unreal2ServerLister
 @common.recover
 @common.add_links
 @common.txt
+@common.compact
+@common.snapshot
+@common.delta
+@common.store
 @common.debug
 def run(
         game: Unreal2Game,
@@ -57,6 +61,10 @@ def run(
         recover: bool,
         add_links: bool,
         txt: bool,
+        compact: bool,
+        snapshot: bool,
+        delta: bool,
+        store: StoreBackend,
         list_dir: str,
         debug: bool
 ):
@@ -85,16 +93,20 @@ def run(
         recover,
         add_links,
         txt,
+        compact,
+        snapshot,
+        delta,
+        store,
         list_dir
     )
 
-    before = len(lister.servers)
     lister.update_server_list()
-    removed, recovered = lister.remove_expired_servers()
+    lister.remove_expired_servers()
     lister.write_to_file()
 
     logger.info(f'Server list updated ('
                 f'total: {len(lister.servers)}, '
-                f'added: {len(lister.servers) + removed - before}, '
-                f'removed: {removed}, '
-                f'recovered: {recovered})')
+                f'added: {len(lister.changes.added)}, '
+                f'updated: {len(lister.changes.updated)}, '
+                f'removed: {len(lister.changes.expired)}, '
+                f'recovered: {len(lister.changes.recovered)})')
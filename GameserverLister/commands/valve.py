@@ -6,7 +6,7 @@ import click
 from GameserverLister.commands.options import common, gameport
 from GameserverLister.commands.options.types import EnumChoice
 from GameserverLister.common.logger import logger
-from GameserverLister.common.types import ValveGame, ValvePrincipal
+from GameserverLister.common.types import ValveGame, ValvePrincipal, StoreBackend
 from GameserverLister.games.valve import VALVE_GAME_CONFIGS
 from GameserverLister.listers import ValveServerLister
 
@@ -48,13 +48,42 @@ from GameserverLister.listers import ValveServerLister
     default=10,
     help='Maximum number of pages to retrieve from the server list (per region)'
 )
+@click.option(
+    '--concurrency',
+    type=click.IntRange(min=1),
+    default=1,
+    help='Number of regions to retrieve concurrently'
+)
+@click.option(
+    '--rate-limit',
+    type=click.FloatRange(min=0),
+    default=0,
+    help='Max number of principal requests per second across all regions (0 = unlimited)'
+)
+@click.option(
+    '--query-concurrency',
+    type=click.IntRange(min=1),
+    default=64,
+    help='Number of servers to query at once (when adding links/adding game ports or recovering servers)'
+)
+@click.option(
+    '--query-timeout',
+    type=click.FloatRange(min=0, min_open=True),
+    default=3.0,
+    help='Number of seconds to wait for a server to respond to a query'
+)
 @gameport.add
+@gameport.ttl
 @common.expire
 @common.expired_ttl
 @common.list_dir
 @common.recover
 @common.add_links
 @common.txt
+@common.compact
+@common.snapshot
+@common.delta
+@common.store
 @common.debug
 def run(
         game: ValveGame,
@@ -62,12 +91,21 @@ def run(
         filters: str,
         timeout: int,
         max_pages: int,
+        concurrency: int,
+        rate_limit: float,
+        query_concurrency: int,
+        query_timeout: float,
         add_game_port: bool,
+        game_port_ttl: float,
         expire: bool,
         expired_ttl: int,
         recover: bool,
         add_links: bool,
         txt: bool,
+        compact: bool,
+        snapshot: bool,
+        delta: bool,
+        store: StoreBackend,
         list_dir: str,
         debug: bool
 ):
@@ -90,22 +128,31 @@ def run(
         timeout,
         filters,
         max_pages,
+        concurrency,
+        rate_limit,
         add_game_port,
+        query_concurrency,
+        query_timeout,
+        game_port_ttl,
         expire,
         expired_ttl,
         recover,
         add_links,
         txt,
+        compact,
+        snapshot,
+        delta,
+        store,
         list_dir
     )
 
-    before = len(lister.servers)
     lister.update_server_list()
-    removed, recovered = lister.remove_expired_servers()
+    lister.remove_expired_servers()
     lister.write_to_file()
 
     logger.info(f'Server list updated ('
                 f'total: {len(lister.servers)}, '
-                f'added: {len(lister.servers) + removed - before}, '
-                f'removed: {removed}, '
-                f'recovered: {recovered})')
+                f'added: {len(lister.changes.added)}, '
+                f'updated: {len(lister.changes.updated)}, '
+                f'removed: {len(lister.changes.expired)}, '
+                f'recovered: {len(lister.changes.recovered)})')
@@ -0,0 +1,79 @@
+from typing import Dict, Iterable, List, Set
+
+# Attributes which (usually) change on every run and are thus not considered changes of a server
+VOLATILE_ATTRIBUTES = {'last_seen_at', 'last_queried_at', 'as_of'}
+
+
+def get_state(obj: object) -> dict:
+    """
+    Get the non-volatile state of a server (or nested object) for change detection,
+    resolving nested lists of objects (via statuses, links) to tuples of their non-volatile attribute values
+    :param obj: Server to get state of
+    :return: Dict of non-volatile attributes
+    """
+    return {
+        attribute: [get_item_state(item) for item in value] if isinstance(value, list) else value
+        for attribute, value in vars(obj).items() if attribute not in VOLATILE_ATTRIBUTES
+    }
+
+
+def get_item_state(item: object) -> tuple:
+    return tuple(value for attribute, value in vars(item).items() if attribute not in VOLATILE_ATTRIBUTES)
+
+
+def get_changed_fields(before: dict, after: dict) -> List[str]:
+    """
+    Determine which fields of a server changed, ignoring volatile attributes (such as last seen at timestamps,
+    including those of nested via statuses/links)
+    :param before: Server state before the change (see get_state)
+    :param after: Server state after the change (see get_state)
+    :return: List of changed fields, named as in the server's JSON representation
+    """
+    return [
+        to_json_key(attribute) for attribute in after.keys() | before.keys()
+        if before.get(attribute) != after.get(attribute)
+    ]
+
+
+def to_json_key(attribute: str) -> str:
+    head, *tail = attribute.split('_')
+    return head + ''.join(part.capitalize() for part in tail)
+
+
+class ChangeTracker:
+    """
+    Tracks which servers were added, updated, expired and recovered during a run (all keyed by uid, in order)
+    """
+    added: Dict[str, None]
+    updated: Dict[str, Set[str]]
+    expired: Dict[str, None]
+    recovered: Dict[str, None]
+
+    def __init__(self):
+        self.added = {}
+        self.updated = {}
+        self.expired = {}
+        self.recovered = {}
+
+    def record_added(self, uid: str) -> None:
+        self.added[uid] = None
+
+    def record_updated(self, uid: str, fields: Iterable[str]) -> None:
+        # Changes to servers added during this run are already covered by the addition
+        if uid in self.added:
+            return
+        fields = set(fields)
+        if len(fields) > 0:
+            self.updated.setdefault(uid, set()).update(fields)
+
+    def record_expired(self, uid: str) -> None:
+        # Server is gone, so any earlier changes are irrelevant
+        self.added.pop(uid, None)
+        self.updated.pop(uid, None)
+        self.expired[uid] = None
+
+    def record_recovered(self, uid: str) -> None:
+        self.recovered[uid] = None
+
+    def __len__(self):
+        return len(self.added) + len(self.updated) + len(self.expired) + len(self.recovered)
@@ -0,0 +1,78 @@
+import threading
+import time
+from typing import Callable
+
+
+class SharedBackoff:
+    """
+    Backoff state shared by concurrent workers, so that any failed check slows down all following checks
+    (mirroring the "checks since last ok" counter used by serial checks)
+    """
+    get_timeout: Callable[[int], float]
+    checks_since_last_ok: int
+    lock: threading.Lock
+
+    def __init__(self, get_timeout: Callable[[int], float]):
+        self.get_timeout = get_timeout
+        self.checks_since_last_ok = 0
+        self.lock = threading.Lock()
+
+    def wait(self) -> int:
+        """
+        Sleep for the backoff timeout matching the current number of checks since the last ok check
+        :return: Number of checks since the last ok check (to be passed to the check)
+        """
+        with self.lock:
+            checks_since_last_ok = self.checks_since_last_ok
+        timeout = self.get_timeout(checks_since_last_ok)
+        if timeout > 0:
+            time.sleep(timeout)
+        return checks_since_last_ok
+
+    def record(self, check_ok: bool, before: int, after: int) -> None:
+        """
+        Record the outcome of a check
+        :param check_ok: Whether the check was ok
+        :param before: Number of checks since last ok passed to the check
+        :param after: Number of checks since last ok returned by the check
+        """
+        with self.lock:
+            if check_ok and after == 0:
+                self.checks_since_last_ok = 0
+            elif after > before:
+                self.checks_since_last_ok += after - before
+
+
+class TokenBucket:
+    """
+    Token bucket rate limit shared by concurrent workers, allowing [rate] acquisitions per second on average
+    (and bursts of up to [capacity] acquisitions)
+    """
+    rate: float
+    capacity: float
+    tokens: float
+    updated_at: float
+    lock: threading.Lock
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        Take a token from the bucket, sleeping until the token is available if the bucket is empty
+        (tokens are reserved in order, so waiting workers are served first come, first served)
+        :return: Number of seconds slept
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= 1
+            timeout = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if timeout > 0:
+            time.sleep(timeout)
+        return timeout
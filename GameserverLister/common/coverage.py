@@ -0,0 +1,64 @@
+from typing import Dict, Iterable, Optional
+
+
+class CoverageEstimator:
+    """
+    Estimates the total number of servers from how often each server has been seen across random samples ("pages") of
+    a server list, to tell how much of the list has been seen. Uses the bias-corrected Chao1 estimator
+    (known + f1 * (f1 - 1) / (2 * (f2 + 1)), with f1/f2 being the number of servers seen on exactly one/two pages),
+    which holds up reasonably well if some servers are returned more often than others.
+    """
+    target: float
+    min_pages: int
+    pages: int
+    # Number of pages each server has been seen on
+    sightings: Dict[str, int]
+    # Number of servers seen on exactly n pages (by n)
+    frequencies: Dict[int, int]
+
+    def __init__(self, target: float, min_pages: int = 2):
+        """
+        :param target: Share of estimated total servers to have seen before the target is reached (0 to disable)
+        :param min_pages: Number of pages to observe before estimating coverage
+        """
+        self.target = target
+        self.min_pages = min_pages
+        self.pages = 0
+        self.sightings = {}
+        self.frequencies = {}
+
+    @property
+    def known(self) -> int:
+        return len(self.sightings)
+
+    def observe(self, uids: Iterable[str]) -> None:
+        """
+        Record a page (sample) of servers
+        :param uids: Uids of servers on the page (servers listed multiple times on the same page are counted once)
+        """
+        for uid in set(uids):
+            seen = self.sightings.get(uid, 0)
+            if seen > 0:
+                self.frequencies[seen] -= 1
+            self.sightings[uid] = seen + 1
+            self.frequencies[seen + 1] = self.frequencies.get(seen + 1, 0) + 1
+        self.pages += 1
+
+    def estimate_total(self) -> Optional[float]:
+        if self.pages < self.min_pages:
+            return None
+        f1 = self.frequencies.get(1, 0)
+        f2 = self.frequencies.get(2, 0)
+        return self.known + f1 * (f1 - 1) / (2 * (f2 + 1))
+
+    def estimate_coverage(self) -> Optional[float]:
+        total = self.estimate_total()
+        if total is None:
+            return None
+        return self.known / total if total > 0 else 1.0
+
+    def is_target_reached(self) -> bool:
+        if self.target <= 0:
+            return False
+        coverage = self.estimate_coverage()
+        return coverage is not None and coverage >= self.target
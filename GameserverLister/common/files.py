@@ -0,0 +1,228 @@
+import json
+import logging
+import os
+import re
+import tempfile
+from contextlib import contextmanager
+from typing import Any, Iterator, TextIO, Type, Tuple, Iterable, IO
+
+from GameserverLister.common.changes import ChangeTracker
+from GameserverLister.common.servers import Server
+from GameserverLister.common.store import ServerStore
+
+READ_CHUNK_SIZE = 64 * 1024
+WHITESPACE_REGEX = re.compile(r'[ \t\n\r]*')
+# Characters which may continue a number (e.g. "1." or "1.5e" could be followed by more digits)
+NUMBER_CONTINUATION_REGEX = re.compile(r'[0-9.eE+\-]*')
+
+
+def iter_json_array(file: TextIO, chunk_size: int = READ_CHUNK_SIZE) -> Iterator[Any]:
+    """
+    Incrementally decode the elements of a JSON document's top-level array, reading the file in chunks
+    rather than parsing the entire document at once
+    :param file: File to read JSON document from
+    :param chunk_size: Number of characters to read from the file at once
+    :return: Generator yielding each decoded element of the array
+    """
+    decoder = json.JSONDecoder()
+    buffer, pos, eof = file.read(chunk_size), 0, False
+    started, expect_delimiter = False, False
+    while True:
+        pos = WHITESPACE_REGEX.match(buffer, pos).end()
+        if pos == len(buffer):
+            if eof:
+                raise json.JSONDecodeError('Unexpected end of document', buffer, pos)
+            buffer, pos, eof = read_more(file, buffer, pos, chunk_size)
+            continue
+
+        char = buffer[pos]
+        if not started:
+            if char != '[':
+                raise json.JSONDecodeError('Expecting \'[\'', buffer, pos)
+            pos += 1
+            started = True
+        elif char == ']':
+            pos += 1
+            break
+        elif expect_delimiter:
+            if char != ',':
+                raise json.JSONDecodeError('Expecting \',\' delimiter', buffer, pos)
+            pos += 1
+            expect_delimiter = False
+        else:
+            # Decode next element, reading more data if the element is (or might be) incomplete
+            # (an element reaching the end of the buffer could be a truncated scalar, a number could also be
+            # followed by a truncated fraction/exponent the decoder stopped before)
+            try:
+                element, end = decoder.raw_decode(buffer, pos)
+                if isinstance(element, (int, float)) and not isinstance(element, bool):
+                    end_of_token = NUMBER_CONTINUATION_REGEX.match(buffer, end).end()
+                else:
+                    end_of_token = end
+                complete = end_of_token < len(buffer) or eof
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                complete = False
+
+            if not complete:
+                buffer, pos, eof = read_more(file, buffer, pos, chunk_size)
+                continue
+
+            yield element
+            pos = end
+            expect_delimiter = True
+
+    # Make sure nothing but whitespace follows the array
+    while True:
+        pos = WHITESPACE_REGEX.match(buffer, pos).end()
+        if pos < len(buffer):
+            raise json.JSONDecodeError('Extra data', buffer, pos)
+        if eof:
+            break
+        buffer, pos, eof = read_more(file, buffer, pos, chunk_size)
+
+
+def read_more(file: TextIO, buffer: str, pos: int, chunk_size: int) -> Tuple[str, int, bool]:
+    """
+    Read the next chunk from the file, dropping the already consumed part of the buffer
+    :return: Updated buffer, position in updated buffer and whether the end of the file has been reached
+    """
+    chunk = file.read(chunk_size)
+    return buffer[pos:] + chunk, 0, chunk == ''
+
+
+def iter_servers(file: TextIO, server_class: Type[Server]) -> Iterator[Server]:
+    """
+    Incrementally load servers from a JSON server list file, decoding each top-level server object directly
+    :param file: Server list file to read servers from
+    :param server_class: Class of servers contained in the list
+    :return: Generator yielding each server in the list
+    """
+    for index, parsed in enumerate(iter_json_array(file)):
+        server = server_class.load(parsed) if isinstance(parsed, dict) else parsed
+        if not isinstance(server, Server):
+            logging.warning(f'Ignoring invalid server list entry at index {index}')
+            continue
+        yield server
+
+
+@contextmanager
+def atomic_write(path: str, mode: str = 'w', **kwargs) -> Iterator[IO]:
+    """
+    Open a temporary file next to the given path for writing, which (once written and synced to disk) atomically
+    replaces the file at the given path. If writing fails, the file at the given path remains untouched.
+    :param path: Path of the file to write
+    :param mode: Mode to open the temporary file in
+    :param kwargs: Additional arguments to open the temporary file with
+    :return: Context manager providing the opened temporary file
+    """
+    directory, name = os.path.split(os.path.realpath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=f'.{name}.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, mode, **kwargs) as file:
+            yield file
+            file.flush()
+            os.fsync(file.fileno())
+        # Temporary files are only accessible by the owner, so use permissions a "normal" file would be created with
+        os.chmod(temp_path, get_file_permissions(path))
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+    sync_directory(directory)
+
+
+def get_file_permissions(path: str) -> int:
+    # Keep permissions of any existing file
+    if os.path.isfile(path):
+        return os.stat(path).st_mode & 0o777
+
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+def sync_directory(directory: str) -> None:
+    # Make sure the rename is persisted (not supported on all platforms, e.g. Windows)
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def write_servers_json(
+        file: TextIO,
+        servers: Iterable[Server],
+        ensure_ascii: bool = True,
+        compact: bool = False
+) -> None:
+    """
+    Write servers to a JSON server list file one server at a time
+    (output is identical to dumping the entire list with an indent of two or, if compact, without any whitespace)
+    :param file: File to write servers to
+    :param servers: Servers to write
+    :param ensure_ascii: Escape any non-ascii characters
+    :param compact: Write JSON without indentation/whitespace
+    """
+    if compact:
+        encoder = json.JSONEncoder(ensure_ascii=ensure_ascii, separators=(',', ':'))
+        start, delimiter, end = '[', ',', ']'
+    else:
+        encoder = json.JSONEncoder(ensure_ascii=ensure_ascii, indent=2)
+        start, delimiter, end = '[\n  ', ',\n  ', '\n]'
+
+    written = 0
+    for server in servers:
+        encoded = encoder.encode(server.dump())
+        if not compact:
+            encoded = encoded.replace('\n', '\n  ')
+        file.write((start if written == 0 else delimiter) + encoded)
+        written += 1
+
+    file.write(end if written > 0 else '[]')
+
+
+def write_servers_txt(file: TextIO, servers: Iterable[Server]) -> None:
+    """
+    Write servers to a plain text server list file one server (line) at a time
+    :param file: File to write servers to
+    :param servers: Servers to write
+    """
+    for index, server in enumerate(servers):
+        file.write(server.txt() if index == 0 else '\n' + server.txt())
+
+
+def write_changes_ndjson(file: TextIO, changes: ChangeTracker, servers: ServerStore, ensure_ascii: bool = True) -> None:
+    """
+    Write tracked changes to a delta file, one JSON object per line (added, updated and recovered servers
+    including their current state, expired servers by uid only)
+    :param file: File to write changes to
+    :param changes: Changes to write
+    :param servers: Current servers
+    :param ensure_ascii: Escape any non-ascii characters
+    """
+    encoder = json.JSONEncoder(ensure_ascii=ensure_ascii, separators=(',', ':'))
+    for change, uids in [('added', changes.added), ('updated', changes.updated), ('recovered', changes.recovered)]:
+        for uid in uids:
+            server = servers.get(uid)
+            if server is None:
+                continue
+            line = {'change': change, 'uid': uid}
+            if change == 'updated':
+                line['fields'] = sorted(changes.updated[uid])
+            line['server'] = server.dump()
+            file.write(encoder.encode(line) + '\n')
+
+    for uid in changes.expired:
+        file.write(encoder.encode({'change': 'expired', 'uid': uid}) + '\n')
@@ -0,0 +1,115 @@
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Optional, List
+
+from GameserverLister.common.files import atomic_write
+
+
+class GamePortCacheEntry:
+    game_port: Optional[int]
+    queried_at: datetime
+    failures: int
+
+    def __init__(self, game_port: Optional[int], queried_at: datetime, failures: int = 0):
+        self.game_port = game_port
+        self.queried_at = queried_at
+        self.failures = failures
+
+    def is_fresh(self, ttl: float) -> bool:
+        return self.failures == 0 and datetime.now().astimezone() <= self.queried_at + timedelta(hours=ttl)
+
+    @staticmethod
+    def load(parsed: dict) -> 'GamePortCacheEntry':
+        return GamePortCacheEntry(
+            parsed.get('gamePort'),
+            datetime.fromisoformat(parsed['queriedAt']),
+            parsed.get('failures', 0)
+        )
+
+    def dump(self) -> dict:
+        return {
+            'gamePort': self.game_port,
+            'queriedAt': self.queried_at.isoformat(),
+            'failures': self.failures
+        }
+
+
+class GamePortCache:
+    """
+    On-disk cache of game ports discovered by querying servers (by server uid), so that only new servers, servers
+    whose entry is older than [ttl] hours and servers which previously failed to respond need to be queried again
+    """
+    path: str
+    ttl: float
+    entries: Dict[str, GamePortCacheEntry]
+
+    def __init__(self, path: str, ttl: float):
+        """
+        :param path: Path of the cache file
+        :param ttl: Number of hours a discovered game port remains valid for (0 to disable caching)
+        """
+        self.path = path
+        self.ttl = ttl
+        self.entries = {}
+        if self.ttl > 0:
+            self.load()
+
+    def load(self) -> None:
+        try:
+            with open(self.path, 'r') as file:
+                parsed = json.load(file)
+            self.entries = {uid: GamePortCacheEntry.load(entry) for (uid, entry) in parsed.items()}
+        except FileNotFoundError:
+            self.entries = {}
+        except (IOError, json.decoder.JSONDecodeError, KeyError, ValueError) as e:
+            logging.debug(e)
+            logging.warning('Failed to load game port cache, ignoring it')
+            self.entries = {}
+
+    def get_fresh(self, uids: List[str]) -> Dict[str, Optional[int]]:
+        """
+        Get the cached game ports of the given servers (if fresh)
+        :param uids: Uids of the servers
+        :return: Game ports by uid for servers with a fresh entry (None if the server did not report a game port),
+                 servers not included need to be queried
+        """
+        if self.ttl <= 0:
+            return {}
+
+        return {
+            uid: self.entries[uid].game_port for uid in uids
+            if uid in self.entries and self.entries[uid].is_fresh(self.ttl)
+        }
+
+    def record(self, uid: str, responded: bool, game_port: Optional[int] = None) -> None:
+        """
+        Record the result of querying a server for its game port
+        :param uid: Uid of the server
+        :param responded: Whether the server responded to the query
+        :param game_port: Game port reported by the server (if any)
+        """
+        now = datetime.now().astimezone()
+        entry = self.entries.get(uid)
+        if responded:
+            self.entries[uid] = GamePortCacheEntry(game_port, now)
+        elif entry is None:
+            self.entries[uid] = GamePortCacheEntry(None, now, 1)
+        else:
+            # Keep last known game port
+            entry.queried_at = now
+            entry.failures += 1
+
+    def save(self) -> None:
+        if self.ttl <= 0:
+            return
+
+        # Drop entries which would be queried again anyway
+        expired_before = datetime.now().astimezone() - timedelta(hours=self.ttl)
+        entries = {uid: entry for (uid, entry) in self.entries.items() if entry.queried_at >= expired_before}
+        try:
+            with atomic_write(self.path) as file:
+                json.dump({uid: entry.dump() for (uid, entry) in entries.items()}, file)
+        except IOError as e:
+            logging.debug(e)
+            logging.warning('Failed to write game port cache')
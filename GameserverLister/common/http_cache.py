@@ -0,0 +1,103 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Dict, Optional
+
+import requests
+
+from GameserverLister.common.files import atomic_write
+
+
+class HttpCache:
+    """
+    On-disk cache of HTTP responses, keeping the body along with its validators (ETag/Last-Modified)
+    so requests can be made conditional and answered from the cache if the resource was not modified
+    """
+    directory: str
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def get_entry_path(self, url: str, ext: str) -> str:
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, f'{key}.{ext}')
+
+    def get_conditional_headers(self, url: str) -> Dict[str, str]:
+        """
+        Get headers making a request for the given url conditional on the cached response (if any)
+        :param url: Url to be requested
+        :return: Headers to add to the request (empty if no response is cached)
+        """
+        validators = self.load_validators(url)
+        if validators is None:
+            return {}
+
+        headers = {}
+        if validators.get('etag') is not None:
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('lastModified') is not None:
+            headers['If-Modified-Since'] = validators['lastModified']
+        return headers
+
+    def load_validators(self, url: str) -> Optional[dict]:
+        # Validators are written after the body, so a body is present if validators are
+        try:
+            with open(self.get_entry_path(url, 'json'), 'r') as file:
+                validators = json.load(file)
+        except (IOError, json.decoder.JSONDecodeError) as e:
+            logging.debug(e)
+            return None
+
+        # Ignore entries of other urls (in case of a hash collision)
+        if validators.get('url') != url or not os.path.isfile(self.get_entry_path(url, 'body')):
+            return None
+
+        return validators
+
+    def load_body(self, url: str) -> Optional[bytes]:
+        if self.load_validators(url) is None:
+            return None
+
+        try:
+            with open(self.get_entry_path(url, 'body'), 'rb') as file:
+                return file.read()
+        except IOError as e:
+            logging.debug(e)
+            return None
+
+    def invalidate(self, url: str) -> None:
+        """
+        Remove the cached response for the given url (so that the next request is not conditional)
+        :param url: Requested url
+        """
+        # Remove validators first, since a body is only considered present if validators are
+        for ext in ['json', 'body']:
+            try:
+                os.remove(self.get_entry_path(url, ext))
+            except FileNotFoundError:
+                pass
+            except IOError as e:
+                logging.debug(e)
+                logging.warning(f'Failed to remove cached response for {url}')
+
+    def store(self, url: str, response: requests.Response) -> None:
+        """
+        Cache the response to a request for the given url (responses without validators are not cached)
+        :param url: Requested url
+        :param response: Response to cache
+        """
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if etag is None and last_modified is None:
+            return
+
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with atomic_write(self.get_entry_path(url, 'body'), 'wb') as file:
+                file.write(response.content)
+            with atomic_write(self.get_entry_path(url, 'json')) as file:
+                json.dump({'url': url, 'etag': etag, 'lastModified': last_modified}, file)
+        except IOError as e:
+            logging.debug(e)
+            logging.warning(f'Failed to cache response for {url}')
@@ -0,0 +1,127 @@
+import json
+import logging
+from typing import Dict, List, Optional, Tuple, Set
+
+from GameserverLister.common.files import atomic_write
+
+# Weight of game-wide statistics when estimating an offset's success probability for a subnet
+# (number of subnet tries it takes for subnet statistics to count as much as game-wide statistics)
+PRIOR_WEIGHT = 2.0
+
+
+class OffsetCounts:
+    tries: int
+    hits: int
+
+    def __init__(self, tries: int = 0, hits: int = 0):
+        self.tries = tries
+        self.hits = hits
+
+    @staticmethod
+    def load(parsed: dict) -> 'OffsetCounts':
+        return OffsetCounts(parsed['tries'], parsed['hits'])
+
+    def dump(self) -> dict:
+        return {'tries': self.tries, 'hits': self.hits}
+
+
+class QueryPortOffsetStats:
+    """
+    Statistics on which query port offsets (query port - game port) turned out to be a server's query port,
+    game-wide and per /24 subnet (servers of one hoster tend to use the same offsets), persisted across runs
+    """
+    path: str
+    game: Dict[int, OffsetCounts]
+    subnets: Dict[str, Dict[int, OffsetCounts]]
+
+    def __init__(self, path: str):
+        self.path = path
+        self.game = {}
+        self.subnets = {}
+        self.load()
+
+    def load(self) -> None:
+        try:
+            with open(self.path, 'r') as file:
+                parsed = json.load(file)
+            self.game = self.load_counts(parsed['game'])
+            self.subnets = {subnet: self.load_counts(counts) for (subnet, counts) in parsed['subnets'].items()}
+        except FileNotFoundError:
+            pass
+        except (IOError, json.decoder.JSONDecodeError, KeyError, ValueError, TypeError) as e:
+            logging.debug(e)
+            logging.warning('Failed to load query port offset statistics, ignoring them')
+            self.game = {}
+            self.subnets = {}
+
+    @staticmethod
+    def load_counts(parsed: dict) -> Dict[int, OffsetCounts]:
+        return {int(offset): OffsetCounts.load(counts) for (offset, counts) in parsed.items()}
+
+    @staticmethod
+    def get_subnet(ip: str) -> str:
+        return '.'.join(ip.split('.')[:3])
+
+    def record(self, ip: str, offset: int, hit: bool) -> None:
+        """
+        Record an attempt to find a server's query port using the given offset
+        :param ip: Ip of the server
+        :param offset: Offset of the port tried
+        :param hit: Whether the port tried was the server's query port
+        """
+        subnet = self.subnets.setdefault(self.get_subnet(ip), {})
+        for counts in [self.game.setdefault(offset, OffsetCounts()), subnet.setdefault(offset, OffsetCounts())]:
+            counts.tries += 1
+            counts.hits += int(hit)
+
+    def get_probability(self, ip: str, offset: int) -> Optional[float]:
+        """
+        Estimate the probability of the given offset being a server's query port offset, based on the subnet's
+        statistics (using game-wide statistics as the prior)
+        :param ip: Ip of the server
+        :param offset: Query port offset
+        :return: Estimated probability, None if the offset has never been tried
+        """
+        game = self.game.get(offset)
+        if game is None or game.tries == 0:
+            return None
+        subnet = self.subnets.get(self.get_subnet(ip), {}).get(offset, OffsetCounts())
+        prior = game.hits / game.tries
+        return (subnet.hits + PRIOR_WEIGHT * prior) / (subnet.tries + PRIOR_WEIGHT)
+
+    def get_matched_offsets(self) -> Set[int]:
+        """
+        Get offsets which have been a query port offset before (game-wide)
+        """
+        return {offset for (offset, counts) in self.game.items() if counts.hits > 0}
+
+    def get_ranked_offsets(self, ip: str) -> List[Tuple[int, float]]:
+        """
+        Get offsets which have been a query port offset before, most likely offset first
+        :param ip: Ip of the server
+        :return: Offsets along with their estimated probability
+        """
+        ranked = [(offset, self.get_probability(ip, offset)) for offset in sorted(self.get_matched_offsets())]
+        return sorted(ranked, key=lambda ranked_offset: ranked_offset[1], reverse=True)
+
+    def save(self) -> None:
+        # Only persist offsets which have been a query port offset before, since no other offsets are ever ranked
+        # (keeps the file from accumulating offsets which never matched)
+        matched = self.get_matched_offsets()
+        subnets = {}
+        for subnet, subnet_counts in self.subnets.items():
+            matched_counts = {offset: counts for (offset, counts) in subnet_counts.items() if offset in matched}
+            if len(matched_counts) > 0:
+                subnets[subnet] = matched_counts
+        try:
+            with atomic_write(self.path) as file:
+                json.dump({
+                    'game': {str(offset): self.game[offset].dump() for offset in matched},
+                    'subnets': {
+                        subnet: {str(offset): counts.dump() for (offset, counts) in subnet_counts.items()}
+                        for (subnet, subnet_counts) in subnets.items()
+                    }
+                }, file)
+        except IOError as e:
+            logging.debug(e)
+            logging.warning('Failed to write query port offset statistics')
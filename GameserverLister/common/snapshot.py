@@ -0,0 +1,364 @@
+"""
+Compact, columnar binary snapshot of a server list
+
+Layout (all integers little-endian):
+- magic (8 bytes) followed by the length of the JSON header as an unsigned 32-bit integer
+- JSON header containing the format version, server class, server count and the name, type code and
+  byte length of each column
+- column data, in the order listed in the header
+
+Columns are plain arrays of fixed-size integers. Strings are stored as indices into a string table in which each
+distinct string is stored only once (e.g. principals and link sites), with None being stored as index -1. Integer
+and boolean columns containing None values are accompanied by a null mask column (named after the column, suffixed
+with ".null"). Timestamps are stored as epoch seconds, microseconds and utc offset (in seconds). Nested via statuses
+and links are flattened into their own columns, with a per-server count column.
+"""
+import json
+import struct
+import sys
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import BinaryIO, Dict, Iterable, List, Tuple, Type, Optional
+
+from GameserverLister.common.servers import Server, ClassicServer, FrostbiteServer, BadCompany2Server, \
+    GametoolsServer, ViaStatus
+from GameserverLister.common.weblinks import WebLink
+
+SNAPSHOT_MAGIC = b'GSLSNAP\x00'
+SNAPSHOT_VERSION = 1
+HEADER_LENGTH_FORMAT = '<I'
+
+# Field kinds
+STR = 'str'
+INT = 'int'
+BOOL = 'bool'
+TIME = 'time'
+OPTIONAL_TIME = 'time?'
+
+# Columns are stored using fixed size types, independent of the platform's native sizes
+INT8 = 'b'
+INT32 = next(code for code in 'ilh' if array(code).itemsize == 4)
+INT64 = 'q'
+COLUMN_TYPES = {STR: INT32, INT: INT64, BOOL: INT8}
+TIME_COLUMNS = (('seconds', INT64), ('micros', INT32), ('offset', INT32))
+
+# Sentinels used in the micros/offset columns of timestamps
+NO_TIME = -1
+NO_OFFSET = -2 ** 31
+# Sentinel string index used for None
+NO_STRING = -1
+
+EPOCH = datetime(1970, 1, 1)
+
+Fields = Tuple[Tuple[str, str], ...]
+
+VIA_FIELDS: Fields = (
+    ('principal', STR),
+    ('first_seen_at', TIME),
+    ('last_seen_at', TIME)
+)
+LINK_FIELDS: Fields = (
+    ('site', STR),
+    ('url', STR),
+    ('official', BOOL),
+    ('as_of', TIME)
+)
+# Nested lists of objects stored as child columns: attribute, class, fields
+CHILDREN = {
+    'via': (ViaStatus, VIA_FIELDS),
+    'links': (WebLink, LINK_FIELDS)
+}
+
+SERVER_FIELDS: Fields = (
+    ('uid', STR),
+    ('first_seen_at', OPTIONAL_TIME),
+    ('last_seen_at', TIME)
+)
+FROSTBITE_FIELDS: Fields = SERVER_FIELDS + (
+    ('name', STR),
+    ('ip', STR),
+    ('game_port', INT),
+    ('query_port', INT),
+    ('last_queried_at', OPTIONAL_TIME)
+)
+# Fields and nested lists making up each supported server class (must cover all instance attributes)
+SCHEMAS: Dict[Type[Server], Tuple[Fields, Tuple[str, ...]]] = {
+    ClassicServer: (SERVER_FIELDS + (('ip', STR), ('game_port', INT), ('query_port', INT)), ('via', 'links')),
+    FrostbiteServer: (FROSTBITE_FIELDS, ('links',)),
+    BadCompany2Server: (FROSTBITE_FIELDS + (('lid', INT), ('gid', INT)), ('links',)),
+    GametoolsServer: (SERVER_FIELDS + (('name', STR),), ('links',))
+}
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+def supports_snapshot(server_class: Type[Server]) -> bool:
+    return server_class in SCHEMAS
+
+
+class ColumnEncoder:
+    strings: Dict[str, int]
+    columns: Dict[str, array]
+
+    def __init__(self):
+        self.strings = {}
+        self.columns = {}
+
+    def column(self, name: str, code: str) -> array:
+        column = self.columns.get(name)
+        if column is None:
+            column = self.columns[name] = array(code)
+        return column
+
+    def add_fields(self, prefix: str, fields: Fields, objects: List[object]) -> None:
+        for attribute, kind in fields:
+            values = [obj.__dict__[attribute] for obj in objects]
+            name = f'{prefix}{attribute}'
+            if kind == STR:
+                strings = self.strings
+                self.column(name, INT32).extend([
+                    strings.setdefault(value, len(strings)) if value is not None else NO_STRING for value in values
+                ])
+            elif kind in (TIME, OPTIONAL_TIME):
+                self.add_timestamps(name, values)
+            else:
+                self.add_values(name, COLUMN_TYPES[kind], values)
+
+    def add_values(self, name: str, code: str, values: list) -> None:
+        column = self.column(name, code)
+        if None not in values:
+            column.extend(values)
+            return
+
+        # Store None as 0, marking it in the null mask column
+        column.extend([value if value is not None else 0 for value in values])
+        self.column(f'{name}.null', INT8).extend([int(value is None) for value in values])
+
+    def add_timestamps(self, name: str, values: List[Optional[datetime]]) -> None:
+        seconds, micros, offsets = (self.column(f'{name}.{suffix}', code) for suffix, code in TIME_COLUMNS)
+        for value in values:
+            if value is None:
+                seconds.append(0)
+                micros.append(NO_TIME)
+                offsets.append(0)
+                continue
+
+            utc_offset = value.utcoffset()
+            offset = int(utc_offset.total_seconds()) if utc_offset is not None else NO_OFFSET
+            # Naive timestamps are stored as if they were utc
+            delta = value.replace(tzinfo=None) - EPOCH - (utc_offset or timedelta())
+            seconds.append(delta.days * 86400 + delta.seconds)
+            micros.append(delta.microseconds)
+            offsets.append(offset)
+
+    def add_servers(self, servers: List[Server], fields: Fields, children: Tuple[str, ...]) -> None:
+        self.add_fields('', fields, servers)
+        for attribute in children:
+            _, child_fields = CHILDREN[attribute]
+            lists = [server.__dict__[attribute] for server in servers]
+            self.column(f'{attribute}.count', INT32).extend([len(items) for items in lists])
+            self.add_fields(f'{attribute}.', child_fields, [item for items in lists for item in items])
+
+    def encode_strings(self) -> None:
+        # Store string table as character lengths plus all strings concatenated
+        strings = list(self.strings)
+        self.column('strings.length', INT32).extend([len(string) for string in strings])
+        self.columns['strings.data'] = ''.join(strings).encode('utf-8', 'surrogatepass')
+
+
+class ColumnDecoder:
+    columns: Dict[str, memoryview]
+    strings: List[str]
+    timestamps: Dict[Tuple[int, int, int], datetime]
+    epochs: Dict[int, datetime]
+
+    def __init__(self, columns: Dict[str, memoryview]):
+        self.columns = columns
+        self.timestamps = {}
+        self.epochs = {}
+        lengths = self.column('strings.length', INT32)
+        try:
+            data = bytes(self.columns['strings.data']).decode('utf-8', 'surrogatepass')
+        except (KeyError, UnicodeDecodeError) as e:
+            raise SnapshotError('Snapshot string table is invalid') from e
+        self.strings = []
+        pos = 0
+        for length in lengths:
+            self.strings.append(data[pos:pos + length])
+            pos += length
+
+    def column(self, name: str, code: str) -> array:
+        if name not in self.columns:
+            raise SnapshotError(f'Snapshot is missing column {name}')
+        column = array(code)
+        try:
+            column.frombytes(self.columns[name])
+        except ValueError as e:
+            raise SnapshotError(f'Snapshot column {name} is invalid') from e
+        if sys.byteorder == 'big':
+            column.byteswap()
+        return column
+
+    def get_fields(self, prefix: str, fields: Fields, count: int) -> List[Tuple[str, list]]:
+        decoded = []
+        for attribute, kind in fields:
+            name = f'{prefix}{attribute}'
+            if kind == STR:
+                strings = self.strings
+                indices = self.column(name, INT32)
+                if any(index < NO_STRING or index >= len(strings) for index in indices):
+                    raise SnapshotError(f'Snapshot column {name} references unknown string')
+                values = [strings[index] if index != NO_STRING else None for index in indices]
+            elif kind in (TIME, OPTIONAL_TIME):
+                values = self.get_timestamps(name)
+            elif kind == BOOL:
+                values = self.apply_null_mask(name, [value != 0 for value in self.column(name, INT8)])
+            else:
+                values = self.apply_null_mask(name, self.column(name, COLUMN_TYPES[kind]).tolist())
+
+            if len(values) != count:
+                raise SnapshotError(f'Snapshot column {name} contains {len(values)} values, expected {count}')
+            decoded.append((attribute, values))
+        return decoded
+
+    def apply_null_mask(self, name: str, values: list) -> list:
+        # Null mask columns are only present for columns containing None values
+        if f'{name}.null' not in self.columns:
+            return values
+
+        mask = self.column(f'{name}.null', INT8)
+        if len(mask) != len(values):
+            raise SnapshotError(f'Snapshot column {name}.null contains {len(mask)} values, expected {len(values)}')
+        return [value if not is_null else None for value, is_null in zip(values, mask)]
+
+    def get_timestamps(self, name: str) -> List[Optional[datetime]]:
+        seconds, micros, offsets = (self.column(f'{name}.{suffix}', code) for suffix, code in TIME_COLUMNS)
+        if not len(seconds) == len(micros) == len(offsets):
+            raise SnapshotError(f'Snapshot columns of {name} differ in length')
+
+        # Share datetime objects between identical timestamps (e.g. first and last seen of new servers)
+        # and add the timestamp to the epoch in the respective timezone rather than converting each timestamp
+        timestamps, known, epochs = [], self.timestamps, self.epochs
+        for key in zip(seconds, micros, offsets):
+            timestamp = known.get(key)
+            if timestamp is None and key[1] != NO_TIME:
+                seconds_value, micros_value, offset = key
+                epoch = epochs.get(offset)
+                if epoch is None:
+                    epoch = epochs[offset] = self.get_epoch(offset)
+                timestamp = known[key] = epoch + timedelta(0, seconds_value, micros_value)
+            timestamps.append(timestamp)
+        return timestamps
+
+    @staticmethod
+    def get_epoch(offset: int) -> datetime:
+        if offset == NO_OFFSET:
+            return EPOCH
+        return EPOCH.replace(tzinfo=timezone.utc).astimezone(timezone(timedelta(seconds=offset)))
+
+    def get_objects(self, cls: type, prefix: str, fields: Fields, count: int) -> list:
+        columns = self.get_fields(prefix, fields, count)
+        attributes = [attribute for attribute, _ in columns]
+        objects = []
+        # Create objects without calling __init__, attributes are set from the decoded columns directly
+        new = cls.__new__
+        for values in zip(*[values for _, values in columns]):
+            obj = new(cls)
+            obj.__dict__ = dict(zip(attributes, values))
+            objects.append(obj)
+        return objects
+
+    def get_servers(self, server_class: Type[Server], fields: Fields, children: Tuple[str, ...],
+                    count: int) -> List[Server]:
+        servers = self.get_objects(server_class, '', fields, count)
+        for attribute in children:
+            child_class, child_fields = CHILDREN[attribute]
+            counts = self.column(f'{attribute}.count', INT32)
+            if len(counts) != count or any(c < 0 for c in counts):
+                raise SnapshotError(f'Snapshot column {attribute}.count is invalid')
+            items = self.get_objects(child_class, f'{attribute}.', child_fields, sum(counts))
+            pos = 0
+            for server, child_count in zip(servers, counts):
+                server.__dict__[attribute] = items[pos:pos + child_count]
+                pos += child_count
+        return servers
+
+
+def write_snapshot(file: BinaryIO, servers: Iterable[Server], server_class: Type[Server]) -> None:
+    """
+    Write servers to a binary snapshot file
+    :param file: File to write snapshot to (opened in binary mode)
+    :param servers: Servers to write
+    :param server_class: Class of servers to write (all servers must be instances of exactly this class)
+    """
+    if server_class not in SCHEMAS:
+        raise SnapshotError(f'Snapshots are not supported for {server_class.__name__}')
+    fields, children = SCHEMAS[server_class]
+
+    servers = list(servers)
+    encoder = ColumnEncoder()
+    encoder.add_servers(servers, fields, children)
+    encoder.encode_strings()
+
+    column_data = []
+    for name, column in encoder.columns.items():
+        if isinstance(column, array):
+            if sys.byteorder == 'big':
+                column = array(column.typecode, column)
+                column.byteswap()
+            column_data.append((name, column.typecode, column.tobytes()))
+        else:
+            column_data.append((name, 'B', column))
+
+    header = json.dumps({
+        'version': SNAPSHOT_VERSION,
+        'class': server_class.__name__,
+        'count': len(servers),
+        'columns': [[name, code, len(data)] for name, code, data in column_data]
+    }).encode('ascii')
+
+    file.write(SNAPSHOT_MAGIC + struct.pack(HEADER_LENGTH_FORMAT, len(header)) + header)
+    for _, _, data in column_data:
+        file.write(data)
+
+
+def read_snapshot(file: BinaryIO, server_class: Type[Server]) -> List[Server]:
+    """
+    Read servers from a binary snapshot file
+    :param file: File to read snapshot from (opened in binary mode)
+    :param server_class: Class of servers contained in the snapshot
+    :return: List of servers contained in the snapshot
+    """
+    if server_class not in SCHEMAS:
+        raise SnapshotError(f'Snapshots are not supported for {server_class.__name__}')
+    fields, children = SCHEMAS[server_class]
+
+    data = memoryview(file.read())
+    prefix_length = len(SNAPSHOT_MAGIC) + struct.calcsize(HEADER_LENGTH_FORMAT)
+    if len(data) < prefix_length or data[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+        raise SnapshotError('File is not a server list snapshot')
+
+    header_length, = struct.unpack_from(HEADER_LENGTH_FORMAT, data, len(SNAPSHOT_MAGIC))
+    try:
+        header = json.loads(bytes(data[prefix_length:prefix_length + header_length]))
+        version, class_name, count, column_specs = \
+            header['version'], header['class'], header['count'], header['columns']
+    except (ValueError, KeyError, TypeError) as e:
+        raise SnapshotError('Failed to parse snapshot header') from e
+
+    if version != SNAPSHOT_VERSION:
+        raise SnapshotError(f'Unsupported snapshot version: {version}')
+    if class_name != server_class.__name__:
+        raise SnapshotError(f'Snapshot contains {class_name} servers, expected {server_class.__name__}')
+
+    columns = {}
+    pos = prefix_length + header_length
+    for name, _, length in column_specs:
+        columns[name] = data[pos:pos + length]
+        pos += length
+    if pos != len(data):
+        raise SnapshotError('Snapshot size does not match header')
+
+    return ColumnDecoder(columns).get_servers(server_class, fields, children, count)
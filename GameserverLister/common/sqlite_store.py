@@ -0,0 +1,174 @@
+import json
+import sqlite3
+from datetime import datetime
+from typing import Dict, List, Tuple, Type
+
+from GameserverLister.common.store import ServerStore, S
+
+# Child lists stored in their own tables: dump key, columns (dump keys)
+CHILD_TABLES = {
+    'via': ('principal', 'firstSeenAt', 'lastSeenAt'),
+    'links': ('site', 'url', 'official', 'asOf')
+}
+
+Row = Tuple[str, float, str]
+ChildRow = tuple
+
+
+def quote_identifier(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+class SqliteServerStore(ServerStore[S]):
+    """
+    Server store persisted to a SQLite database (one table per game/platform, keyed by uid, plus child tables for
+    via statuses and links). Servers are held in memory while the lister runs, with all changes being written
+    in a single transaction on commit.
+    """
+    connection: sqlite3.Connection
+    server_class: Type[S]
+    table: str
+    child_tables: Dict[str, str]
+    # Hash of the currently persisted rows of each server, used to only write changed servers
+    persisted: Dict[str, int]
+
+    def __init__(self, path: str, table: str, server_class: Type[S]):
+        super().__init__()
+        self.server_class = server_class
+        self.table = quote_identifier(table)
+        self.child_tables = {key: quote_identifier(f'{table}-{key}') for key in CHILD_TABLES}
+        self.persisted = {}
+
+        # Several listers may share a database, so wait for other writers rather than failing right away
+        self.connection = sqlite3.connect(path, timeout=60.0, isolation_level=None)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.create_tables(table)
+
+    def create_tables(self, table: str) -> None:
+        with self.transaction():
+            self.connection.execute(
+                f'CREATE TABLE IF NOT EXISTS {self.table} '
+                f'(uid TEXT PRIMARY KEY, last_seen_at REAL NOT NULL, server TEXT NOT NULL)'
+            )
+            self.connection.execute(
+                f'CREATE INDEX IF NOT EXISTS {quote_identifier(f"{table}-last-seen-at")} '
+                f'ON {self.table} (last_seen_at)'
+            )
+            for key, columns in CHILD_TABLES.items():
+                child_table = self.child_tables[key]
+                column_definitions = ', '.join(f'{quote_identifier(column)}' for column in columns)
+                self.connection.execute(f'CREATE TABLE IF NOT EXISTS {child_table} (uid TEXT NOT NULL, '
+                                        f'{column_definitions})')
+                self.connection.execute(
+                    f'CREATE INDEX IF NOT EXISTS {quote_identifier(f"{table}-{key}-uid")} ON {child_table} (uid)'
+                )
+
+    def transaction(self) -> 'Transaction':
+        return Transaction(self.connection)
+
+    def load(self) -> None:
+        """
+        Load all persisted servers (in the order they were first added)
+        """
+        children = {key: self.load_children(key) for key in CHILD_TABLES}
+        rows = self.connection.execute(f'SELECT uid, last_seen_at, server FROM {self.table} ORDER BY rowid')
+        for uid, last_seen_at, server_json in rows:
+            parsed = json.loads(server_json)
+            child_rows = tuple(children[key].get(uid, ()) for key in CHILD_TABLES)
+            for (key, columns), key_rows in zip(CHILD_TABLES.items(), child_rows):
+                parsed[key] = [dict(zip(columns, child_row)) for child_row in key_rows]
+            server = self.server_class.load(parsed)
+            if not isinstance(server, self.server_class):
+                continue
+            self.add(server)
+            self.persisted[uid] = hash(((uid, last_seen_at, server_json), child_rows))
+
+    def load_children(self, key: str) -> Dict[str, Tuple[ChildRow, ...]]:
+        columns = ', '.join(quote_identifier(column) for column in CHILD_TABLES[key])
+        children: Dict[str, List[ChildRow]] = {}
+        for uid, *values in self.connection.execute(
+                f'SELECT uid, {columns} FROM {self.child_tables[key]} ORDER BY rowid'
+        ):
+            children.setdefault(uid, []).append(tuple(values))
+        return {uid: tuple(child_rows) for uid, child_rows in children.items()}
+
+    def find_expired(self, cutoff: datetime) -> List[S]:
+        # Use the last seen at index for persisted servers. Servers added since the last commit are not persisted yet
+        # and must be checked in memory. Persisted servers only ever get "more recently seen" while the lister runs,
+        # so all expired servers are among those whose persisted last seen at is before the cutoff.
+        uids = {uid for uid, in self.connection.execute(
+            f'SELECT uid FROM {self.table} WHERE last_seen_at < ?', (cutoff.timestamp(),)
+        )}
+        return [
+            server for uid, server in self.servers.items()
+            if (uid in uids or uid not in self.persisted) and server.last_seen_at < cutoff
+        ]
+
+    def commit(self) -> None:
+        """
+        Persist all changes (added, updated and removed servers) in a single transaction
+        """
+        changed: List[Tuple[Row, Tuple[Tuple[ChildRow, ...], ...], int]] = []
+        for uid, server in self.servers.items():
+            row, child_rows = self.build_rows(server)
+            row_hash = hash((row, child_rows))
+            if self.persisted.get(uid) != row_hash:
+                changed.append((row, child_rows, row_hash))
+        removed = [(uid,) for uid in self.persisted.keys() - self.servers.keys()]
+        changed_uids = [(row[0],) for row, _, _ in changed]
+
+        with self.transaction():
+            for table in [self.table, *self.child_tables.values()]:
+                self.connection.executemany(f'DELETE FROM {table} WHERE uid = ?', removed)
+            self.connection.executemany(
+                f'INSERT INTO {self.table} (uid, last_seen_at, server) VALUES (?, ?, ?) '
+                f'ON CONFLICT (uid) DO UPDATE SET last_seen_at = excluded.last_seen_at, server = excluded.server',
+                [row for row, _, _ in changed]
+            )
+            # Replace child rows of changed servers
+            for index, (key, columns) in enumerate(CHILD_TABLES.items()):
+                child_table = self.child_tables[key]
+                placeholders = ', '.join('?' for _ in range(len(columns) + 1))
+                self.connection.executemany(f'DELETE FROM {child_table} WHERE uid = ?', changed_uids)
+                self.connection.executemany(f'INSERT INTO {child_table} VALUES ({placeholders})', [
+                    (row[0], *child_row) for row, child_rows, _ in changed for child_row in child_rows[index]
+                ])
+
+        for uid, in removed:
+            self.persisted.pop(uid)
+        for row, _, row_hash in changed:
+            self.persisted[row[0]] = row_hash
+
+    @staticmethod
+    def build_rows(server: S) -> Tuple[Row, Tuple[Tuple[ChildRow, ...], ...]]:
+        dumped = server.dump()
+        child_rows = tuple(
+            tuple(tuple(child.get(column) for column in columns) for child in dumped.pop(key, []))
+            for key, columns in CHILD_TABLES.items()
+        )
+        row = (server.uid, server.last_seen_at.timestamp(), json.dumps(dumped))
+        return row, child_rows
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+class Transaction:
+    """
+    Context manager running statements in an (immediate) transaction, committed on success and rolled back on error
+    """
+    connection: sqlite3.Connection
+
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.connection.execute('BEGIN IMMEDIATE')
+        return self.connection
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        if exc_type is None:
+            self.connection.execute('COMMIT')
+        else:
+            self.connection.execute('ROLLBACK')
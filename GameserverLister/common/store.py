@@ -0,0 +1,83 @@
+from datetime import datetime
+from typing import Dict, Generic, Iterable, Iterator, KeysView, Optional, Tuple, TypeVar, List
+
+from GameserverLister.common.servers import Server
+
+S = TypeVar('S', bound=Server)
+
+
+class ServerStore(Generic[S]):
+    """
+    Insertion-ordered collection of servers, indexed by server uid (constant time upsert/lookup/removal)
+    """
+    servers: Dict[str, S]
+
+    def __init__(self, servers: Iterable[S] = ()):
+        self.servers = {}
+        self.add_all(servers)
+
+    def add(self, server: S) -> None:
+        """
+        Add a server, replacing any server with the same uid (without changing the insertion order)
+        :param server: Server to add
+        """
+        self.servers[server.uid] = server
+
+    def add_all(self, servers: Iterable[S]) -> None:
+        for server in servers:
+            self.add(server)
+
+    def upsert(self, server: S) -> Tuple[S, bool]:
+        """
+        Update the known server with the same uid using the given server or add the given server if it is new
+        :param server: Server to update the known server with or add
+        :return: The stored server and whether it was added
+        """
+        known = self.servers.get(server.uid)
+        if known is None:
+            self.servers[server.uid] = server
+            return server, True
+
+        known.update(server)
+        return known, False
+
+    def get(self, uid: str) -> Optional[S]:
+        return self.servers.get(uid)
+
+    def remove(self, uid: str) -> Optional[S]:
+        return self.servers.pop(uid, None)
+
+    def remove_all(self, uids: Iterable[str]) -> int:
+        """
+        Remove all servers with the given uids in a single pass
+        :param uids: Uids of servers to remove
+        :return: Number of removed servers
+        """
+        to_remove = set(uids).intersection(self.servers.keys())
+        if len(to_remove) > 0:
+            self.servers = {uid: server for uid, server in self.servers.items() if uid not in to_remove}
+        return len(to_remove)
+
+    def find_expired(self, cutoff: datetime) -> List[S]:
+        """
+        Find servers which were last seen before the given cutoff
+        :param cutoff: Servers last seen before this time are considered expired
+        :return: List of expired servers (in insertion order)
+        """
+        return [server for server in self.servers.values() if server.last_seen_at < cutoff]
+
+    def commit(self) -> None:
+        # Nothing to persist, servers are only held in memory
+        pass
+
+    def uids(self) -> KeysView[str]:
+        return self.servers.keys()
+
+    def __contains__(self, uid: object) -> bool:
+        return uid in self.servers
+
+    def __iter__(self) -> Iterator[S]:
+        return iter(self.servers.values())
+
+    def __len__(self) -> int:
+        return len(self.servers)
@@ -0,0 +1,138 @@
+import logging
+import threading
+from typing import Dict, Optional, Union, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter, BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import select_proxy, get_encoding_from_headers
+from urllib3.util import make_headers
+
+# HTTP/2 support is optional (requires the http2 extra, i.e. httpx[http2]>=0.26)
+try:
+    import h2
+    import httpx
+except ImportError:
+    h2 = None
+    httpx = None
+
+# Accept all encodings urllib3 can decode (includes brotli and zstd if the respective package is installed)
+ACCEPT_ENCODING = make_headers(accept_encoding=True)['accept-encoding']
+
+Timeout = Union[None, float, Tuple[Optional[float], Optional[float]]]
+
+
+def supports_http2() -> bool:
+    return httpx is not None and h2 is not None
+
+
+def build_session(pool_size: int = 10, http2: bool = False, keepalive_expiry: float = 30.0) -> requests.Session:
+    """
+    Build a session reusing (keep-alive) connections across requests and threads
+    :param pool_size: Max number of connections per host (threads beyond that wait for a connection to be released
+                      rather than opening a new connection that is thrown away afterwards)
+    :param http2: Whether to use HTTP/2 (multiplexing concurrent requests over a single connection per host),
+                  falls back to HTTP/1.1 if httpx[http2] is not installed
+    :param keepalive_expiry: Number of seconds to keep idle HTTP/2 connections open for
+    :return: The session
+    """
+    session = requests.Session()
+    session.headers['Accept-Encoding'] = ACCEPT_ENCODING
+
+    if http2 and not supports_http2():
+        logging.warning('HTTP/2 requires httpx[http2] to be installed, falling back to HTTP/1.1')
+        http2 = False
+
+    if http2:
+        adapter = Http2Adapter(pool_size, keepalive_expiry)
+    else:
+        adapter = HTTPAdapter(pool_maxsize=pool_size, pool_block=True)
+
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+    return session
+
+
+class Http2Adapter(BaseAdapter):
+    """
+    Transport adapter sending requests via httpx (using HTTP/2 where the server supports it), so sessions can
+    be used just like with the default adapter. Certificates are always verified.
+    """
+    pool_size: int
+    keepalive_expiry: float
+    # Clients by proxy (httpx configures proxies per client)
+    clients: Dict[Optional[str], 'httpx.Client']
+    lock: threading.Lock
+
+    def __init__(self, pool_size: int, keepalive_expiry: float):
+        super().__init__()
+        self.pool_size = pool_size
+        self.keepalive_expiry = keepalive_expiry
+        self.clients = {}
+        self.lock = threading.Lock()
+
+    def get_client(self, proxy: Optional[str]) -> 'httpx.Client':
+        with self.lock:
+            client = self.clients.get(proxy)
+            if client is None:
+                client = httpx.Client(
+                    http2=True,
+                    proxy=proxy,
+                    limits=httpx.Limits(
+                        max_connections=self.pool_size,
+                        max_keepalive_connections=self.pool_size,
+                        keepalive_expiry=self.keepalive_expiry
+                    )
+                )
+                self.clients[proxy] = client
+            return client
+
+    def send(
+            self,
+            request: requests.PreparedRequest,
+            stream: bool = False,
+            timeout: Timeout = None,
+            verify: bool = True,
+            cert: Optional[str] = None,
+            proxies: Optional[Dict[str, str]] = None
+    ) -> requests.Response:
+        client = self.get_client(select_proxy(request.url, proxies))
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+            timeout = httpx.Timeout(read, connect=connect)
+
+        try:
+            response = client.request(
+                request.method,
+                request.url,
+                headers=dict(request.headers),
+                content=request.body,
+                timeout=timeout
+            )
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(e, request=request)
+        except httpx.HTTPError as e:
+            raise requests.exceptions.ConnectionError(e, request=request)
+
+        return self.build_response(request, response)
+
+    def build_response(self, request: requests.PreparedRequest, response: 'httpx.Response') -> requests.Response:
+        built = requests.Response()
+        built.status_code = response.status_code
+        built.reason = response.reason_phrase
+        built.headers = CaseInsensitiveDict(response.headers)
+        built.encoding = get_encoding_from_headers(built.headers)
+        built.url = str(response.url)
+        built.request = request
+        built.connection = self
+        # httpx has already read and decoded the body
+        built._content = response.content
+        built._content_consumed = True
+        return built
+
+    def close(self) -> None:
+        with self.lock:
+            for client in self.clients.values():
+                client.close()
+            self.clients.clear()
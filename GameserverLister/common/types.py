@@ -204,6 +204,21 @@ class GametoolsPlatform(Platform):
     XboxOne = 'xboxone'
 
 
+class StoreBackend(str, ExtendedEnum):
+    JSON = 'json'
+    SQLITE = 'sqlite'
+
+
+class QueryPortProber(str, ExtendedEnum):
+    NATIVE = 'native'
+    GAMEDIG = 'gamedig'
+
+
+class GamespyListProvider(str, ExtendedEnum):
+    GSLIST = 'gslist'
+    NATIVE = 'native'
+
+
 @dataclass
 class GamespyGameConfig:
     game_name: str
@@ -1,12 +1,11 @@
 import logging
-from datetime import datetime
 from random import randint
 from typing import List, Tuple, Optional, Union, Callable
 
 import requests
 
 from GameserverLister.common.servers import FrostbiteServer
-from GameserverLister.common.types import BattlelogGame, BattlelogPlatform
+from GameserverLister.common.types import BattlelogGame, BattlelogPlatform, StoreBackend
 from GameserverLister.common.weblinks import WEB_LINK_TEMPLATES, WebLink
 from GameserverLister.games.battlelog import BATTLELOG_GAME_BASE_URIS
 from .common import HttpServerLister, FrostbiteServerLister
@@ -25,9 +24,17 @@ class BattlelogServerLister(HttpServerLister, FrostbiteServerLister):
             recover: bool,
             add_links: bool,
             txt: bool,
+            compact: bool,
+            snapshot: bool,
+            delta: bool,
+            store: StoreBackend,
             list_dir: str,
             sleep: float,
             max_attempts: int,
+            concurrency: int,
+            rate_limit: float,
+            coverage_target: float,
+            http2: bool,
             proxy: str = None
     ):
         super().__init__(
@@ -41,15 +48,23 @@ class BattlelogServerLister(HttpServerLister, FrostbiteServerLister):
             recover,
             add_links,
             txt,
+            compact,
+            snapshot,
+            delta,
+            store,
             list_dir,
             sleep,
-            max_attempts
+            max_attempts,
+            concurrency,
+            rate_limit,
+            coverage_target,
+            http2
         )
 
         # Set up headers
-        self.session.headers = {
+        self.session.headers.update({
             'X-Requested-With': 'XMLHttpRequest'
-        }
+        })
         # Set up proxy if given
         if proxy is not None:
             # All requests are sent via https, so just set up https proxy
@@ -60,7 +75,8 @@ class BattlelogServerLister(HttpServerLister, FrostbiteServerLister):
     def get_server_list_url(self, per_page: int) -> str:
         return f'{BATTLELOG_GAME_BASE_URIS[self.game]}/{self.platform}/?count={per_page}&offset=0'
 
-    def add_page_found_servers(self, found_servers: List[FrostbiteServer], page_response_data: dict) -> List[FrostbiteServer]:
+    def get_page_servers(self, page_response_data: dict) -> List[FrostbiteServer]:
+        page_servers = []
         for server in page_response_data['data']:
             found_server = FrostbiteServer(
                 server['guid'],
@@ -69,25 +85,20 @@ class BattlelogServerLister(HttpServerLister, FrostbiteServerLister):
                 server['port'],
             )
 
+            # Ignore private servers (servers without an IP)
+            if len(found_server.ip) == 0:
+                logging.debug(f'Got private server {found_server.uid}, ignoring it')
+                continue
+
             if self.add_links:
                 found_server.add_links(self.build_server_links(found_server.uid))
                 # Gametools uses the gameid for BF4 server URLs, so add that separately
                 if self.game is BattlelogGame.BF4:
                     found_server.add_links(WEB_LINK_TEMPLATES['gametools'].render(self.game, self.platform, server['gameId']))
 
-            # Add non-private servers (servers with an IP) that are new
-            server_uids = [s.uid for s in found_servers]
-            if len(found_server.ip) > 0 and found_server.uid not in server_uids:
-                logging.debug(f'Got new server {found_server.uid}, adding it')
-                found_servers.append(found_server)
-            elif len(found_server.ip) > 0:
-                logging.debug(f'Got duplicate server {found_server.uid}, updating last seen at')
-                index = server_uids.index(found_server.uid)
-                found_servers[index].last_seen_at = datetime.now().astimezone()
-            else:
-                logging.debug(f'Got private server {found_server.uid}, ignoring it')
+            page_servers.append(found_server)
 
-        return found_servers
+        return page_servers
 
     def check_if_server_still_exists(self, server: FrostbiteServer, checks_since_last_ok: int) -> Tuple[bool, bool, int]:
         check_ok = True
@@ -135,23 +146,28 @@ class BattlelogServerLister(HttpServerLister, FrostbiteServerLister):
 
         return links
 
+    def get_query_port_offsets(self) -> List[int]:
+        return [
+            22000,  # default port offset (mirror gamedig behavior)
+            0,  # some servers use the same port for game + query
+            100,  # nitrado
+            5,  # several hosters
+            1,
+            6,  # i3D
+            8,  # i3D
+            10,  # Servers.com/4netplayers
+            15,  # i3D
+            50,
+            -5,  # i3D
+            -15,  # i3D
+            -23000,  # G4G.pl
+        ]
+
     def build_port_to_try_list(self, game_port: int) -> List[int]:
         return [
             47200,  # default query port
-            game_port + 22000,  # default port offset (mirror gamedig behavior)
-            game_port,  # some servers use the same port for game + query
-            game_port + 100,  # nitrado
-            game_port + 5,  # several hosters
-            game_port + 1,
+            *[game_port + offset for offset in self.get_query_port_offsets()],
             48888,  # gamed
-            game_port + 6,  # i3D
-            game_port + 8,  # i3D
-            game_port + 10,  # Servers.com/4netplayers
-            game_port + 15,  # i3D
-            game_port + 50,
-            game_port - 5,  # i3D
-            game_port - 15,  # i3D
-            game_port - 23000,  # G4G.pl
             randint(47190, 47210),  # random port around default query port
             25200 + randint(0, 22000),  # random port between default game port and default query port
             randint(game_port - 10, game_port + 10),  # random port around default game port
@@ -1,19 +1,29 @@
+import json
 import logging
+import os
 import sys
+from datetime import datetime
 from random import randint
-from typing import Tuple, Callable, List
+from typing import Tuple, Callable, List, Set, Optional, Dict
 
 import requests
 
 from GameserverLister.common.helpers import guid_from_ip_port
+from GameserverLister.common.http_cache import HttpCache
 from GameserverLister.common.servers import BadCompany2Server
-from GameserverLister.common.types import TheaterGame, TheaterPlatform
+from GameserverLister.common.types import TheaterGame, TheaterPlatform, StoreBackend
 from .common import FrostbiteServerLister
 
 
+SERVER_LIST_URL = 'https://fesl.cetteup.com/v1/bfbc2/servers/rome-pc'
+
+
 class BadCompany2ServerLister(FrostbiteServerLister):
     game: TheaterGame
     platform: TheaterPlatform
+    http_cache: HttpCache
+    # Lobby and game ids of all servers in the current list response
+    listed: Set[Tuple[int, int]]
 
     def __init__(
             self,
@@ -22,6 +32,10 @@ class BadCompany2ServerLister(FrostbiteServerLister):
             recover: bool,
             add_links: bool,
             txt: bool,
+            compact: bool,
+            snapshot: bool,
+            delta: bool,
+            store: StoreBackend,
             list_dir: str,
             timeout: float
     ):
@@ -34,22 +48,47 @@ class BadCompany2ServerLister(FrostbiteServerLister):
             recover,
             add_links,
             txt,
+            compact,
+            snapshot,
+            delta,
+            store,
             list_dir,
-            timeout
+            timeout,
+            # Keep concurrent checks against the API low to avoid being rate limited
+            recovery_concurrency=4
         )
+        self.http_cache = HttpCache(os.path.join(self.server_list_dir_path, 'http-cache'))
+        self.listed = set()
 
     def update_server_list(self):
         request_ok = False
         attempt = 0
         max_attempts = 3
         servers = None
+        not_modified = False
         while not request_ok and attempt < max_attempts:
             try:
                 logging.info('Fetching server list from Project Rome API')
-                resp = self.session.get('https://fesl.cetteup.com/v1/bfbc2/servers/rome-pc', timeout=self.request_timeout)
-
-                if resp.ok:
+                # Only download the list if it changed since it was last downloaded
+                resp = self.session.get(
+                    SERVER_LIST_URL,
+                    headers=self.http_cache.get_conditional_headers(SERVER_LIST_URL),
+                    timeout=self.request_timeout
+                )
+
+                if resp.status_code == 304:
+                    logging.info('Server list was not modified, using cached server list')
+                    servers = self.load_cached_server_list()
+                    not_modified = True
+                    request_ok = servers is not None
+                    if not request_ok:
+                        # Drop the unusable cache entry so the list is downloaded again (unconditionally)
+                        self.http_cache.invalidate(SERVER_LIST_URL)
+                        not_modified = False
+                        attempt += 1
+                elif resp.ok:
                     servers = resp.json()
+                    self.http_cache.store(SERVER_LIST_URL, resp)
                     request_ok = True
                 else:
                     attempt += 1
@@ -63,6 +102,13 @@ class BadCompany2ServerLister(FrostbiteServerLister):
             logging.error('Failed to retrieve server list, exiting')
             sys.exit(1)
 
+        self.listed = {(server['LID'], server['GID']) for server in servers}
+
+        # If the list was not modified, all listed servers are already known (unless they were removed from the list
+        # file), so just mark them as seen instead of merging them again
+        if not_modified and self.mark_servers_seen([guid_from_ip_port(server['I'], server['P']) for server in servers]):
+            return
+
         # Add servers from list
         found_servers = []
         for server in servers:
@@ -86,11 +132,44 @@ class BadCompany2ServerLister(FrostbiteServerLister):
 
         self.add_update_servers(found_servers)
 
+    def load_cached_server_list(self) -> Optional[List[dict]]:
+        body = self.http_cache.load_body(SERVER_LIST_URL)
+        if body is None:
+            logging.error('Failed to load cached server list')
+            return None
+
+        try:
+            return json.loads(body)
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            logging.debug(e)
+            logging.error('Failed to parse cached server list')
+            return None
+
+    def mark_servers_seen(self, uids: List[str]) -> bool:
+        """
+        Update last seen at of known servers
+        :param uids: Uids of the servers to mark as seen
+        :return: True if all servers were known, else False (without marking any server as seen)
+        """
+        known = [self.servers.get(uid) for uid in uids]
+        if any(server is None for server in known):
+            return False
+
+        now = datetime.now().astimezone()
+        for server in known:
+            server.last_seen_at = now
+        logging.info(f'Marked {len(known)} listed servers as seen')
+        return True
+
+    def resolve_expired_servers(self, servers: List[BadCompany2Server]) -> Dict[str, bool]:
+        # Servers contained in the current list response do exist (under a new address), no need to ask the API
+        return {server.uid: True for server in servers if (server.lid, server.gid) in self.listed}
+
     def check_if_server_still_exists(self, server: BadCompany2Server, checks_since_last_ok: int) -> Tuple[bool, bool, int]:
         check_ok = True
         found = False
         try:
-            response = self.session.get(f'https://fesl.cetteup.com/v1/bfbc2/servers/rome-pc/{server.lid}/{server.gid}',
+            response = self.session.get(f'{SERVER_LIST_URL}/{server.lid}/{server.gid}',
                                         timeout=self.request_timeout)
 
             if response.ok:
@@ -112,6 +191,19 @@ class BadCompany2ServerLister(FrostbiteServerLister):
 
         return check_ok, found, checks_since_last_ok
 
+    def get_query_port_offsets(self) -> List[int]:
+        return [
+            29321,  # default port offset (mirror gamedig behavior)
+            0,  # some servers use same port for game + query
+            100,  # nitrado
+            10,
+            5,  # several hosters
+            1,
+            29233,  # i3D.net
+            29000,
+            29323
+        ]
+
     def build_port_to_try_list(self, game_port: int) -> List[int]:
         """
         Most Bad Company 2 server seem to be hosted directly by members of the community, resulting in pretty random
@@ -120,15 +212,7 @@ class BadCompany2ServerLister(FrostbiteServerLister):
         """
         return [
             48888,  # default query port
-            game_port + 29321,  # game port + default port offset (mirror gamedig behavior)
-            game_port,  # game port (some servers use same port for game + query)
-            game_port + 100,  # game port + 100 (nitrado)
-            game_port + 10,  # game port + 10
-            game_port + 5,  # game port + 5 (several hosters)
-            game_port + 1,  # game port + 1
-            game_port + 29233,  # game port + 29233 (i3D.net)
-            game_port + 29000,  # game port + 29000
-            game_port + 29323,  # game port + 29323
+            *[game_port + offset for offset in self.get_query_port_offsets()],
             randint(48880, 48890),  # random port around default query port
             randint(48601, 48605),  # random port around 48600
             randint(19567, 48888),  # random port between default game port and default query port
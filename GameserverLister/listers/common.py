@@ -1,20 +1,34 @@
 import json
 import logging
 import os
+import sqlite3
 import sys
 import time
+from collections import Counter
 from datetime import datetime, timedelta
 from random import shuffle
-from typing import Type, List, Tuple, Optional, Union, Callable
+from typing import Type, List, Tuple, Optional, Union, Callable, Dict
 
 import gevent
 import requests
 from gevent.pool import Pool
+from gevent.threadpool import ThreadPool
 
+from GameserverLister.common.changes import ChangeTracker, get_changed_fields, get_state
+from GameserverLister.common.concurrency import SharedBackoff, TokenBucket
+from GameserverLister.common.coverage import CoverageEstimator
+from GameserverLister.common.files import iter_servers, atomic_write, write_servers_json, write_servers_txt, \
+    write_changes_ndjson
 from GameserverLister.common.helpers import is_valid_port, find_query_port
-from GameserverLister.common.servers import Server, ObjectJSONEncoder, FrostbiteServer
-from GameserverLister.common.types import Game, Platform
+from GameserverLister.common.query_port_stats import QueryPortOffsetStats
+from GameserverLister.common.servers import Server, FrostbiteServer
+from GameserverLister.common.snapshot import supports_snapshot, read_snapshot, write_snapshot, SnapshotError
+from GameserverLister.common.sqlite_store import SqliteServerStore
+from GameserverLister.common.store import ServerStore
+from GameserverLister.common.transport import build_session
+from GameserverLister.common.types import Game, Platform, StoreBackend, QueryPortProber
 from GameserverLister.common.weblinks import WebLink
+from GameserverLister.protocols.frostbite import FrostbiteQueryEngine
 
 
 class ServerLister:
@@ -27,9 +41,16 @@ class ServerLister:
     recover: bool
     add_links: bool
     txt: bool
+    compact: bool
+    snapshot: bool
+    snapshot_file_path: str
+    delta: bool
+    changes: ChangeTracker
+    store: StoreBackend
     ensure_ascii: bool
     server_class: Type[Server]
-    servers: List[Server]
+    servers: ServerStore[Server]
+    recovery_concurrency: int
 
     session: requests.Session
     request_timeout: float
@@ -44,8 +65,15 @@ class ServerLister:
             recover: bool,
             add_links: bool,
             txt: bool,
+            compact: bool,
+            snapshot: bool,
+            delta: bool,
+            store: StoreBackend,
             list_dir: str,
-            request_timeout: float = 5.0
+            request_timeout: float = 5.0,
+            recovery_concurrency: int = 16,
+            pool_size: Optional[int] = None,
+            http2: bool = False
     ):
         self.game = game
         self.platform = platform
@@ -57,13 +85,20 @@ class ServerLister:
         self.recover = recover
         self.add_links = add_links
         self.txt = txt
+        self.compact = compact
+        self.snapshot = snapshot
+        self.snapshot_file_path = self.build_server_list_file_path('bin')
+        self.delta = delta
+        self.changes = ChangeTracker()
+        self.store = store
 
         self.ensure_ascii = True
         self.server_class = server_class
-        self.servers = []
+        self.servers = ServerStore()
+        self.recovery_concurrency = recovery_concurrency
 
-        # Init session
-        self.session = requests.session()
+        # Init session (shared by concurrent checks, so allow as many connections as checks by default)
+        self.session = build_session(pool_size or self.recovery_concurrency, http2)
         self.request_timeout = request_timeout
 
         # Create list dir if it does not exist
@@ -75,12 +110,21 @@ class ServerLister:
                 logging.error(f'Failed to create missing server list directory at {self.server_list_dir_path}')
                 sys.exit(1)
 
-        # Init server list with servers from existing list or empty one
-        if os.path.isfile(self.server_list_file_path):
+        # Load servers from database if servers are stored in SQLite
+        if self.store is StoreBackend.SQLITE:
+            self.servers = self.open_database()
+
+        # Init server list with servers from existing snapshot (if newer than list), existing list or empty one
+        # (also seeds an empty database)
+        if len(self.servers) > 0:
+            pass
+        elif self.is_snapshot_newer() and self.load_snapshot():
+            pass
+        elif os.path.isfile(self.server_list_file_path):
             try:
                 with open(self.server_list_file_path, 'r') as serverListFile:
                     logging.info('Loading existing server list')
-                    self.servers = json.load(serverListFile, object_hook=self.server_class.load)
+                    self.servers.add_all(iter_servers(serverListFile, self.server_class))
             except IOError as e:
                 logging.debug(e)
                 logging.error('Failed to read existing server list file')
@@ -90,6 +134,37 @@ class ServerLister:
                 logging.error('Failed to parse existing server list file contents')
                 sys.exit(1)
 
+    def open_database(self) -> SqliteServerStore:
+        database_path = os.path.join(self.server_list_dir_path, 'servers.sqlite3')
+        try:
+            store = SqliteServerStore(database_path, f'{self.game}-servers-{self.platform}', self.server_class)
+            logging.info('Loading existing servers from database')
+            store.load()
+            return store
+        except sqlite3.Error as e:
+            logging.debug(e)
+            logging.error('Failed to load servers from database')
+            sys.exit(1)
+
+    def is_snapshot_newer(self) -> bool:
+        if not supports_snapshot(self.server_class) or not os.path.isfile(self.snapshot_file_path):
+            return False
+        if not os.path.isfile(self.server_list_file_path):
+            return True
+        return os.path.getmtime(self.snapshot_file_path) >= os.path.getmtime(self.server_list_file_path)
+
+    def load_snapshot(self) -> bool:
+        try:
+            with open(self.snapshot_file_path, 'rb') as snapshot_file:
+                logging.info('Loading existing server list snapshot')
+                self.servers.add_all(read_snapshot(snapshot_file, self.server_class))
+            return True
+        except (IOError, SnapshotError) as e:
+            # Snapshot is just a faster alternative to the JSON list, so fall back to the list instead of failing
+            logging.debug(e)
+            logging.warning('Failed to load existing server list snapshot, falling back to server list file')
+            return False
+
     def update_server_list(self):
         pass
 
@@ -97,17 +172,17 @@ class ServerLister:
         # Add/update found servers to/in known servers
         logging.info(f'Updating server list with {len(found_servers)} found servers')
         for found_server in found_servers:
-            known_server_uids = [s.uid for s in self.servers]
             # Update existing server entry or add new one
-            if found_server.uid in known_server_uids:
-                logging.debug(f'Found server {found_server.uid} already known, updating')
-                index = known_server_uids.index(found_server.uid)
-                self.servers[index].update(found_server)
-                self.servers[index].trim(self.expired_ttl)
+            known = self.servers.get(found_server.uid)
+            before = get_state(known) if known is not None else None
+            server, added = self.servers.upsert(found_server)
+            if added:
+                logging.debug(f'Found server {found_server.uid} is new, added')
+                self.changes.record_added(server.uid)
             else:
-                logging.debug(f'Found server {found_server.uid} is new, adding')
-                # Add new server entry
-                self.servers.append(found_server)
+                logging.debug(f'Found server {found_server.uid} already known, updated')
+                server.trim(self.expired_ttl)
+                self.changes.record_updated(server.uid, get_changed_fields(before, get_state(server)))
 
     def remove_expired_servers(self) -> tuple:
         # Skip removal if expiration is disabled
@@ -115,43 +190,103 @@ class ServerLister:
             logging.info('Skipping expiration ttl check')
             return 0, 0
 
-        # Iterate over copy of server list and remove any expired servers from the (actual) server list
+        # Partition expired servers into expired and recovery candidates using a single cutoff
         logging.info(f'Checking expiration ttl for {len(self.servers)} servers')
-        checks_since_last_ok = 0
-        expired_servers_removed = 0
-        expired_servers_recovered = 0
-        for server in self.servers[:]:
-            expired = datetime.now().astimezone() > server.last_seen_at + timedelta(hours=self.expired_ttl)
-            if expired and self.recover:
-                # Attempt to recover expired server by contacting/accessing it directly
-                time.sleep(self.get_backoff_timeout(checks_since_last_ok))
-                # Check if server can be accessed directly
-                check_ok, found, checks_since_last_ok = self.check_if_server_still_exists(
-                    server, checks_since_last_ok
-                )
-
-                # Remove server if request was sent successfully but server was not found
-                if check_ok and not found:
-                    logging.debug(f'Server {server.uid} has not been seen in '
-                                  f'{self.expired_ttl} hours and could not be recovered, removing it')
-                    self.servers.remove(server)
-                    expired_servers_removed += 1
-                elif check_ok and found:
-                    logging.debug(f'Server {server.uid} did not appear in list but is still online, '
-                                  f'updating last seen at')
-                    index = self.servers.index(server)
-                    self.servers[index].last_seen_at = datetime.now().astimezone()
-                    self.servers[index].trim(self.expired_ttl)
-
-                    expired_servers_recovered += 1
-            elif expired:
+        now = datetime.now().astimezone()
+        cutoff = now - timedelta(hours=self.expired_ttl)
+        expired_servers: List[Server] = []
+        recovery_candidates: List[Server] = []
+        for server in self.servers.find_expired(cutoff):
+            if self.recover:
+                recovery_candidates.append(server)
+            else:
                 logging.debug(f'Server {server.uid} has not been seen in '
                               f'{self.expired_ttl} hours, removing it')
-                self.servers.remove(server)
-                expired_servers_removed += 1
-
+                expired_servers.append(server)
+
+        # Attempt to recover expired servers by contacting/accessing them directly
+        recovered_servers: List[Server] = []
+        check_results = self.check_expired_servers(recovery_candidates)
+        for server, (check_ok, found) in zip(recovery_candidates, check_results):
+            # Remove server if request was sent successfully but server was not found
+            if check_ok and not found:
+                logging.debug(f'Server {server.uid} has not been seen in '
+                              f'{self.expired_ttl} hours and could not be recovered, removing it')
+                expired_servers.append(server)
+            elif check_ok and found:
+                logging.debug(f'Server {server.uid} did not appear in list but is still online, '
+                              f'updating last seen at')
+                recovered_servers.append(server)
+
+        # Commit results
+        self.servers.remove_all(server.uid for server in expired_servers)
+        for server in expired_servers:
+            self.changes.record_expired(server.uid)
+        for server in recovered_servers:
+            server.last_seen_at = now
+            server.trim(self.expired_ttl)
+            self.changes.record_recovered(server.uid)
+
+        expired_servers_removed = len(expired_servers)
+        expired_servers_recovered = len(recovered_servers)
         return expired_servers_removed, expired_servers_recovered
 
+    def check_expired_servers(self, servers: List[Server]) -> List[Tuple[bool, bool]]:
+        """
+        Check if expired servers still exist. Servers are resolved in bulk where possible, with any remaining servers
+        being checked individually, running up to [recovery_concurrency] checks in parallel.
+        Checks run in gevent's thread pool, since the query libraries use blocking sockets.
+        All checks share a single backoff, so any failed check slows down all following checks.
+        :param servers: Servers to check
+        :return: Check ok and found flags for each server (same order as the given servers)
+        """
+        if len(servers) == 0:
+            return []
+
+        resolved = self.resolve_expired_servers(servers)
+        if len(resolved) > 0:
+            logging.info(f'Resolved {len(resolved)} expired servers without checking them individually')
+        remaining = [server for server in servers if server.uid not in resolved]
+        check_results = iter(self.check_servers_individually(remaining))
+
+        return [(True, resolved[server.uid]) if server.uid in resolved else next(check_results) for server in servers]
+
+    def resolve_expired_servers(self, servers: List[Server]) -> Dict[str, bool]:
+        """
+        Determine whether expired servers still exist using data available in bulk (e.g. the retrieved server list),
+        without checking servers individually
+        :param servers: Servers to resolve
+        :return: Found flag by uid for each server that could be resolved
+        """
+        return {}
+
+    def check_servers_individually(self, servers: List[Server]) -> List[Tuple[bool, bool]]:
+        if len(servers) == 0:
+            return []
+
+        logging.info(f'Checking if {len(servers)} expired servers still exist '
+                     f'(concurrency: {self.recovery_concurrency})')
+        backoff = SharedBackoff(self.get_backoff_timeout)
+
+        def check(server: Server) -> Tuple[bool, bool]:
+            before = backoff.wait()
+            try:
+                check_ok, found, after = self.check_if_server_still_exists(server, before)
+            except Exception as e:
+                logging.debug(e)
+                logging.error(f'Failed to check if server {server.uid} still exists')
+                return False, False
+            backoff.record(check_ok, before, after)
+            return check_ok, found
+
+        pool = ThreadPool(self.recovery_concurrency)
+        jobs = [pool.spawn(check, server) for server in servers]
+        # Wait for all jobs to complete
+        gevent.joinall(jobs)
+        pool.kill()
+
+        return [job.value for job in jobs]
+
     def check_if_server_still_exists(self, server: Server, checks_since_last_ok: int) -> Tuple[bool, bool, int]:
         pass
 
@@ -172,18 +307,43 @@ class ServerLister:
         return os.path.join(self.server_list_dir_path, f'{self.game}-servers-{self.platform}.{extension}')
 
     def write_to_file(self):
+        # Persist servers first (if stored in a database), any files are derived outputs
+        try:
+            self.servers.commit()
+        except sqlite3.Error as e:
+            logging.debug(e)
+            logging.error('Failed to write servers to database')
+            sys.exit(1)
+
         logging.info(f'Writing {len(self.servers)} servers to output file')
-        with open(self.server_list_file_path, 'w') as output_file:
-            json.dump(self.servers, output_file, indent=2, ensure_ascii=self.ensure_ascii, cls=ObjectJSONEncoder)
+        # Write to temporary files which replace the existing files once written,
+        # so a failed/interrupted write never leaves a truncated list behind
+        with atomic_write(self.server_list_file_path) as output_file:
+            write_servers_json(output_file, self.servers, self.ensure_ascii, self.compact)
 
         if self.txt:
             txt_file_path = self.build_server_list_file_path('txt')
-            with open(txt_file_path, 'w') as txt_file:
-                txt_file.writelines('\n'.join([s.txt() for s in self.servers]))
+            with atomic_write(txt_file_path) as txt_file:
+                write_servers_txt(txt_file, self.servers)
+
+        if self.delta:
+            delta_file_path = self.build_server_list_file_path('delta.ndjson')
+            with atomic_write(delta_file_path) as delta_file:
+                write_changes_ndjson(delta_file, self.changes, self.servers, self.ensure_ascii)
+
+        # Write snapshot last, making sure it's (at least as) new as the JSON list
+        if self.snapshot and supports_snapshot(self.server_class):
+            with atomic_write(self.snapshot_file_path, 'wb') as snapshot_file:
+                write_snapshot(snapshot_file, self.servers, self.server_class)
+
+
+# Max number of learned query port offsets to try for a server (before falling back to the default offsets)
+MAX_LEARNED_OFFSETS = 3
 
 
 class FrostbiteServerLister(ServerLister):
-    servers: List[FrostbiteServer]
+    servers: ServerStore[FrostbiteServer]
+    query_port_stats: QueryPortOffsetStats
 
     def __init__(
             self,
@@ -195,59 +355,79 @@ class FrostbiteServerLister(ServerLister):
             recover: bool,
             add_links: bool,
             txt: bool,
+            compact: bool,
+            snapshot: bool,
+            delta: bool,
+            store: StoreBackend,
             list_dir: str,
-            request_timeout: float = 5.0
+            request_timeout: float = 5.0,
+            recovery_concurrency: int = 16,
+            pool_size: Optional[int] = None,
+            http2: bool = False
     ):
-        super().__init__(game, platform, server_class, expire, expired_ttl, recover, add_links, txt, list_dir, request_timeout)
+        super().__init__(
+            game,
+            platform,
+            server_class,
+            expire,
+            expired_ttl,
+            recover,
+            add_links,
+            txt,
+            compact,
+            snapshot,
+            delta,
+            store,
+            list_dir,
+            request_timeout,
+            recovery_concurrency,
+            pool_size,
+            http2
+        )
+        self.query_port_stats = QueryPortOffsetStats(
+            os.path.join(self.server_list_dir_path, f'{self.game}-query-port-offsets-{self.platform}.json')
+        )
 
-    def find_query_ports(self, gamedig_bin_path: str, gamedig_concurrency: int, expired_ttl: float):
-        logging.info(f'Searching query port for {len(self.servers)} servers')
+    def find_query_ports(
+            self,
+            prober: QueryPortProber,
+            gamedig_bin_path: str,
+            gamedig_concurrency: int,
+            probe_concurrency: int,
+            expired_ttl: float
+    ):
+        logging.info(f'Searching query port for {len(self.servers)} servers (prober: {prober})')
 
         search_stats = {
             'totalSearches': len(self.servers),
             'queryPortFound': 0,
             'queryPortReset': 0
         }
-        pool = Pool(gamedig_concurrency)
-        jobs = []
-        for server in self.servers:
-            ports_to_try = self.build_port_to_try_list(server.game_port)
-
-            # Add ports to try based on offsets used by other servers on the same ip
-            for s in self.servers:
-                if s.ip == server.ip and s.game_port != server.game_port and s.query_port != -1:
-                    offset = s.query_port - s.game_port
-                    ports_to_try.insert(1, server.game_port + offset)
-
-            # Shuffle all but the first port (which should be the default port)
-            shuffled = ports_to_try[1:]
-            shuffle(shuffled)
-            ports_to_try[1:] = shuffled
-
-            # Add current query port at index 0 if valid
-            if server.query_port != -1:
-                ports_to_try.insert(0, server.query_port)
-
-            # Remove any invalid/duplicate ports (not using set() to dedup as it changes the order of elements)
-            ports_to_try = [
-                p for [i, p] in enumerate(ports_to_try)
-                if is_valid_port(p) and i == ports_to_try.index(p)
+        servers = list(self.servers)
+        offset_index = self.build_query_port_offset_index()
+        ports_to_try = [self.build_server_ports_to_try(server, offset_index.get(server.ip, Counter()))
+                        for server in servers]
+        if prober is QueryPortProber.NATIVE:
+            query_ports = self.probe_query_ports(servers, ports_to_try, probe_concurrency)
+        else:
+            pool = Pool(gamedig_concurrency)
+            jobs = [
+                pool.spawn(find_query_port, gamedig_bin_path, self.game, server, server_ports, self.get_validator())
+                for server, server_ports in zip(servers, ports_to_try)
             ]
+            # Wait for all jobs to complete
+            gevent.joinall(jobs)
+            query_ports = [job.value for job in jobs]
 
-            # Get six candidates from the selection ([current], default, random...)
-            ports_to_try = ports_to_try[:6]
+        self.record_query_port_offsets(servers, ports_to_try, query_ports, prober, offset_index)
 
-            jobs.append(
-                pool.spawn(find_query_port, gamedig_bin_path, self.game, server, ports_to_try, self.get_validator())
-            )
-        # Wait for all jobs to complete
-        gevent.joinall(jobs)
-        for index, job in enumerate(jobs):
-            server = self.servers[index]
+        for server, query_port in zip(servers, query_ports):
             logging.debug(f'Checking query port search result for {server.uid}')
-            if job.value != -1:
-                logging.debug(f'Query port found ({job.value}), updating server')
-                server.query_port = job.value
+            if query_port != -1:
+                logging.debug(f'Query port found ({query_port}), updating server')
+                if query_port != server.query_port:
+                    self.changes.record_updated(server.uid, ['queryPort'])
+                server.query_port = query_port
                 server.last_queried_at = datetime.now().astimezone()
                 search_stats['queryPortFound'] += 1
             elif server.query_port != -1 and \
@@ -255,10 +435,125 @@ class FrostbiteServerLister(ServerLister):
                      datetime.now().astimezone() > server.last_queried_at + timedelta(hours=expired_ttl)):
                 logging.debug(f'Query port expired, resetting to -1 (was {server.query_port})')
                 server.query_port = -1
+                self.changes.record_updated(server.uid, ['queryPort'])
                 # TODO Reset last queried at here?
                 search_stats['queryPortReset'] += 1
         logging.info(f'Query port search stats: {search_stats}')
 
+    def record_query_port_offsets(self, servers: List[FrostbiteServer], ports_to_try: List[List[int]],
+                                  query_ports: List[int], prober: QueryPortProber,
+                                  offset_index: Dict[str, Counter]) -> None:
+        """
+        Record which of the probed candidate ports turned out to be a server's query port (by offset to the game port).
+        Only candidates built from an offset are recorded (not the current query port or any absolute/random ports),
+        so that statistics reflect which offsets find query ports and only contain offsets which can be tried again.
+        :param servers: Servers the query port was searched for (with their query port from before the search)
+        :param ports_to_try: Candidate ports of each server (in order of preference)
+        :param query_ports: Query port found for each server (-1 if none was found)
+        :param prober: Prober used to search query ports
+        :param offset_index: Query port offsets used by servers on the same ip (as used to build candidates)
+        """
+        offsets = {*self.get_query_port_offsets(), *self.query_port_stats.get_matched_offsets()}
+        for server, server_ports, query_port in zip(servers, ports_to_try, query_ports):
+            if len(server_ports) == 0:
+                continue
+            # Candidates are tried in order until the query port is found, except the native prober probing all
+            # remaining candidates at once if the first one does not match
+            if query_port == server_ports[0]:
+                tried = server_ports[:1]
+            elif query_port != -1 and prober is QueryPortProber.GAMEDIG:
+                tried = server_ports[:server_ports.index(query_port) + 1]
+            else:
+                tried = server_ports
+            server_offsets = offsets.union(offset_index.get(server.ip, Counter()))
+            for port in tried:
+                offset = port - server.game_port
+                if port == server.query_port or offset not in server_offsets:
+                    continue
+                self.query_port_stats.record(server.ip, offset, port == query_port)
+        self.query_port_stats.save()
+
+    def build_query_port_offset_index(self) -> Dict[str, Counter]:
+        """
+        Index the query port offsets (query port - game port) of servers with a known query port by ip
+        :return: Number of servers using each offset by ip
+        """
+        index: Dict[str, Counter] = {}
+        for server in self.servers:
+            if server.query_port != -1:
+                index.setdefault(server.ip, Counter())[server.query_port - server.game_port] += 1
+        return index
+
+    def build_server_ports_to_try(self, server: FrostbiteServer, ip_offsets: Counter) -> List[int]:
+        """
+        Build the list of candidate query ports for a server
+        :param server: Server to build candidates for
+        :param ip_offsets: Query port offsets used by servers on the same ip (and how often each is used)
+        :return: Up to six candidate ports, in order of preference
+        """
+        default, *others = self.build_port_to_try_list(server.game_port)
+        shuffle(others)
+
+        # Try current query port first, then offsets used by other servers on the same ip (most common first, since
+        # hosters tend to use the same offset for all their servers), then offsets which were the query port offset
+        # in previous runs (most likely for the server's subnet first), then the default port and finally
+        # the remaining ports in random order
+        learned_offsets = self.query_port_stats.get_ranked_offsets(server.ip)[:MAX_LEARNED_OFFSETS]
+        ports_to_try = [
+            server.query_port,
+            *[server.game_port + offset for offset, _ in ip_offsets.most_common()],
+            *[server.game_port + offset for offset, _ in learned_offsets],
+            default,
+            *others
+        ]
+
+        # Remove any invalid/duplicate ports, keeping the order of elements
+        candidates = []
+        seen = set()
+        for port in ports_to_try:
+            if is_valid_port(port) and port not in seen:
+                candidates.append(port)
+                seen.add(port)
+            if len(candidates) == 6:
+                break
+
+        return candidates
+
+    def probe_query_ports(self, servers: List[FrostbiteServer], ports_to_try: List[List[int]],
+                          concurrency: int) -> List[int]:
+        """
+        Probe candidate ports in two rounds: the most likely candidate port of all servers first, then all remaining
+        candidate ports of servers not resolved in the first round at once. The first candidate port (in order)
+        whose response passes the validator is used as a server's query port.
+        :param servers: Servers to find the query port for
+        :param ports_to_try: Candidate ports to try for each server (in order of preference)
+        :param concurrency: Max number of probes to have in flight at once
+        :return: Query port for each server (-1 if none was found)
+        """
+        engine = FrostbiteQueryEngine(concurrency)
+        validator = self.get_validator()
+        query_ports = [-1] * len(servers)
+        for round_ports in [[server_ports[:1] for server_ports in ports_to_try],
+                            [server_ports[1:] for server_ports in ports_to_try]]:
+            pending = [i for i, query_port in enumerate(query_ports) if query_port == -1]
+            addresses = [(servers[i].ip, port) for i in pending for port in round_ports[i]]
+            results = dict(zip(addresses, engine.query_all(addresses)))
+            for i in pending:
+                server = servers[i]
+                query_ports[i] = next(
+                    (port for port in round_ports[i]
+                     if results[(server.ip, port)] is not None and validator(server, results[(server.ip, port)])),
+                    -1
+                )
+        return query_ports
+
+    # Function has to be public to overrideable by derived classes
+    def get_query_port_offsets(self) -> List[int]:
+        """
+        Get the fixed query port offsets (query port - game port) known to be used by servers of the game
+        """
+        pass
+
     # Function has to be public to overrideable by derived classes
     def build_port_to_try_list(self, game_port: int) -> list:
         pass
@@ -272,6 +567,9 @@ class HttpServerLister(ServerLister):
     per_page: int
     sleep: float
     max_attempts: int
+    concurrency: int
+    rate_limiter: Optional[TokenBucket]
+    coverage_target: float
 
     def __init__(
             self,
@@ -285,9 +583,17 @@ class HttpServerLister(ServerLister):
             recover: bool,
             add_links: bool,
             txt: bool,
+            compact: bool,
+            snapshot: bool,
+            delta: bool,
+            store: StoreBackend,
             list_dir: str,
             sleep: float,
-            max_attempts: int
+            max_attempts: int,
+            concurrency: int,
+            rate_limit: float,
+            coverage_target: float,
+            http2: bool
     ):
         super().__init__(
             game,
@@ -298,75 +604,138 @@ class HttpServerLister(ServerLister):
             recover,
             add_links,
             txt,
+            compact,
+            snapshot,
+            delta,
+            store,
             list_dir,
-            request_timeout=10
+            request_timeout=10,
+            # Keep concurrent checks against HTTP APIs low to avoid being rate limited
+            recovery_concurrency=4,
+            # Reuse connections across concurrently requested pages and checks
+            pool_size=max(concurrency, 4),
+            http2=http2
         )
         self.page_limit = page_limit
         self.per_page = per_page
         self.sleep = sleep
         self.max_attempts = max_attempts
+        self.concurrency = concurrency
+        self.rate_limiter = TokenBucket(rate_limit) if rate_limit > 0 else None
+        self.coverage_target = coverage_target
 
     def update_server_list(self):
-        offset = 0
         """
         The Frostbite server browsers returns tons of duplicate servers (pagination is completely broken/non-existent).
         You basically just a [per_page] random servers every time. Thus, there is no way of telling when to stop.
-        As a workaround, just stop after not retrieving a new/unique server for [args.page_limit] pages
+        As a workaround, stop once the estimated share of servers seen reaches [coverage_target]
+        or after not retrieving a new/unique server for [args.page_limit] pages (whichever comes first)
         """
+        pages = 0
         pages_since_last_unique_server = 0
         attempt = 0
         """
         Since pagination of the server list is completely broken, just get the first "page" over and over again until
-        no servers have been found in [args.page_limit] "pages".
+        no servers have been found in [args.page_limit] "pages". Since the "pages" do not depend on each other,
+        up to [concurrency] pages are requested at once. Responses are processed in the order they arrive.
         """
-        found_servers = []
-        logging.info('Starting server list retrieval')
-        while pages_since_last_unique_server < self.page_limit and attempt < self.max_attempts:
-            # Sleep when requesting anything but offset 0 (use increased sleep when retrying)
-            if offset > 0:
-                time.sleep(pow(self.sleep, attempt + 1))
-
-            try:
-                response = self.session.get(
-                    self.get_server_list_url(self.per_page),
-                    timeout=self.request_timeout
-                )
-            except requests.exceptions.RequestException as e:
-                logging.debug(e)
-                logging.error(f'Request failed, retrying {attempt + 1}/{self.max_attempts}')
-                # Count try and start over
-                attempt += 1
-                continue
-
-            if response.status_code == 200:
-                # Reset tries
-                attempt = 0
-                # Parse response
-                parsed = response.json()
-                server_total_before = len(found_servers)
-                # Add all servers in response (if they are new)
-                found_servers = self.add_page_found_servers(found_servers, parsed)
-                if len(found_servers) == server_total_before:
-                    pages_since_last_unique_server += 1
-                    logging.info(f'Got nothing but duplicates (page: {int(offset / self.per_page)},'
-                                 f' pages since last unique: {pages_since_last_unique_server})')
+        # Accumulate servers found during the crawl by uid, so duplicates are detected in constant time
+        found_servers: ServerStore[Server] = ServerStore()
+        # Estimate total number of servers from how often servers are returned again, in order to stop once
+        # (almost) all servers have been seen rather than only after [page_limit] pages without any new servers
+        coverage = CoverageEstimator(self.coverage_target)
+        pool = ThreadPool(self.concurrency)
+        pending = []
+        logging.info(f'Starting server list retrieval (concurrency: {self.concurrency})')
+        while True:
+            # Keep requesting pages until stop condition is met
+            while pages_since_last_unique_server < self.page_limit and attempt < self.max_attempts and \
+                    not coverage.is_target_reached() and len(pending) < self.concurrency:
+                # Sleep when requesting anything but the first page (use increased sleep when retrying)
+                sleep = pow(self.sleep, attempt + 1) if pages > 0 else 0
+                pending.append(pool.spawn(self.fetch_page, sleep))
+
+            # Process responses as they arrive (including any responses to requests in flight once stopped)
+            if len(pending) == 0:
+                break
+            for job in gevent.wait(pending, count=1):
+                pending.remove(job)
+                response = job.value
+                if response is None:
+                    logging.error(f'Request failed, retrying {attempt + 1}/{self.max_attempts}')
+                    # Count try and start over
+                    attempt += 1
+                elif response.status_code == 200:
+                    # Reset tries
+                    attempt = 0
+                    # Parse response
+                    page_servers = self.get_page_servers(response.json())
+                    coverage.observe(server.uid for server in page_servers)
+                    server_total_before = len(found_servers)
+                    # Add all servers in response (if they are new)
+                    found_servers = self.add_page_found_servers(found_servers, page_servers)
+                    if len(found_servers) == server_total_before:
+                        pages_since_last_unique_server += 1
+                        logging.info(f'Got nothing but duplicates (page: {pages},'
+                                     f' pages since last unique: {pages_since_last_unique_server})')
+                    else:
+                        logging.info(f'Got {len(found_servers) - server_total_before} new servers')
+                        # Found new unique server, reset
+                        pages_since_last_unique_server = 0
+                    pages += 1
                 else:
-                    logging.info(f'Got {len(found_servers) - server_total_before} new servers')
-                    # Found new unique server, reset
-                    pages_since_last_unique_server = 0
-                offset += self.per_page
-            else:
-                logging.error(f'Server responded with {response.status_code}, '
-                              f'retrying {attempt + 1}/{self.max_attempts}')
-                attempt += 1
-
-        self.add_update_servers(found_servers)
+                    logging.error(f'Server responded with {response.status_code}, '
+                                  f'retrying {attempt + 1}/{self.max_attempts}')
+                    attempt += 1
+        pool.kill()
+
+        estimated_coverage = coverage.estimate_coverage()
+        if estimated_coverage is not None:
+            logging.info(f'Found {len(found_servers)} servers on {pages} pages, estimated total servers: '
+                         f'{coverage.estimate_total():.0f} (coverage: {estimated_coverage:.2%})')
+        if coverage.is_target_reached() and pages_since_last_unique_server < self.page_limit:
+            logging.info(f'Reached coverage target of {self.coverage_target:.2%}, saved at least '
+                         f'{self.page_limit - pages_since_last_unique_server} page requests')
+
+        self.add_update_servers(list(found_servers))
+
+    def fetch_page(self, sleep: float) -> Optional[requests.Response]:
+        if sleep > 0:
+            time.sleep(sleep)
+        # Rate limit is shared by all concurrent requests
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+
+        try:
+            return self.session.get(
+                self.get_server_list_url(self.per_page),
+                timeout=self.request_timeout
+            )
+        except requests.exceptions.RequestException as e:
+            logging.debug(e)
+            return None
 
     def get_server_list_url(self, per_page: int) -> str:
         pass
 
-    def add_page_found_servers(self, found_servers: List[Server], page_response_data: dict) -> List[Server]:
+    def get_page_servers(self, page_response_data: dict) -> List[Server]:
         pass
 
+    def add_page_found_servers(
+            self,
+            found_servers: ServerStore[Server],
+            page_servers: List[Server]
+    ) -> ServerStore[Server]:
+        for found_server in page_servers:
+            known = found_servers.get(found_server.uid)
+            if known is None:
+                logging.debug(f'Got new server {found_server.uid}, adding it')
+                found_servers.add(found_server)
+            else:
+                logging.debug(f'Got duplicate server {found_server.uid}, updating last seen at')
+                known.last_seen_at = datetime.now().astimezone()
+
+        return found_servers
+
     def get_backoff_timeout(self, checks_since_last_ok: int) -> int:
         return 1 + pow(self.sleep, checks_since_last_ok % self.max_attempts)
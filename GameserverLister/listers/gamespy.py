@@ -1,46 +1,57 @@
 import logging
-import subprocess
-from typing import List, Tuple, Optional, Union
+import os
+from typing import List, Tuple, Optional, Union, Dict
 
+from GameserverLister.common.game_port_cache import GamePortCache
 from GameserverLister.common.helpers import is_valid_public_ip, is_valid_port, is_server_for_gamespy_game
 from GameserverLister.common.servers import ClassicServer
-from GameserverLister.common.types import GamespyGame, GamespyPrincipal, GamespyGameConfig, GamespyPlatform
+from GameserverLister.common.store import ServerStore
+from GameserverLister.common.types import GamespyGame, GamespyPrincipal, GamespyGameConfig, GamespyPlatform, \
+    StoreBackend
 from GameserverLister.common.weblinks import WebLink, WEB_LINK_TEMPLATES
 from GameserverLister.games.gamespy import GAMESPY_GAME_CONFIGS
 from GameserverLister.listers.common import ServerLister
+from GameserverLister.protocols.gamespy_query import GamespyQueryEngine
 from GameserverLister.providers import GamespyProvider
 
 
 class GamespyServerLister(ServerLister):
     game: GamespyGame
     platform: GamespyPlatform
-    servers: List[ClassicServer]
+    servers: ServerStore[ClassicServer]
     principal: GamespyPrincipal
     provider: GamespyProvider
     config: GamespyGameConfig
-    gslist_bin_path: str
     gslist_filter: str
     gslist_super_query: bool
     gslist_timeout: int
     verify: bool
     add_game_port: bool
+    query_engine: GamespyQueryEngine
+    game_port_cache: GamePortCache
 
     def __init__(
             self,
             game: GamespyGame,
             principal: GamespyPrincipal,
             provider: GamespyProvider,
-            gslist_bin_path: str,
             gslist_filter: str,
             gslist_super_query: bool,
             gslist_timeout: int,
             verify: bool,
             add_game_port: bool,
+            query_concurrency: int,
+            query_timeout: float,
+            game_port_ttl: float,
             expire: bool,
             expired_ttl: float,
             recover: bool,
             add_links: bool,
             txt: bool,
+            compact: bool,
+            snapshot: bool,
+            delta: bool,
+            store: StoreBackend,
             list_dir: str
     ):
         super().__init__(
@@ -52,57 +63,99 @@ class GamespyServerLister(ServerLister):
             recover,
             add_links,
             txt,
+            compact,
+            snapshot,
+            delta,
+            store,
             list_dir
         )
         self.principal = principal
         self.provider = provider
         self.config = GAMESPY_GAME_CONFIGS[self.game]
-        self.gslist_bin_path = gslist_bin_path
         self.gslist_filter = gslist_filter
         self.gslist_super_query = gslist_super_query
         self.gslist_timeout = gslist_timeout
         self.verify = verify
         self.add_game_port = add_game_port
+        self.query_engine = GamespyQueryEngine(self.config.query_type, query_concurrency, query_timeout)
+        self.game_port_cache = GamePortCache(
+            os.path.join(self.server_list_dir_path, f'{self.game}-game-ports-{self.platform}.json'),
+            game_port_ttl
+        )
 
     def update_server_list(self):
-        found_servers = []
+        servers = []
         for server in self.get_servers():
             if not is_valid_public_ip(server.ip) or not is_valid_port(server.query_port):
                 logging.warning(f'Ignoring invalid server entry ({server.ip}:{server.query_port})')
                 continue
+            servers.append(server)
+
+        if not self.verify and not self.add_links and not self.add_game_port:
+            self.add_update_servers(servers)
+            return
+
+        # Servers need to be queried in order to verify them, else only query servers without a cached game port
+        cached_game_ports = self.game_port_cache.get_fresh([server.uid for server in servers]) if not self.verify \
+            else {}
+        to_query = [server for server in servers if server.uid not in cached_game_ports]
+
+        # Attempt to query servers in order to verify they are servers for the current game
+        # (some principals return servers for other games than what we queried)
+        logging.info(f'Querying {len(to_query)} servers (concurrency: {self.query_engine.concurrency}, '
+                     f'cached: {len(cached_game_ports)})')
+        query_responses = dict(zip(
+            [server.uid for server in to_query],
+            self.query_engine.query_all([(server.ip, server.query_port) for server in to_query])
+        ))
 
-            if self.verify or self.add_links or self.add_game_port:
-                # Attempt to query server in order to verify is a server for the current game
-                # (some principals return servers for other games than what we queried)
-                logging.debug(f'Querying server {server.uid}/{server.ip}:{server.query_port}')
-                responded, query_response = self.query_server(server)
-                logging.debug(f'Query {"was successful" if responded else "did not receive a response"}')
-
-                if responded:
-                    if self.verify and not is_server_for_gamespy_game(self.game, self.config.game_name, query_response):
-                        logging.warning(f'Server does not seem to be a {self.game} server, ignoring it '
-                                        f'({server.ip}:{server.query_port})')
-                        continue
-
-                    if self.add_links or self.add_game_port:
-                        if query_response.get('hostport', '').isnumeric():
-                            game_port = int(query_response['hostport'])
-                            if self.add_links:
-                                server.add_links(self.build_server_links(
-                                    server.uid,
-                                    server.ip,
-                                    game_port
-                                ))
-                            if self.add_game_port:
-                                server.game_port = game_port
-                        elif 'hostport' in query_response:
-                            logging.warning(f'Server returned an invalid hostport (\'{query_response["hostport"]}\', ' 
-                                            f'not adding links/game port ({server.ip}:{server.query_port})')
+        found_servers = []
+        for server in servers:
+            if server.uid in cached_game_ports:
+                self.add_server_game_port(server, cached_game_ports[server.uid])
+                found_servers.append(server)
+                continue
+
+            query_response = query_responses[server.uid]
+            responded = query_response is not None
+            logging.debug(f'Query of server {server.uid}/{server.ip}:{server.query_port} '
+                          f'{"was successful" if responded else "did not receive a response"}')
+
+            if responded:
+                if self.verify and not is_server_for_gamespy_game(self.game, self.config.game_name, query_response):
+                    logging.warning(f'Server does not seem to be a {self.game} server, ignoring it '
+                                    f'({server.ip}:{server.query_port})')
+                    continue
+
+                game_port = None
+                if query_response.get('hostport', '').isnumeric():
+                    game_port = int(query_response['hostport'])
+                elif 'hostport' in query_response and (self.add_links or self.add_game_port):
+                    logging.warning(f'Server returned an invalid hostport (\'{query_response["hostport"]}\', '
+                                    f'not adding links/game port ({server.ip}:{server.query_port})')
+                self.game_port_cache.record(server.uid, True, game_port)
+                self.add_server_game_port(server, game_port)
+            else:
+                self.game_port_cache.record(server.uid, False)
 
             found_servers.append(server)
 
+        self.game_port_cache.save()
         self.add_update_servers(found_servers)
 
+    def add_server_game_port(self, server: ClassicServer, game_port: Optional[int]) -> None:
+        if game_port is None:
+            return
+
+        if self.add_links:
+            server.add_links(self.build_server_links(
+                server.uid,
+                server.ip,
+                game_port
+            ))
+        if self.add_game_port:
+            server.game_port = game_port
+
     def get_servers(self) -> List[ClassicServer]:
         return self.provider.list(
             self.principal,
@@ -114,18 +167,32 @@ class GamespyServerLister(ServerLister):
             timeout=self.gslist_timeout
         )
 
+    def resolve_expired_servers(self, servers: List[ClassicServer]) -> Dict[str, bool]:
+        # Query all expired servers at once rather than one by one
+        query_responses = self.query_engine.query_all([(server.ip, server.query_port) for server in servers])
+        return {
+            server.uid: self.is_found(server, query_response)
+            for server, query_response in zip(servers, query_responses)
+        }
+
     def check_if_server_still_exists(self, server: ClassicServer, checks_since_last_ok: int) -> Tuple[bool, bool, int]:
         # Since we query the server directly, there is no way of handling HTTP server errors differently then
         # actually failed checks, so even if the query fails, we have to treat it as "check ok"
         check_ok = True
         responded, query_response = self.query_server(server)
+        found = self.is_found(server, query_response if responded else None)
+
+        return check_ok, found, checks_since_last_ok
+
+    def is_found(self, server: ClassicServer, query_response: Optional[dict]) -> bool:
+        if query_response is None:
+            return False
         # Treat as server for game if verify is turned off
         server_for_game = not self.verify or is_server_for_gamespy_game(self.game, self.config.game_name, query_response)
-        found = responded and server_for_game
-        if responded and not server_for_game:
+        if not server_for_game:
             logging.warning(f'Server {server.uid} does not seem to be a {self.game} server, treating as not found')
 
-        return check_ok, found, checks_since_last_ok
+        return server_for_game
 
     def build_server_links(
             self,
@@ -147,23 +214,8 @@ class GamespyServerLister(ServerLister):
         return links
 
     def query_server(self, server: ClassicServer) -> Tuple[bool, dict]:
-        try:
-            command = [self.gslist_bin_path, '-d', str(self.config.query_type), server.ip, str(server.query_port), '-0']
-            # Timeout should never fire since gslist uses about a three-second timeout for the query
-            gslist_result = subprocess.run(command, capture_output=True, timeout=self.gslist_timeout)
-
-            # gslist will simply return an empty byte string (b'') if the server could not be queried
-            if gslist_result.stdout != b'' and b'error' not in gslist_result.stderr.lower():
-                parsed = {}
-                for line in gslist_result.stdout.decode('latin1').strip('\n').split('\n'):
-                    elements = line.lstrip().split(' ', 1)
-                    if len(elements) != 2:
-                        continue
-                    key, value = elements
-                    parsed[key.lower()] = value
-                return True, parsed
-        except subprocess.TimeoutExpired as e:
-            logging.debug(e)
-            logging.error(f'Failed to query server {server.uid} for expiration check')
-
-        return False, {}
+        query_response = self.query_engine.query((server.ip, server.query_port))
+        if query_response is None:
+            return False, {}
+
+        return True, query_response
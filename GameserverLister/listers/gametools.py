@@ -1,11 +1,11 @@
 import logging
 from datetime import datetime
-from typing import List, Tuple, Optional, Union
+from typing import List, Tuple, Optional, Union, Dict, Set
 
 import requests
 
 from GameserverLister.common.servers import GametoolsServer
-from GameserverLister.common.types import GametoolsGame, GametoolsPlatform
+from GameserverLister.common.types import GametoolsGame, GametoolsPlatform, StoreBackend
 from GameserverLister.common.weblinks import WebLink, WEB_LINK_TEMPLATES
 from GameserverLister.games.gametools import GAMETOOLS_BASE_URI
 from .common import HttpServerLister
@@ -15,6 +15,8 @@ class GametoolsServerLister(HttpServerLister):
     game: GametoolsGame
     platform: GametoolsPlatform
     include_official: bool
+    # Uids of official servers seen (and ignored) while retrieving the server list
+    official_uids: Set[str]
 
     def __init__(
             self,
@@ -26,9 +28,17 @@ class GametoolsServerLister(HttpServerLister):
             recover: bool,
             add_links: bool,
             txt: bool,
+            compact: bool,
+            snapshot: bool,
+            delta: bool,
+            store: StoreBackend,
             list_dir: str,
             sleep: float,
             max_attempts: int,
+            concurrency: int,
+            rate_limit: float,
+            coverage_target: float,
+            http2: bool,
             include_official: bool
     ):
         super().__init__(
@@ -42,42 +52,51 @@ class GametoolsServerLister(HttpServerLister):
             recover,
             add_links,
             txt,
+            compact,
+            snapshot,
+            delta,
+            store,
             list_dir,
             sleep,
-            max_attempts
+            max_attempts,
+            concurrency,
+            rate_limit,
+            coverage_target,
+            http2
         )
         # Allow non-ascii characters in server list (mostly used by server names for Asia servers)
         self.ensure_ascii = False
         self.include_official = include_official
+        self.official_uids = set()
 
     def get_server_list_url(self, per_page: int) -> str:
         return f'{GAMETOOLS_BASE_URI}/{self.game}/servers/?platform={self.platform}&region=all&name=&limit={per_page}' \
                f'&nocache={datetime.now().timestamp()}'
 
-    def add_page_found_servers(self, found_servers: List[GametoolsServer], page_response_data: dict) -> List[GametoolsServer]:
+    def get_page_servers(self, page_response_data: dict) -> List[GametoolsServer]:
+        page_servers = []
         for server in page_response_data['servers']:
             found_server = GametoolsServer(
                 server['gameId'],
                 server['prefix'],
             )
 
+            # Ignore official servers unless include_official is set
+            if server['official'] and not self.include_official:
+                logging.debug(f'Got official server {found_server.uid}, ignoring it')
+                self.official_uids.add(found_server.uid)
+                continue
+
             if self.add_links:
                 found_server.add_links(self.build_server_links(found_server.uid))
 
-            # Add/update servers (ignoring official servers unless include_official is set)
-            server_game_ids = [s.uid for s in found_servers]
-            if found_server.uid not in server_game_ids and \
-                    (not server['official'] or self.include_official):
-                logging.debug(f'Got new server {found_server.uid}, adding it')
-                found_servers.append(found_server)
-            elif not server['official'] or self.include_official:
-                logging.debug(f'Got duplicate server {found_server.uid}, updating last seen at')
-                index = server_game_ids.index(found_server.uid)
-                found_servers[index].last_seen_at = datetime.now().astimezone()
-            else:
-                logging.debug(f'Got official server {found_server.uid}, ignoring it')
+            page_servers.append(found_server)
+
+        return page_servers
 
-        return found_servers
+    def resolve_expired_servers(self, servers: List[GametoolsServer]) -> Dict[str, bool]:
+        # Servers listed as official are ignored, so they count as not found (just like when checked individually)
+        return {server.uid: False for server in servers if server.uid in self.official_uids}
 
     def check_if_server_still_exists(self, server: GametoolsServer, checks_since_last_ok: int) -> Tuple[bool, bool, int]:
         check_ok = True
@@ -2,11 +2,14 @@ import logging
 import socket
 from typing import List, Tuple, Optional, Union
 
+import gevent
 import pyq3serverlist
+from gevent.threadpool import ThreadPool
 
 from GameserverLister.common.helpers import is_valid_public_ip, is_valid_port, guid_from_ip_port
 from GameserverLister.common.servers import ClassicServer, ViaStatus
-from GameserverLister.common.types import Quake3Game, Quake3Platform
+from GameserverLister.common.store import ServerStore
+from GameserverLister.common.types import Quake3Game, Quake3Platform, StoreBackend
 from GameserverLister.common.weblinks import WebLink, WEB_LINK_TEMPLATES
 from GameserverLister.games.quake3 import QUAKE3_CONFIGS
 from .common import ServerLister
@@ -15,7 +18,7 @@ from .common import ServerLister
 class Quake3ServerLister(ServerLister):
     game: Quake3Game
     platform: Quake3Platform
-    principal: str
+    principals: List[str]
     protocols: List[int]
     network_protocol: int
     game_name: str
@@ -25,12 +28,16 @@ class Quake3ServerLister(ServerLister):
     def __init__(
             self,
             game: Quake3Game,
-            principal: str,
+            principals: List[str],
             expire: bool,
             expired_ttl: float,
             recover: bool,
             add_links: bool,
             txt: bool,
+            compact: bool,
+            snapshot: bool,
+            delta: bool,
+            store: StoreBackend,
             list_dir: str
     ):
         super().__init__(
@@ -42,6 +49,10 @@ class Quake3ServerLister(ServerLister):
             recover,
             add_links,
             txt,
+            compact,
+            snapshot,
+            delta,
+            store,
             list_dir
         )
         # Merge default config with given principal config
@@ -53,54 +64,69 @@ class Quake3ServerLister(ServerLister):
         }
         principal_config = {key: value for (key, value) in QUAKE3_CONFIGS[self.game].items()
                             if key in default_config.keys()}
-        self.principal = principal
+        self.principals = principals
         # TODO Move network protocol to server
         self.keywords, self.game_name, self.network_protocol, self.server_entry_prefix = {**default_config, **principal_config}.values()
         self.protocols = QUAKE3_CONFIGS[self.game]['protocols']
 
     def update_server_list(self):
-        # Use same connection to principal for all queries
-        config = QUAKE3_CONFIGS[self.game]['servers'][self.principal]
+        # Query all principals for all protocols at once, using a separate connection for each principal and protocol
+        pool = ThreadPool(len(self.principals) * len(self.protocols))
+        pending = {
+            pool.spawn(self.get_servers, self.build_principal_server(principal), protocol): principal
+            for principal in self.principals for protocol in self.protocols
+        }
+
+        # Merge servers as responses arrive (servers may be listed by multiple principals and/or for multiple protocols)
+        found_servers: ServerStore[ClassicServer] = ServerStore()
+        while len(pending) > 0:
+            for job in gevent.wait(list(pending), count=1):
+                principal = pending.pop(job)
+                for raw_server in job.get():
+                    if not is_valid_public_ip(raw_server.ip) or not is_valid_port(raw_server.port):
+                        logging.warning(
+                            f'Principal {principal} returned invalid server entry '
+                            f'({raw_server.ip}:{raw_server.port}), skipping it'
+                        )
+                        continue
+
+                    uid = guid_from_ip_port(raw_server.ip, str(raw_server.port))
+                    found_server = found_servers.get(uid)
+                    if found_server is None:
+                        found_server = ClassicServer(
+                            uid,
+                            raw_server.ip,
+                            raw_server.port,
+                            [],
+                            raw_server.port
+                        )
+                        found_servers.add(found_server)
+                    elif principal in [via.principal for via in found_server.via]:
+                        continue
+
+                    found_server.via.append(ViaStatus(principal))
+
+                    if self.add_links:
+                        found_server.add_links(self.build_server_links(
+                            found_server.uid,
+                            found_server.ip,
+                            found_server.query_port,
+                            principal
+                        ))
+        pool.kill()
+
+        self.add_update_servers(list(found_servers))
+
+    def build_principal_server(self, principal: str) -> pyq3serverlist.PrincipalServer:
+        config = QUAKE3_CONFIGS[self.game]['servers'][principal]
         reader = config.get('reader', pyq3serverlist.EOFReader)
-        principal = pyq3serverlist.PrincipalServer(
+        return pyq3serverlist.PrincipalServer(
             config['hostname'],
             config['port'],
             reader=reader(),
             network_protocol=self.network_protocol
         )
 
-        # Fetch servers for all protocols
-        found_servers = []
-        for protocol in self.protocols:
-            raw_servers = self.get_servers(principal, protocol)
-            for raw_server in raw_servers:
-                if not is_valid_public_ip(raw_server.ip) or not is_valid_port(raw_server.port):
-                    logging.warning(
-                        f'Principal returned invalid server entry '
-                        f'({raw_server.ip}:{raw_server.port}), skipping it'
-                    )
-                    continue
-
-                via = ViaStatus(self.principal)
-                found_server = ClassicServer(
-                    guid_from_ip_port(raw_server.ip, str(raw_server.port)),
-                    raw_server.ip,
-                    raw_server.port,
-                    via,
-                    raw_server.port
-                )
-
-                if self.add_links:
-                    found_server.add_links(self.build_server_links(
-                        found_server.uid,
-                        found_server.ip,
-                        found_server.query_port
-                    ))
-
-                found_servers.append(found_server)
-
-        self.add_update_servers(found_servers)
-
     def get_servers(self, principal: pyq3serverlist.PrincipalServer, protocol: int) -> List[pyq3serverlist.Server]:
         query_ok = False
         attempt = 0
@@ -143,12 +169,13 @@ class Quake3ServerLister(ServerLister):
             self,
             uid: str,
             ip: Optional[str] = None,
-            port: Optional[int] = None
+            port: Optional[int] = None,
+            principal: Optional[str] = None
     ) -> Union[List[WebLink], WebLink]:
         template_refs = QUAKE3_CONFIGS[self.game].get('linkTemplateRefs', {})
         # Add principal-scoped links first, then add game-scoped links
         templates = [
-            *[WEB_LINK_TEMPLATES.get(ref) for ref in template_refs.get(self.principal, [])],
+            *[WEB_LINK_TEMPLATES.get(ref) for ref in template_refs.get(principal, [])],
             *[WEB_LINK_TEMPLATES.get(ref) for ref in template_refs.get('_any', [])]
         ]
 
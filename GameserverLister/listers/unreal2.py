@@ -5,7 +5,7 @@ import pyut2serverlist
 
 from GameserverLister.common.helpers import is_valid_public_ip, is_valid_port, guid_from_ip_port
 from GameserverLister.common.servers import ClassicServer, ViaStatus
-from GameserverLister.common.types import Unreal2Game, Unreal2Platform
+from GameserverLister.common.types import Unreal2Game, Unreal2Platform, StoreBackend
 from GameserverLister.common.weblinks import WebLink, WEB_LINK_TEMPLATES
 from GameserverLister.games.unreal2 import UNREAL2_CONFIGS
 from .common import ServerLister
@@ -30,6 +30,10 @@ class Unreal2ServerLister(ServerLister):
             recover: bool,
             add_links: bool,
             txt: bool,
+            compact: bool,
+            snapshot: bool,
+            delta: bool,
+            store: StoreBackend,
             list_dir: str
     ):
         super().__init__(
@@ -41,6 +45,10 @@ class Unreal2ServerLister(ServerLister):
             recover,
             add_links,
             txt,
+            compact,
+            snapshot,
+            delta,
+            store,
             list_dir
         )
         self.principal = principal
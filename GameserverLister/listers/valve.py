@@ -1,27 +1,40 @@
 import logging
-from typing import List, Tuple, Optional
+import os
+from typing import List, Tuple, Optional, Dict
 
+import gevent
 import pyvpsq
+from gevent.threadpool import ThreadPool
+from pyvpsq.constants import ZERO_IP
 
+from GameserverLister.common.concurrency import TokenBucket
+from GameserverLister.common.game_port_cache import GamePortCache
 from GameserverLister.common.helpers import is_valid_public_ip, is_valid_port, guid_from_ip_port
 from GameserverLister.common.servers import ClassicServer, ViaStatus
-from GameserverLister.common.types import ValveGame, ValvePrincipal, ValveGameConfig, ValvePlatform
+from GameserverLister.common.store import ServerStore
+from GameserverLister.common.types import ValveGame, ValvePrincipal, ValveGameConfig, ValvePlatform, \
+    StoreBackend
 from GameserverLister.games.valve import VALVE_PRINCIPAL_CONFIGS, VALVE_GAME_CONFIGS
 from GameserverLister.listers.common import ServerLister
+from GameserverLister.protocols.valve_query import ValveQueryEngine
 
 
 class ValveServerLister(ServerLister):
     game: ValveGame
     platform: ValvePlatform
-    servers: List[ClassicServer]
+    servers: ServerStore[ClassicServer]
     principal: ValvePrincipal
     config: ValveGameConfig
 
     principal_timeout: float
     filters: str
     max_pages: int
+    concurrency: int
+    rate_limiter: Optional[TokenBucket]
 
     add_game_port: bool
+    query_engine: ValveQueryEngine
+    game_port_cache: GamePortCache
 
     def __init__(
             self,
@@ -30,12 +43,21 @@ class ValveServerLister(ServerLister):
             principal_timeout: float,
             filters: str,
             max_pages: int,
+            concurrency: int,
+            rate_limit: float,
             add_game_port: bool,
+            query_concurrency: int,
+            query_timeout: float,
+            game_port_ttl: float,
             expire: bool,
             expired_ttl: float,
             recover: bool,
             add_links: bool,
             txt: bool,
+            compact: bool,
+            snapshot: bool,
+            delta: bool,
+            store: StoreBackend,
             list_dir: str
     ):
         super().__init__(
@@ -47,6 +69,10 @@ class ValveServerLister(ServerLister):
             recover,
             add_links,
             txt,
+            compact,
+            snapshot,
+            delta,
+            store,
             list_dir
         )
         self.principal = principal
@@ -54,88 +80,137 @@ class ValveServerLister(ServerLister):
         self.principal_timeout = principal_timeout
         self.filters = filters
         self.max_pages = max_pages
+        self.concurrency = concurrency
+        # Valve's principals throttle clients sending too many requests, so limit requests across all regions
+        self.rate_limiter = TokenBucket(rate_limit) if rate_limit > 0 else None
         self.add_game_port = add_game_port
+        self.query_engine = ValveQueryEngine(query_concurrency, query_timeout)
+        self.game_port_cache = GamePortCache(
+            os.path.join(self.server_list_dir_path, f'{self.game}-game-ports-{self.platform}.json'),
+            game_port_ttl
+        )
 
     def update_server_list(self):
+        # Crawl regions concurrently (using a separate connection for each region)
+        pool = ThreadPool(min(self.concurrency, len(pyvpsq.Region)))
+        pending = [pool.spawn(self.get_servers, region) for region in pyvpsq.Region]
+
+        # Merge servers as regions finish (servers may be listed in multiple regions)
+        found_servers: ServerStore[ClassicServer] = ServerStore()
+        while len(pending) > 0:
+            for job in gevent.wait(pending, count=1):
+                pending.remove(job)
+                for raw_server in job.get():
+                    if not is_valid_public_ip(raw_server.ip) or not is_valid_port(raw_server.query_port):
+                        logging.warning(
+                            f'Principal returned invalid server entry '
+                            f'({raw_server.ip}:{raw_server.query_port}), skipping it'
+                        )
+                        continue
+
+                    uid = guid_from_ip_port(raw_server.ip, str(raw_server.query_port))
+                    if found_servers.get(uid) is not None:
+                        continue
+
+                    via = ViaStatus(self.principal)
+                    found_server = ClassicServer(
+                        uid,
+                        raw_server.ip,
+                        raw_server.query_port,
+                        via
+                    )
+                    found_servers.add(found_server)
+        pool.kill()
+
+        if self.add_links or self.add_game_port:
+            self.add_game_ports(list(found_servers))
+
+        self.add_update_servers(list(found_servers))
+
+    def add_game_ports(self, servers: List[ClassicServer]) -> None:
+        game_ports = self.get_game_ports(servers)
+        for server in servers:
+            game_port = game_ports.get(server.uid)
+            if game_port is None:
+                continue
+
+            if self.add_links:
+                server.add_links(self.build_server_links(
+                    server.uid,
+                    server.ip,
+                    game_port
+                ))
+            if self.add_game_port:
+                server.game_port = game_port
+
+    def get_game_ports(self, servers: List[ClassicServer]) -> Dict[str, int]:
+        """
+        Get the game port of each server, querying servers without a fresh cached game port at once
+        :param servers: Servers to get the game port of
+        :return: Game ports by server uid (servers without a known game port are not included)
+        """
+        if not self.config.distinct_query_port:
+            return {server.uid: server.query_port for server in servers}
+
+        cached_game_ports = self.game_port_cache.get_fresh([server.uid for server in servers])
+        game_ports = {uid: game_port for (uid, game_port) in cached_game_ports.items() if game_port is not None}
+        to_query = [server for server in servers if server.uid not in cached_game_ports]
+
+        logging.info(f'Querying {len(to_query)} servers for their game port '
+                     f'(concurrency: {self.query_engine.concurrency}, cached: {len(cached_game_ports)})')
+        infos = self.query_engine.query_all([(server.ip, server.query_port) for server in to_query])
+        for server, info in zip(to_query, infos):
+            if info is None:
+                logging.debug(f'Failed to query server {server.uid} for its game port')
+                self.game_port_cache.record(server.uid, False)
+                continue
+
+            self.game_port_cache.record(server.uid, True, info.game_port)
+            if info.game_port is not None:
+                game_ports[server.uid] = info.game_port
+
+        self.game_port_cache.save()
+        return game_ports
+
+    def build_principal_server(self) -> pyvpsq.PrincipalServer:
         principal_config = VALVE_PRINCIPAL_CONFIGS[self.principal]
-        principal = pyvpsq.PrincipalServer(
+        return pyvpsq.PrincipalServer(
             principal_config.hostname,
             principal_config.port,
             timeout=self.principal_timeout
         )
 
-        found_servers = []
-        # Try to reduce the consecutive number of requests by iterating over regions
-        for region in pyvpsq.Region:
-            for raw_server in self.get_servers(principal, self.config.app_id, region, self.filters, self.max_pages):
-                if not is_valid_public_ip(raw_server.ip) or not is_valid_port(raw_server.query_port):
-                    logging.warning(
-                        f'Principal returned invalid server entry '
-                        f'({raw_server.ip}:{raw_server.query_port}), skipping it'
-                    )
-                    continue
-
-                via = ViaStatus(self.principal)
-                found_server = ClassicServer(
-                    guid_from_ip_port(raw_server.ip, str(raw_server.query_port)),
-                    raw_server.ip,
-                    raw_server.query_port,
-                    via
-                )
-
-                if found_server not in found_servers:
-                    if self.add_links or self.add_game_port:
-                        game_port = self.get_server_game_port(found_server)
-                        if game_port is not None:
-                            if self.add_links:
-                                found_server.add_links(self.build_server_links(
-                                    found_server.uid,
-                                    found_server.ip,
-                                    game_port
-                                ))
-                            if self.add_game_port:
-                                found_server.game_port = game_port
-                    found_servers.append(found_server)
-
-        self.add_update_servers(found_servers)
-
-    @staticmethod
-    def get_servers(
-            principal: pyvpsq.PrincipalServer,
-            app_id: int,
-            region: pyvpsq.Region,
-            filters: str,
-            max_pages: int
-    ) -> List[pyvpsq.Server]:
+    def get_servers(self, region: pyvpsq.Region) -> List[pyvpsq.Server]:
+        filters = fr'\appid\{self.config.app_id}{self.filters}'
         servers = []
-        try:
-            for server in principal.get_servers(fr'\appid\{app_id}{filters}', region, max_pages):
-                servers.append(server)
-        except pyvpsq.TimeoutError:
-            logging.error('Principal server query timed out')
-        except pyvpsq.Error:
-            logging.error('Failed to query principal server')
+        with self.build_principal_server() as principal:
+            # Page through the region "manually" in order to apply the rate limit to every request
+            after, has_next, page = f'{ZERO_IP}:0', True, 0
+            try:
+                while has_next and page < self.max_pages:
+                    if self.rate_limiter is not None:
+                        self.rate_limiter.acquire()
+                    page_servers, has_next = principal.get_server_page(region, after, filters)
+                    servers.extend(page_servers)
+                    if len(page_servers) == 0:
+                        break
+
+                    page += 1
+                    after = f'{page_servers[-1].ip}:{page_servers[-1].query_port}'
+            except pyvpsq.TimeoutError:
+                logging.error(f'Principal server query timed out for region {region.name}')
+            except pyvpsq.Error:
+                logging.error(f'Failed to query principal server for region {region.name}')
 
         return servers
 
-    def get_server_game_port(self, server: ClassicServer) -> Optional[int]:
-        if not self.config.distinct_query_port:
-            return server.query_port
-
-        responded, info = self.query_server(server)
-        if responded and info.game_port is not None:
-            return info.game_port
+    def resolve_expired_servers(self, servers: List[ClassicServer]) -> Dict[str, bool]:
+        # Query all expired servers at once rather than one by one
+        infos = self.query_engine.query_all([(server.ip, server.query_port) for server in servers])
+        return {server.uid: info is not None for server, info in zip(servers, infos)}
 
     def check_if_server_still_exists(self, server: ClassicServer, checks_since_last_ok: int) -> Tuple[bool, bool, int]:
-        found, _ = self.query_server(server)
-        return True, found, checks_since_last_ok
-
-    @staticmethod
-    def query_server(server: ClassicServer) -> Tuple[bool, Optional[pyvpsq.ServerInfo]]:
-        try:
-            info = pyvpsq.Server(server.ip, server.query_port).get_info()
-            return True, info
-        except pyvpsq.Error as e:
-            logging.debug(e)
+        info = self.query_engine.query((server.ip, server.query_port))
+        if info is None:
             logging.debug(f'Failed to query server {server.uid}')
-            return False, None
+        return True, info is not None, checks_since_last_ok
@@ -0,0 +1,255 @@
+import errno
+import selectors
+import socket
+import struct
+import time
+from typing import Dict, List, Optional, Tuple
+
+from GameserverLister.protocols.gamespy import Address
+
+HEADER_SIZE = 12
+IS_RESPONSE = 0x40000000
+SEQUENCE_MASK = 0x3FFFFFFF
+RECV_SIZE = 16384
+
+# Game ports assumed by gamedig if a server does not report its address (by default query port)
+DEFAULT_GAME_PORTS = {
+    48888: 7673,
+    22000: 25200
+}
+
+
+def build_packet(words: List[str], sequence: int = 0) -> bytes:
+    """
+    Build a (client request) Frostbite RCON packet
+    :param words: Words to send
+    :param sequence: Sequence number of the request
+    :return: Packet data
+    """
+    body = b''
+    for word in words:
+        encoded = word.encode('latin1')
+        body += struct.pack('<I', len(encoded)) + encoded + b'\x00'
+    return struct.pack('<III', sequence & SEQUENCE_MASK, HEADER_SIZE + len(body), len(words)) + body
+
+
+def parse_packet(data: bytes) -> Optional[Tuple[int, List[str]]]:
+    """
+    Parse a Frostbite RCON packet
+    :param data: Received data
+    :return: Packet header and words, None if the packet is incomplete
+    """
+    if len(data) < HEADER_SIZE:
+        return None
+    header, size, num_words = struct.unpack('<III', data[:HEADER_SIZE])
+    if len(data) < size:
+        return None
+
+    words = []
+    offset = HEADER_SIZE
+    for _ in range(num_words):
+        length, = struct.unpack('<I', data[offset:offset + 4])
+        if offset + 4 + length >= size:
+            raise ValueError('Word exceeds packet size')
+        words.append(data[offset + 4:offset + 4 + length].decode('latin1'))
+        offset += 4 + length + 1
+    return header, words
+
+
+def pop_word(words: List[str]) -> Optional[str]:
+    """
+    Remove and return the first word (None if there are no words left, as with JavaScript's Array.shift)
+    """
+    return words.pop(0) if len(words) > 0 else None
+
+
+def parse_int(word: Optional[str]) -> Optional[int]:
+    try:
+        return int(word)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_float(word: Optional[str]) -> Optional[float]:
+    try:
+        return float(word)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_server_info(words: List[str], host: str, port: int) -> dict:
+    """
+    Parse the words of a serverInfo response (without the status word) the same way gamedig does, treating missing or
+    invalid fields as absent rather than rejecting the response
+    :param words: Response words
+    :param host: Host the server was queried at
+    :param port: Port the server was queried at
+    :return: Parsed server info (including "name" and "connect" keys as returned by gamedig)
+    """
+    data = list(words)
+    parsed = {
+        'name': pop_word(data),
+        'numplayers': parse_int(pop_word(data)),
+        'maxplayers': parse_int(pop_word(data)),
+        'raw': {}
+    }
+    parsed['raw']['gametype'] = pop_word(data)
+    parsed['map'] = pop_word(data)
+    parsed['raw']['roundsplayed'] = parse_int(pop_word(data))
+    parsed['raw']['roundstotal'] = parse_int(pop_word(data))
+    team_count = parse_int(pop_word(data)) or 0
+    parsed['raw']['teams'] = [{'tickets': parse_float(pop_word(data))} for _ in range(team_count)]
+    parsed['raw']['targetscore'] = parse_int(pop_word(data))
+    parsed['raw']['status'] = pop_word(data)
+
+    # Fields end at different positions depending on the server version
+    if len(data) > 0:
+        parsed['raw']['ranked'] = data.pop(0) == 'true'
+    if len(data) > 0:
+        parsed['raw']['punkbuster'] = data.pop(0) == 'true'
+    if len(data) > 0:
+        parsed['password'] = data.pop(0) == 'true'
+    for key in ['uptime', 'roundtime']:
+        if len(data) > 0:
+            parsed['raw'][key] = parse_int(data.pop(0))
+
+    # Bad Company 2 servers report game mod and map pack before the address
+    if len(data) > 0 and data[0] == 'BC2':
+        data = data[2:]
+
+    game_host, game_port = host, DEFAULT_GAME_PORTS.get(port, port)
+    if len(data) > 0:
+        parsed['raw']['ip'] = data.pop(0)
+        reported_host, _, reported_port = parsed['raw']['ip'].partition(':')
+        # Fall back to query address for any part missing from the reported address
+        game_host, game_port = reported_host or host, reported_port or port
+    parsed['connect'] = f'{game_host}:{game_port}'
+
+    return parsed
+
+
+class Probe:
+    """
+    State of a serverInfo query against a single server
+    """
+    address: Address
+    sock: socket.socket
+    deadline: float
+    connected: bool
+    buffer: bytes
+
+    def __init__(self, address: Address, sock: socket.socket, deadline: float):
+        self.address = address
+        self.sock = sock
+        self.deadline = deadline
+        self.connected = False
+        self.buffer = b''
+
+
+class FrostbiteQueryEngine:
+    """
+    Queries Frostbite (Battlefield: Bad Company 2, Battlefield 3/4/Hardline) servers via the RCON serverInfo command,
+    connecting to up to [concurrency] servers at once (using non-blocking sockets)
+    """
+    concurrency: int
+    timeout: float
+
+    def __init__(self, concurrency: int = 64, timeout: float = 2.0):
+        """
+        :param concurrency: Max number of queries to have in flight at once
+        :param timeout: Number of seconds to wait for a server to accept the connection and respond
+        """
+        self.concurrency = concurrency
+        self.timeout = timeout
+
+    def query_all(self, addresses: List[Address]) -> List[Optional[dict]]:
+        """
+        Query all given addresses
+        :param addresses: (Potential) query addresses of servers
+        :return: Parsed server info for each address (same order as the given addresses), None if no (valid) response
+                 was received
+        """
+        results: Dict[Address, Optional[dict]] = {}
+        queue = list(dict.fromkeys(addresses))
+        queue.reverse()
+        in_flight: Dict[Address, Probe] = {}
+        with selectors.DefaultSelector() as selector:
+            while len(queue) > 0 or len(in_flight) > 0:
+                while len(queue) > 0 and len(in_flight) < self.concurrency:
+                    address = queue.pop()
+                    probe = self.connect(address)
+                    if probe is None:
+                        results[address] = None
+                        continue
+                    in_flight[address] = probe
+                    selector.register(probe.sock, selectors.EVENT_WRITE, probe)
+
+                next_deadline = min((probe.deadline for probe in in_flight.values()), default=time.monotonic())
+                for key, _ in selector.select(max(next_deadline - time.monotonic(), 0)):
+                    probe = key.data
+                    done, result = self.handle_event(probe, selector)
+                    if done:
+                        self.finish(probe, selector, in_flight)
+                        results[probe.address] = result
+
+                now = time.monotonic()
+                for probe in list(in_flight.values()):
+                    if probe.deadline <= now:
+                        self.finish(probe, selector, in_flight)
+                        results[probe.address] = None
+
+        return [results.get(address) for address in addresses]
+
+    def connect(self, address: Address) -> Optional[Probe]:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setblocking(False)
+        error = sock.connect_ex(address)
+        if error not in (0, errno.EINPROGRESS, errno.EWOULDBLOCK):
+            sock.close()
+            return None
+        return Probe(address, sock, time.monotonic() + self.timeout)
+
+    @staticmethod
+    def handle_event(probe: Probe, selector: selectors.BaseSelector) -> Tuple[bool, Optional[dict]]:
+        """
+        Handle a socket event (connection established or data received)
+        :return: Whether the query is done and its result
+        """
+        if not probe.connected:
+            if probe.sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) != 0:
+                return True, None
+            try:
+                probe.sock.sendall(build_packet(['serverInfo']))
+            except OSError:
+                return True, None
+            probe.connected = True
+            selector.modify(probe.sock, selectors.EVENT_READ, probe)
+            return False, None
+
+        try:
+            data = probe.sock.recv(RECV_SIZE)
+        except (BlockingIOError, InterruptedError):
+            return False, None
+        except OSError:
+            return True, None
+        if len(data) == 0:
+            # Connection was closed before receiving a (complete) response
+            return True, None
+
+        probe.buffer += data
+        try:
+            packet = parse_packet(probe.buffer)
+            if packet is None:
+                return False, None
+            header, words = packet
+            if not header & IS_RESPONSE or len(words) == 0 or words[0] != 'OK':
+                return True, None
+            return True, parse_server_info(words[1:], *probe.address)
+        except (ValueError, IndexError, struct.error):
+            return True, None
+
+    @staticmethod
+    def finish(probe: Probe, selector: selectors.BaseSelector, in_flight: Dict[Address, Probe]) -> None:
+        selector.unregister(probe.sock)
+        probe.sock.close()
+        del in_flight[probe.address]
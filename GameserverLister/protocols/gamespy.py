@@ -0,0 +1,477 @@
+import base64
+import random
+import socket
+import string
+import struct
+from typing import Iterator, List, Optional, Tuple
+
+# Legacy (port 28900) list protocol
+LEGACY_FINAL = b'\\final\\'
+LEGACY_SERVER_LENGTH = 6
+
+# Server browsing (port 28910) list protocol ("enctypeX")
+LIST_REQUEST = 0
+LIST_PROTOCOL_VERSION = 1
+LIST_ENCODING_VERSION = 3
+LIST_CHALLENGE_LENGTH = 8
+LIST_END_MARKER = b'\x00\xff\xff\xff\xff'
+LIST_ERROR_PORT = 0xFFFF
+# Default list request options (send fields for all servers)
+LIST_DEFAULT_OPTIONS = 1
+
+# Server entry flags
+PRIVATE_IP_FLAG = 2
+ICMP_IP_FLAG = 8
+NONSTANDARD_PORT_FLAG = 16
+NONSTANDARD_PRIVATE_PORT_FLAG = 32
+HAS_KEYS_FLAG = 64
+HAS_FULL_RULES_FLAG = 128
+
+# Field value types
+KEY_TYPE_STRING = 0
+KEY_TYPE_BYTE = 1
+KEY_TYPE_SHORT = 2
+POPULAR_VALUE_INLINE = 0xFF
+
+RECV_SIZE = 8192
+
+Address = Tuple[str, int]
+
+
+class GamespyMasterError(Exception):
+    pass
+
+
+class IncompleteError(Exception):
+    """
+    Raised when parsing requires more data than has been received so far
+    """
+    pass
+
+
+def build_validate(challenge: bytes, game_key: bytes, enc_type: int) -> bytes:
+    """
+    Compute the response to a legacy master server's challenge (gsseckey/gsmsalg)
+    :param challenge: Challenge sent by the master server (\\secure\\ value)
+    :param game_key: Secret key of the game
+    :param enc_type: Encryption type requested for the server list (0 or 2)
+    :return: Validate value to send to the master server
+    """
+    if enc_type not in (0, 2):
+        raise GamespyMasterError(f'Unsupported enctype: {enc_type}')
+
+    cards = list(range(256))
+    a = 0
+    for i in range(256):
+        a = (a + cards[i] + game_key[i % len(game_key)]) & 0xFF
+        cards[a], cards[i] = cards[i], cards[a]
+
+    a = 0
+    b = 0
+    encrypted = bytearray()
+    for c in challenge:
+        a = (a + c + 1) & 0xFF
+        x = cards[a]
+        b = (b + x) & 0xFF
+        y = cards[b]
+        cards[b] = x
+        cards[a] = y
+        encrypted.append(c ^ cards[(x + y) & 0xFF])
+
+    # Pad to full base64 blocks
+    while len(encrypted) % 3 != 0:
+        encrypted.append(0)
+
+    if enc_type == 2:
+        for i in range(len(encrypted)):
+            encrypted[i] ^= game_key[i % len(game_key)]
+
+    return base64.b64encode(bytes(encrypted))
+
+
+class ListCipher:
+    """
+    Stream cipher used to encrypt server browsing list responses (GOA crypt, keyed with the client's challenge
+    combined with the game's secret key and a key sent by the master server)
+    """
+    cards: List[int]
+    rotor: int
+    ratchet: int
+    avalanche: int
+    last_plain: int
+    last_cipher: int
+
+    def __init__(self, game_key: bytes, challenge: bytes, server_key: bytes):
+        key = bytearray(challenge)
+        for i in range(len(server_key)):
+            key[(i * game_key[i % len(game_key)]) % LIST_CHALLENGE_LENGTH] ^= \
+                (key[i % LIST_CHALLENGE_LENGTH] ^ server_key[i]) & 0xFF
+
+        self.cards = list(range(256))
+        position = [0]
+        rsum = [0]
+        for i in range(255, -1, -1):
+            swap = self.key_rand(i, key, rsum, position)
+            self.cards[i], self.cards[swap] = self.cards[swap], self.cards[i]
+
+        self.rotor = self.cards[1]
+        self.ratchet = self.cards[3]
+        self.avalanche = self.cards[5]
+        self.last_plain = self.cards[7]
+        self.last_cipher = self.cards[rsum[0]]
+
+    def key_rand(self, limit: int, key: bytes, rsum: List[int], position: List[int]) -> int:
+        if limit == 0:
+            return 0
+
+        mask = 1
+        while mask < limit:
+            mask = (mask << 1) + 1
+
+        retries = 0
+        while True:
+            rsum[0] = (self.cards[rsum[0]] + key[position[0]]) & 0xFF
+            position[0] += 1
+            if position[0] >= len(key):
+                position[0] = 0
+                rsum[0] = (rsum[0] + len(key)) & 0xFF
+            value = mask & rsum[0]
+            retries += 1
+            if retries > 11:
+                value %= limit
+            if value <= limit:
+                return value
+
+    def next_key_byte(self) -> int:
+        cards = self.cards
+        self.ratchet = (self.ratchet + cards[self.rotor]) & 0xFF
+        self.rotor = (self.rotor + 1) & 0xFF
+        swap = cards[self.last_cipher]
+        cards[self.last_cipher] = cards[self.ratchet]
+        cards[self.ratchet] = cards[self.last_plain]
+        cards[self.last_plain] = cards[self.rotor]
+        cards[self.rotor] = swap
+        self.avalanche = (self.avalanche + cards[swap]) & 0xFF
+        return cards[(cards[self.avalanche] + cards[self.rotor]) & 0xFF] ^ \
+            cards[cards[(cards[self.last_plain] + cards[self.last_cipher] + cards[self.ratchet]) & 0xFF]]
+
+    def decrypt(self, data: bytes) -> bytes:
+        decrypted = bytearray(len(data))
+        for i, b in enumerate(data):
+            self.last_plain = b ^ self.next_key_byte()
+            self.last_cipher = b
+            decrypted[i] = self.last_plain
+        return bytes(decrypted)
+
+    def encrypt(self, data: bytes) -> bytes:
+        encrypted = bytearray(len(data))
+        for i, b in enumerate(data):
+            self.last_cipher = b ^ self.next_key_byte()
+            self.last_plain = b
+            encrypted[i] = self.last_cipher
+        return bytes(encrypted)
+
+
+class Reader:
+    """
+    Reads values from a buffer, raising IncompleteError if the buffer ends before a value does
+    """
+    buffer: bytearray
+    position: int
+
+    def __init__(self, buffer: bytearray, position: int = 0):
+        self.buffer = buffer
+        self.position = position
+
+    def read(self, length: int) -> bytes:
+        if self.position + length > len(self.buffer):
+            raise IncompleteError
+        value = bytes(self.buffer[self.position:self.position + length])
+        self.position += length
+        return value
+
+    def read_byte(self) -> int:
+        return self.read(1)[0]
+
+    def read_ushort(self) -> int:
+        return struct.unpack('>H', self.read(2))[0]
+
+    def read_string(self) -> bytes:
+        end = self.buffer.find(b'\x00', self.position)
+        if end == -1:
+            raise IncompleteError
+        value = bytes(self.buffer[self.position:end])
+        self.position = end + 1
+        return value
+
+    def startswith(self, value: bytes) -> bool:
+        if self.position + len(value) > len(self.buffer):
+            raise IncompleteError
+        return self.buffer.startswith(value, self.position)
+
+
+class ListParser:
+    """
+    Incrementally parses a (decrypted) server browsing list response, yielding server addresses as soon as
+    their entry has been received
+    """
+    buffer: bytearray
+    position: int
+    default_port: Optional[int]
+    key_types: List[int]
+    popular_values: List[bytes]
+    done: bool
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.position = 0
+        self.default_port = None
+        self.key_types = []
+        self.popular_values = []
+        self.done = False
+
+    def feed(self, data: bytes) -> Iterator[Address]:
+        self.buffer.extend(data)
+        try:
+            if self.default_port is None:
+                self.parse_header()
+            while not self.done:
+                address = self.parse_server()
+                if address is not None:
+                    yield address
+        except IncompleteError:
+            pass
+
+        # Drop parsed data
+        del self.buffer[:self.position]
+        self.position = 0
+
+    def parse_header(self) -> None:
+        reader = Reader(self.buffer, self.position)
+        # Skip requesting client's public ip
+        reader.read(4)
+        default_port = reader.read_ushort()
+        if default_port == LIST_ERROR_PORT:
+            raise GamespyMasterError(f'Master server returned an error: '
+                                     f'{reader.read_string().decode("latin1", errors="replace")}')
+        key_types = []
+        for _ in range(reader.read_byte()):
+            key_types.append(reader.read_byte())
+            reader.read_string()
+        popular_values = [reader.read_string() for _ in range(reader.read_byte())]
+
+        self.position = reader.position
+        self.default_port = default_port
+        self.key_types = key_types
+        self.popular_values = popular_values
+
+    def parse_server(self) -> Optional[Address]:
+        reader = Reader(self.buffer, self.position)
+        if reader.startswith(LIST_END_MARKER):
+            self.position = reader.position + len(LIST_END_MARKER)
+            self.done = True
+            return None
+
+        flags = reader.read_byte()
+        ip = socket.inet_ntoa(reader.read(4))
+        port = reader.read_ushort() if flags & NONSTANDARD_PORT_FLAG else self.default_port
+        if flags & PRIVATE_IP_FLAG:
+            reader.read(4)
+        if flags & NONSTANDARD_PRIVATE_PORT_FLAG:
+            reader.read(2)
+        if flags & ICMP_IP_FLAG:
+            reader.read(4)
+        if flags & HAS_KEYS_FLAG:
+            for key_type in self.key_types:
+                self.skip_value(reader, key_type)
+        if flags & HAS_FULL_RULES_FLAG:
+            while reader.read_string() != b'':
+                reader.read_string()
+
+        self.position = reader.position
+        return ip, port
+
+    @staticmethod
+    def skip_value(reader: Reader, key_type: int) -> None:
+        if key_type == KEY_TYPE_STRING:
+            if reader.read_byte() == POPULAR_VALUE_INLINE:
+                reader.read_string()
+        elif key_type == KEY_TYPE_BYTE:
+            reader.read(1)
+        elif key_type == KEY_TYPE_SHORT:
+            reader.read(2)
+        else:
+            raise GamespyMasterError(f'Master server returned unknown key type: {key_type}')
+
+
+def list_servers_legacy(
+        address: Address,
+        game_name: str,
+        game_key: str,
+        enc_type: int = 0,
+        server_filter: str = '',
+        timeout: float = 10.0
+) -> List[Address]:
+    """
+    Retrieve a server list from a legacy (\\list\\cmp) master server
+    :param address: Address of the master server
+    :param game_name: GameSpy name of the game to list servers for
+    :param game_key: Secret key of the game
+    :param enc_type: Encryption type to request (only 0, plain server lists are supported)
+    :param server_filter: Filter to apply to the server list
+    :param timeout: Socket timeout in seconds
+    :return: Query addresses of listed servers
+    """
+    if enc_type != 0:
+        raise GamespyMasterError(f'Unsupported enctype for server list: {enc_type}')
+
+    with socket.create_connection(address, timeout=timeout) as sock:
+        greeting = bytearray()
+        while True:
+            data = sock.recv(RECV_SIZE)
+            if not data:
+                raise GamespyMasterError('Master server closed connection before sending challenge')
+            greeting.extend(data)
+            challenge = get_legacy_challenge(bytes(greeting))
+            if challenge is not None:
+                break
+
+        validate = build_validate(challenge, game_key.encode('latin1'), enc_type)
+        request = b'\\gamename\\%s\\enctype\\%d\\validate\\%s\\final\\\\queryid\\1.1\\' % (
+            game_name.encode('latin1'), enc_type, validate
+        )
+        request += b'\\list\\cmp\\gamename\\%s' % game_name.encode('latin1')
+        if server_filter:
+            request += b'\\where\\%s' % server_filter.encode('latin1')
+        request += LEGACY_FINAL
+        sock.sendall(request)
+
+        # Read until the list is terminated (or master server closes the connection)
+        response = bytearray()
+        while not is_legacy_list_complete(response):
+            data = sock.recv(RECV_SIZE)
+            if not data:
+                break
+            response.extend(data)
+
+    if response.startswith(b'\\error\\'):
+        raise GamespyMasterError(f'Master server returned an error: {response.decode("latin1", errors="replace")}')
+    if response.endswith(LEGACY_FINAL):
+        del response[-len(LEGACY_FINAL):]
+    if len(response) % LEGACY_SERVER_LENGTH != 0:
+        raise GamespyMasterError('Master server returned an incomplete server list')
+
+    return [
+        (socket.inet_ntoa(response[i:i + 4]), struct.unpack('>H', response[i + 4:i + 6])[0])
+        for i in range(0, len(response), LEGACY_SERVER_LENGTH)
+    ]
+
+
+def get_legacy_challenge(greeting: bytes) -> Optional[bytes]:
+    # Greeting format: \basic\\secure\[challenge]
+    marker = b'\\secure\\'
+    start = greeting.find(marker)
+    if start == -1:
+        return None
+    start += len(marker)
+    end = greeting.find(b'\\', start)
+    if end == -1:
+        # Challenge is always six characters
+        return greeting[start:start + 6] if len(greeting) >= start + 6 else None
+    return greeting[start:end]
+
+
+def is_legacy_list_complete(response: bytearray) -> bool:
+    return response.endswith(LEGACY_FINAL) and (len(response) - len(LEGACY_FINAL)) % LEGACY_SERVER_LENGTH == 0
+
+
+def build_list_request(
+        game_name: str,
+        challenge: bytes,
+        server_filter: str = '',
+        fields: str = '',
+        options: int = LIST_DEFAULT_OPTIONS
+) -> bytes:
+    game = game_name.encode('latin1')
+    request = struct.pack('>BBBI', LIST_REQUEST, LIST_PROTOCOL_VERSION, LIST_ENCODING_VERSION, 0)
+    # Game to list servers for, game listing servers (same)
+    request += game + b'\x00' + game + b'\x00'
+    request += challenge
+    request += server_filter.encode('latin1') + b'\x00'
+    request += fields.encode('latin1') + b'\x00'
+    request += struct.pack('>I', options)
+    return struct.pack('>H', len(request) + 2) + request
+
+
+def list_servers(
+        address: Address,
+        game_name: str,
+        game_key: str,
+        server_filter: str = '',
+        fields: Optional[str] = None,
+        list_type: Optional[int] = None,
+        timeout: float = 10.0
+) -> List[Address]:
+    """
+    Retrieve a server list from a server browsing master server ("enctypeX")
+    :param address: Address of the master server
+    :param game_name: GameSpy name of the game to list servers for
+    :param game_key: Secret key of the game
+    :param server_filter: Filter to apply to the server list
+    :param fields: Fields to request for each server (e.g. \\hostname, required by some master servers)
+    :param list_type: List request options to send (defaults to 1)
+    :param timeout: Socket timeout in seconds
+    :return: Query addresses of listed servers
+    """
+    challenge = ''.join(random.choices(string.ascii_letters + string.digits, k=LIST_CHALLENGE_LENGTH)).encode()
+    request = build_list_request(
+        game_name,
+        challenge,
+        server_filter,
+        fields or '',
+        list_type if list_type is not None else LIST_DEFAULT_OPTIONS
+    )
+
+    servers = []
+    with socket.create_connection(address, timeout=timeout) as sock:
+        sock.sendall(request)
+
+        received = bytearray()
+        cipher = None
+        parser = ListParser()
+        while not parser.done:
+            data = sock.recv(RECV_SIZE)
+            if not data:
+                raise GamespyMasterError('Master server closed connection before sending complete server list')
+
+            if cipher is None:
+                received.extend(data)
+                cipher, data = init_list_cipher(received, game_key.encode('latin1'), challenge)
+                if cipher is None:
+                    continue
+
+            servers.extend(parser.feed(cipher.decrypt(data)))
+
+    return servers
+
+
+def init_list_cipher(received: bytearray, game_key: bytes, challenge: bytes) -> Tuple[Optional[ListCipher], bytes]:
+    """
+    Set up the list cipher based on the header of a server browsing list response
+    :param received: Data received so far
+    :param game_key: Secret key of the game
+    :param challenge: Challenge sent with the list request
+    :return: Cipher and remaining (encrypted) data, or None if the header has not been received completely
+    """
+    # Header format: [random data length ^ 0xEC][random data][server key length ^ 0xEA][server key]
+    if len(received) < 1:
+        return None, b''
+    random_length = received[0] ^ 0xEC
+    if len(received) < random_length + 2:
+        return None, b''
+    key_length = received[random_length + 1] ^ 0xEA
+    start = random_length + 2 + key_length
+    if len(received) < start:
+        return None, b''
+    server_key = bytes(received[random_length + 2:start])
+    return ListCipher(game_key, challenge, server_key), bytes(received[start:])
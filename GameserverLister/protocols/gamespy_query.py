@@ -0,0 +1,155 @@
+import random
+import struct
+from typing import Dict, Optional
+
+from GameserverLister.protocols.gamespy import Address
+from GameserverLister.protocols.udp import Query, UdpQueryEngine
+
+# Query types (as used by gslist)
+QUERY_TYPE_GAMESPY1 = 0
+QUERY_TYPE_GAMESPY2 = 8
+QUERY_TYPE_GAMESPY3 = 11
+QUERY_TYPES = (QUERY_TYPE_GAMESPY1, QUERY_TYPE_GAMESPY2, QUERY_TYPE_GAMESPY3)
+
+GAMESPY1_STATUS = b'\\status\\'
+GAMESPY1_FINAL = b'\\final\\'
+GAMESPY23_MAGIC = b'\xfe\xfd'
+GAMESPY23_INFO = 0x00
+GAMESPY3_CHALLENGE = 0x09
+GAMESPY3_SPLIT_NUM = b'splitnum\x00'
+GAMESPY3_LAST_PACKET = 0x80
+
+
+class GamespyQuery(Query):
+    """
+    State of a GameSpy query against a single server
+    """
+    session_id: bytes
+    # Packets received so far by packet number
+    packets: Dict[int, bytes]
+    # Total number of packets (once known)
+    total: Optional[int]
+    result: Optional[dict]
+
+    def __init__(self, address: Address, deadline: float, session_id: bytes):
+        super().__init__(address, deadline)
+        self.session_id = session_id
+        self.packets = {}
+        self.total = None
+
+
+class GamespyQueryEngine(UdpQueryEngine):
+    """
+    Queries servers via GameSpy query protocols (version 1, 2 or 3), resulting in the parsed key/values of each server
+    """
+    query_type: int
+
+    def __init__(self, query_type: int, concurrency: int = 64, timeout: float = 3.0):
+        """
+        :param query_type: Query type (0 = GameSpy 1, 8 = GameSpy 2, 11 = GameSpy 3)
+        :param concurrency: Max number of queries to have in flight at once
+        :param timeout: Number of seconds to wait for a server to respond (per packet sent to it)
+        """
+        if query_type not in QUERY_TYPES:
+            raise ValueError(f'Unsupported query type: {query_type}')
+        super().__init__(concurrency, timeout)
+        self.query_type = query_type
+
+    def build_query(self, address: Address, deadline: float) -> GamespyQuery:
+        return GamespyQuery(address, deadline, self.build_session_id())
+
+    def build_session_id(self) -> bytes:
+        # GameSpy 3 servers ignore the top bits of each byte
+        return bytes(random.randint(0, 0x0F) for _ in range(4)) if self.query_type == QUERY_TYPE_GAMESPY3 \
+            else random.randbytes(4)
+
+    def build_initial_packet(self, query: GamespyQuery) -> bytes:
+        if self.query_type == QUERY_TYPE_GAMESPY1:
+            return GAMESPY1_STATUS
+        elif self.query_type == QUERY_TYPE_GAMESPY2:
+            # Request all server keys, but no player or team data
+            return GAMESPY23_MAGIC + bytes([GAMESPY23_INFO]) + query.session_id + b'\xff\x00\x00'
+        else:
+            return GAMESPY23_MAGIC + bytes([GAMESPY3_CHALLENGE]) + query.session_id
+
+    def handle_packet(self, query: GamespyQuery, data: bytes) -> Optional[bytes]:
+        if self.query_type == QUERY_TYPE_GAMESPY1:
+            self.handle_gamespy1_packet(query, data)
+        elif self.query_type == QUERY_TYPE_GAMESPY2:
+            if data[0] != GAMESPY23_INFO or data[1:5] != query.session_id:
+                return None
+            query.result = parse_key_values(data[5:])
+        elif data[0] == GAMESPY3_CHALLENGE and data[1:5] == query.session_id:
+            challenge = int(data[5:].split(b'\x00', 1)[0])
+            # Request all server keys, but no player or team data (split into multiple packets as required)
+            return GAMESPY23_MAGIC + bytes([GAMESPY23_INFO]) + query.session_id + \
+                struct.pack('>I', challenge & 0xFFFFFFFF) + b'\xff\x00\x00\x01'
+        elif data[0] == GAMESPY23_INFO and data[1:5] == query.session_id:
+            self.handle_gamespy3_packet(query, data[5:])
+        return None
+
+    @staticmethod
+    def handle_gamespy1_packet(query: GamespyQuery, data: bytes) -> None:
+        # Packets are numbered via a "\queryid\[id].[number]" key, with the last one containing a "\final\" key
+        number = 1
+        marker = data.rfind(b'\\queryid\\')
+        if marker != -1:
+            queryid = data[marker + 9:].split(b'\\', 1)[0]
+            if b'.' in queryid:
+                number = int(queryid.split(b'.', 1)[1])
+        query.packets[number] = data
+        if GAMESPY1_FINAL in data:
+            query.total = number
+
+        if query.total is not None and len(query.packets) >= query.total:
+            payload = b''.join(query.packets[n] for n in sorted(query.packets))
+            query.result = parse_backslash_key_values(payload)
+
+    @staticmethod
+    def handle_gamespy3_packet(query: GamespyQuery, data: bytes) -> None:
+        if not data.startswith(GAMESPY3_SPLIT_NUM):
+            raise ValueError('GameSpy 3 response is missing split number')
+        number = data[len(GAMESPY3_SPLIT_NUM)]
+        index = number & ~GAMESPY3_LAST_PACKET
+        # Skip packet number and section (server info) byte
+        query.packets[index] = data[len(GAMESPY3_SPLIT_NUM) + 2:]
+        if number & GAMESPY3_LAST_PACKET:
+            query.total = index + 1
+
+        if query.total is not None and len(query.packets) >= query.total:
+            result = {}
+            for index in sorted(query.packets):
+                result.update(parse_key_values(query.packets[index]))
+            query.result = result
+
+
+def parse_key_values(data: bytes) -> dict:
+    """
+    Parse null-terminated key/value pairs (terminated by an empty key)
+    :param data: Raw key/value data
+    :return: Values by (lower case) key
+    """
+    parsed = {}
+    elements = data.split(b'\x00')
+    for i in range(0, len(elements) - 1, 2):
+        key = elements[i].decode('latin1')
+        if key == '':
+            break
+        parsed[key.lower()] = elements[i + 1].decode('latin1')
+    return parsed
+
+
+def parse_backslash_key_values(data: bytes) -> dict:
+    """
+    Parse backslash-separated key/value pairs (\\key\\value\\key\\value...), ignoring query metadata
+    :param data: Raw key/value data
+    :return: Values by (lower case) key
+    """
+    parsed = {}
+    elements = data.decode('latin1').split('\\')[1:]
+    for i in range(0, len(elements) - 1, 2):
+        key = elements[i].lower()
+        if key in ('queryid', 'final', ''):
+            continue
+        parsed[key] = elements[i + 1]
+    return parsed
@@ -0,0 +1,128 @@
+import select
+import socket
+import struct
+import time
+from typing import Dict, List, Optional, Any
+
+from GameserverLister.protocols.gamespy import Address
+
+RECV_SIZE = 65535
+
+
+class Query:
+    """
+    State of a query against a single server
+    """
+    address: Address
+    deadline: float
+    result: Optional[Any]
+
+    def __init__(self, address: Address, deadline: float):
+        self.address = address
+        self.deadline = deadline
+        self.result = None
+
+
+class UdpQueryEngine:
+    """
+    Queries servers via a UDP query protocol, sending all queries via a single UDP socket with up to [concurrency]
+    queries being in flight at once
+    """
+    concurrency: int
+    timeout: float
+
+    def __init__(self, concurrency: int = 64, timeout: float = 3.0):
+        """
+        :param concurrency: Max number of queries to have in flight at once
+        :param timeout: Number of seconds to wait for a server to respond (per packet sent to it)
+        """
+        self.concurrency = concurrency
+        self.timeout = timeout
+
+    def query(self, address: Address) -> Optional[Any]:
+        return self.query_all([address])[0]
+
+    def query_all(self, addresses: List[Address]) -> List[Optional[Any]]:
+        """
+        Query all given servers
+        :param addresses: Query addresses of the servers
+        :return: Result for each server (same order as the given addresses), None if a server did not respond
+        """
+        results: Dict[Address, Optional[Any]] = {}
+        queue = list(dict.fromkeys(addresses))
+        queue.reverse()
+        in_flight: Dict[Address, Query] = {}
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.setblocking(False)
+            while len(queue) > 0 or len(in_flight) > 0:
+                while len(queue) > 0 and len(in_flight) < self.concurrency:
+                    address = queue.pop()
+                    query = self.build_query(address, time.monotonic() + self.timeout)
+                    if self.send(sock, query, self.build_initial_packet(query)):
+                        in_flight[address] = query
+                    else:
+                        results[address] = None
+
+                # Wait for responses until the next query times out
+                next_deadline = min((query.deadline for query in in_flight.values()), default=time.monotonic())
+                readable, _, _ = select.select([sock], [], [], max(next_deadline - time.monotonic(), 0))
+                if readable:
+                    self.receive_all(sock, in_flight, results)
+
+                now = time.monotonic()
+                for address, query in list(in_flight.items()):
+                    if query.deadline <= now:
+                        del in_flight[address]
+                        results[address] = None
+
+        return [results.get(address) for address in addresses]
+
+    def receive_all(self, sock: socket.socket, in_flight: Dict[Address, Query], results: Dict[Address, Any]) -> None:
+        while True:
+            try:
+                data, address = sock.recvfrom(RECV_SIZE)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                # ICMP port unreachable may be reported on the next receive (platform dependent), ignore it
+                continue
+
+            query = in_flight.get(address)
+            if query is None:
+                continue
+
+            try:
+                reply = self.handle_packet(query, data)
+            except (ValueError, IndexError, struct.error):
+                # Invalid packet, ignore it
+                continue
+
+            if reply is not None:
+                query.deadline = time.monotonic() + self.timeout
+                if not self.send(sock, query, reply):
+                    del in_flight[address]
+                    results[address] = None
+            elif query.result is not None:
+                del in_flight[address]
+                results[address] = query.result
+
+    @staticmethod
+    def send(sock: socket.socket, query: Query, packet: bytes) -> bool:
+        try:
+            sock.sendto(packet, query.address)
+            return True
+        except OSError:
+            return False
+
+    def build_query(self, address: Address, deadline: float) -> Query:
+        return Query(address, deadline)
+
+    def build_initial_packet(self, query: Query) -> bytes:
+        pass
+
+    def handle_packet(self, query: Query, data: bytes) -> Optional[bytes]:
+        """
+        Handle a packet received from a server, setting the query result once the response is complete
+        :return: Packet to send to the server in reply, if any
+        """
+        pass
@@ -0,0 +1,70 @@
+from typing import Optional
+
+import pyvpsq
+from pyvpsq.buffer import Buffer, ByteOrder
+from pyvpsq.packet import ServerPacketType
+from pyvpsq.server import ServerQueryType
+
+from GameserverLister.protocols.udp import Query, UdpQueryEngine
+
+VALVE_HEADER = b'\xff\xff\xff\xff'
+# Extra data flag indicating the game port is included in the info response
+EDF_GAME_PORT = 0x80
+
+
+class ValveQueryEngine(UdpQueryEngine):
+    """
+    Queries servers via A2S_INFO, resulting in the parsed server info of each server (answering challenges as required)
+    """
+
+    def build_initial_packet(self, query: Query) -> bytes:
+        return pyvpsq.Server.build_query(ServerQueryType.Info)
+
+    def handle_packet(self, query: Query, data: bytes) -> Optional[bytes]:
+        # Ignore split responses (info responses fit into a single packet)
+        if not data.startswith(VALVE_HEADER) or len(data) < 5:
+            return None
+
+        packet_type = data[4]
+        if packet_type == ServerPacketType.Challenge:
+            # Re-send query including the challenge
+            return pyvpsq.Server.build_query(ServerQueryType.Info, data[5:9])
+        elif packet_type == ServerPacketType.InfoResponse:
+            try:
+                query.result = parse_info(data[5:])
+            except pyvpsq.Error as e:
+                raise ValueError(e)
+        return None
+
+
+def parse_info(data: bytes) -> pyvpsq.ServerInfo:
+    """
+    Parse the body of an A2S_INFO response
+    :param data: Response data (without header and packet type)
+    :return: Parsed server info
+    """
+    buffer = Buffer(data)
+    info = pyvpsq.ServerInfo(
+        protocol=buffer.read_uchar(),
+        name=buffer.read_c_string(),
+        map=buffer.read_c_string(),
+        folder=buffer.read_c_string(),
+        game=buffer.read_c_string(),
+        app_id=buffer.read_ushort(byte_order=ByteOrder.LittleEndian),
+        num_players=buffer.read_uchar(),
+        max_players=buffer.read_uchar(),
+        num_bots=buffer.read_uchar(),
+        listen_type=chr(buffer.read_uchar()),
+        environment=chr(buffer.read_uchar()),
+        password=bool(buffer.read_uchar()),
+        secure=bool(buffer.read_uchar()),
+        version=buffer.read_c_string()
+    )
+
+    # Extra data is optional
+    if buffer.has(1):
+        extra_data_flag = buffer.read_uchar()
+        if extra_data_flag & EDF_GAME_PORT:
+            info.game_port = buffer.read_ushort(byte_order=ByteOrder.LittleEndian)
+
+    return info
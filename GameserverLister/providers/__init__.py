@@ -1,10 +1,11 @@
-from .gamespy import GamespyProvider, GamespyListProtocolProvider, CrympAPIProvider
+from .gamespy import GamespyProvider, GamespyListProtocolProvider, GamespyMasterProvider, CrympAPIProvider
 from .provider import Provider
 
 __all__ = [
     'Provider',
     'GamespyProvider',
     'GamespyListProtocolProvider',
+    'GamespyMasterProvider',
     'CrympAPIProvider'
 ]
 
@@ -8,8 +8,10 @@ import requests
 
 from GameserverLister.common.helpers import resolve_host, guid_from_ip_port
 from GameserverLister.common.servers import ClassicServer, ViaStatus, Server
+from GameserverLister.common.transport import build_session
 from GameserverLister.common.types import GamespyPrincipal, GamespyGame, GamespyPlatform, Principal, Game, Platform
 from GameserverLister.games.gamespy import GAMESPY_PRINCIPAL_CONFIGS, GAMESPY_GAME_CONFIGS
+from GameserverLister.protocols import gamespy
 from GameserverLister.providers.provider import Provider
 
 
@@ -123,11 +125,90 @@ class GamespyListProtocolProvider(GamespyProvider):
         return servers
 
 
+class GamespyMasterProvider(GamespyProvider):
+    """
+    Retrieves server lists directly from GameSpy master servers (in-process implementation of the master server
+    list protocols, supporting the legacy protocol without encryption and the server browsing protocol/enctypeX)
+    """
+    @staticmethod
+    def supports(game: GamespyGame) -> bool:
+        return GAMESPY_GAME_CONFIGS[game].enc_type in (-1, 0)
+
+    def list(
+            self,
+            principal: GamespyPrincipal,
+            game: GamespyGame,
+            platform: GamespyPlatform,
+            **kwargs
+    ) -> List[ClassicServer]:
+        if not self.supports(game):
+            raise Exception(f'Unsupported game for {self.__class__.__name__}: {game}')
+
+        principal_config = GAMESPY_PRINCIPAL_CONFIGS[principal]
+        game_config = GAMESPY_GAME_CONFIGS[game]
+        # Format hostname using game name (following old GameSpy format [game].master.gamespy.com)
+        hostname = principal_config.hostname.format(game_config.game_name)
+        # Combine game port and principal-specific port offset (defaults to an offset of 0)
+        port = game_config.port + principal_config.get_port_offset()
+
+        # Manually look up hostname to be able to spread retries across servers
+        ips = resolve_host(hostname)
+        if len(ips) == 0:
+            raise Exception(f'Failed to resolve principal hostname: {hostname}')
+
+        timeout = kwargs.get('timeout', 10)
+        server_filter = kwargs.get('filter') if isinstance(kwargs.get('filter'), str) else ''
+
+        addresses = None
+        attempt = 0
+        max_attempts = 3
+        while addresses is None and attempt < max_attempts:
+            # Alternate between first and last found A record
+            ip = ips[0] if attempt % 2 == 0 else ips[-1]
+            try:
+                logging.debug(f'Requesting server list from {ip}:{port}')
+                if game_config.enc_type == -1:
+                    addresses = gamespy.list_servers(
+                        (ip, port),
+                        game_config.game_name,
+                        game_config.game_key,
+                        server_filter,
+                        game_config.info_query,
+                        game_config.list_type,
+                        timeout
+                    )
+                else:
+                    addresses = gamespy.list_servers_legacy(
+                        (ip, port),
+                        game_config.game_name,
+                        game_config.game_key,
+                        game_config.enc_type,
+                        server_filter,
+                        timeout
+                    )
+            except (OSError, gamespy.GamespyMasterError) as e:
+                logging.debug(e)
+                logging.error(f'Failed to retrieve server list from {ip}, attempt {attempt + 1}/{max_attempts}')
+                attempt += 1
+
+        if addresses is None:
+            raise Exception('Failed to retrieve any servers from principal')
+
+        return [
+            ClassicServer(
+                guid_from_ip_port(ip, str(query_port)),
+                ip,
+                query_port,
+                ViaStatus(principal)
+            ) for ip, query_port in addresses
+        ]
+
+
 class CrympAPIProvider(GamespyProvider):
     session: requests.Session
 
     def __init__(self):
-        self.session = requests.Session()
+        self.session = build_session()
 
     def list(
             self,
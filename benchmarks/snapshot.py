@@ -0,0 +1,85 @@
+"""
+Benchmark saving/loading server lists as JSON vs. as binary snapshot
+
+Usage: python -m benchmarks.snapshot [servers]
+"""
+import io
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List, Callable, Tuple
+
+from GameserverLister.common.files import write_servers_json, iter_servers
+from GameserverLister.common.helpers import guid_from_ip_port
+from GameserverLister.common.servers import Server, ClassicServer, FrostbiteServer, ViaStatus
+from GameserverLister.common.snapshot import write_snapshot, read_snapshot
+from GameserverLister.common.weblinks import WebLink
+from benchmarks.store import build_ip
+
+
+def build_classic_servers(count: int) -> List[Server]:
+    now = datetime.now().astimezone()
+    servers = []
+    for i in range(count):
+        ip = build_ip(i)
+        seen_at = now - timedelta(seconds=i)
+        servers.append(ClassicServer(
+            guid_from_ip_port(ip, '23000'), ip, 23000,
+            [ViaStatus('master.gamespy.com', seen_at, seen_at), ViaStatus('master.openspy.net', seen_at, seen_at)],
+            16567, seen_at, seen_at
+        ))
+    return servers
+
+
+def build_frostbite_servers(count: int) -> List[Server]:
+    now = datetime.now().astimezone()
+    servers = []
+    for i in range(count):
+        seen_at = now - timedelta(seconds=i)
+        server = FrostbiteServer(f'{i:0>8x}-0000-0000-0000-000000000000', f'server {i}', build_ip(i), 25200,
+                                 47200, seen_at, seen_at, seen_at)
+        server.add_links(WebLink('battlelog.com', f'https://battlelog.battlefield.com/bf3/servers/show/pc/{i}',
+                                 True, seen_at))
+        servers.append(server)
+    return servers
+
+
+def time_it(func: Callable) -> Tuple[float, object]:
+    started = time.perf_counter()
+    result = func()
+    return time.perf_counter() - started, result
+
+
+def bench_json(servers: List[Server], server_class: type) -> Tuple[float, float, int]:
+    file = io.StringIO()
+    save, _ = time_it(lambda: write_servers_json(file, servers))
+    data = file.getvalue()
+    load, loaded = time_it(lambda: list(iter_servers(io.StringIO(data), server_class)))
+    assert len(loaded) == len(servers)
+    return save, load, len(data.encode('utf-8'))
+
+
+def bench_snapshot(servers: List[Server], server_class: type) -> Tuple[float, float, int]:
+    file = io.BytesIO()
+    save, _ = time_it(lambda: write_snapshot(file, servers, server_class))
+    data = file.getvalue()
+    load, loaded = time_it(lambda: read_snapshot(io.BytesIO(data), server_class))
+    assert [s.dump() for s in loaded[:100]] == [s.dump() for s in servers[:100]]
+    return save, load, len(data)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    for name, builder, server_class in [
+        ('ClassicServer', build_classic_servers, ClassicServer),
+        ('FrostbiteServer', build_frostbite_servers, FrostbiteServer)
+    ]:
+        servers = builder(count)
+        for format_name, bench in [('json', bench_json), ('snapshot', bench_snapshot)]:
+            save, load, size = bench(servers, server_class)
+            print(f'{name:<16} {count:>8} servers {format_name:<9} save: {save:7.3f}s  load: {load:7.3f}s  '
+                  f'size: {size / 1024 / 1024:7.2f}MiB')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Benchmark merging found servers into a server list via ServerLister.add_update_servers
+
+Usage: python -m benchmarks.store [max servers]
+"""
+import sys
+import tempfile
+import time
+from typing import List
+
+from GameserverLister.common.helpers import guid_from_ip_port
+from GameserverLister.common.servers import Server, ClassicServer, FrostbiteServer, ViaStatus
+from GameserverLister.common.types import GamespyGame, GamespyPlatform, StoreBackend
+from GameserverLister.listers.common import ServerLister
+
+
+def build_ip(i: int) -> str:
+    return f'{1 + i // 16777216 % 200}.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}'
+
+
+def build_classic_servers(start: int, count: int) -> List[Server]:
+    servers = []
+    for i in range(start, start + count):
+        ip = build_ip(i)
+        servers.append(ClassicServer(guid_from_ip_port(ip, '23000'), ip, 23000, ViaStatus('principal'), 16567))
+    return servers
+
+
+def build_frostbite_servers(start: int, count: int) -> List[Server]:
+    return [
+        FrostbiteServer(f'{i:0>8x}-0000-0000-0000-000000000000', f'server {i}', build_ip(i), 25200)
+        for i in range(start, start + count)
+    ]
+
+
+def bench(builder, count: int, list_dir: str) -> float:
+    lister = ServerLister(GamespyGame.BF2, GamespyPlatform.PC, Server, True, 12.0, False, False, False, False,
+                          False, False, StoreBackend.JSON, list_dir)
+    # Seed list with count servers, then merge count found servers of which half are already known
+    lister.add_update_servers(builder(0, count))
+    found = builder(count // 2, count)
+
+    started = time.perf_counter()
+    lister.add_update_servers(found)
+    elapsed = time.perf_counter() - started
+
+    assert len(lister.servers) == count + count // 2
+    return elapsed
+
+
+def main():
+    max_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    counts = [max_count // 8, max_count // 4, max_count // 2, max_count]
+    with tempfile.TemporaryDirectory() as list_dir:
+        for name, builder in [('ClassicServer', build_classic_servers), ('FrostbiteServer', build_frostbite_servers)]:
+            for count in counts:
+                elapsed = bench(builder, count, list_dir)
+                print(f'{name:<16} {count:>8} known + {count:>8} found: '
+                      f'{elapsed:8.3f}s ({elapsed / count * 1e6:6.2f}us per found server)')
+
+
+if __name__ == '__main__':
+    main()
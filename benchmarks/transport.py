@@ -0,0 +1,97 @@
+"""
+Benchmark requests per second against a local stub server, sending requests from concurrent threads
+(as done when crawling pages or checking expired servers) without a session, with a default session and with
+a session built by the shared transport
+
+The stub server runs in a separate process and uses plain HTTP. To mimic the cost of TLS handshakes against remote
+APIs, it delays the first response on every new connection by [handshake delay] milliseconds.
+
+Usage: python -m benchmarks.transport [requests] [concurrency] [handshake delay]
+"""
+import multiprocessing
+import sys
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Callable
+
+import requests
+from gevent.threadpool import ThreadPool
+
+from GameserverLister.common.transport import build_session, supports_http2
+
+BODY = b'{"servers": [' + b', '.join(b'{"gameId": "%d", "prefix": "server %d"}' % (i, i) for i in range(100)) + b']}'
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        with self.server.connections.get_lock():
+            self.server.connections.value += 1
+        time.sleep(self.server.handshake_delay)
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port: multiprocessing.Value, connections: multiprocessing.Value, handshake_delay: float) -> None:
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    server.daemon_threads = True
+    server.connections = connections
+    server.handshake_delay = handshake_delay
+    port.value = server.server_address[1]
+    server.serve_forever()
+
+
+def bench(url: str, get: Callable[[str], requests.Response], count: int, concurrency: int) -> float:
+    pool = ThreadPool(concurrency)
+    started = time.perf_counter()
+    responses = pool.map(lambda _: get(url), range(count))
+    elapsed = time.perf_counter() - started
+    pool.kill()
+
+    assert all(response.status_code == 200 for response in responses)
+    return elapsed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+
+    handshake_delay = float(sys.argv[3]) / 1000 if len(sys.argv) > 3 else 0.02
+
+    port = multiprocessing.Value('i', 0)
+    connections = multiprocessing.Value('i', 0)
+    server = multiprocessing.Process(target=serve, args=(port, connections, handshake_delay), daemon=True)
+    server.start()
+    while port.value == 0:
+        time.sleep(0.01)
+    url = f'http://127.0.0.1:{port.value}/servers'
+
+    default_session = requests.session()
+    candidates = [
+        ('no session', lambda url: requests.get(url, timeout=10)),
+        ('default session', lambda url: default_session.get(url, timeout=10)),
+        ('transport session', build_session(concurrency).get)
+    ]
+    if supports_http2():
+        candidates.append(('transport session (HTTP/2)', build_session(concurrency, http2=True).get))
+
+    for name, get in candidates:
+        connections.value = 0
+        elapsed = bench(url, get, count, concurrency)
+        print(f'{name:<28} {count / elapsed:8.1f} requests/s ({connections.value:>5} connections)')
+
+    server.terminate()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark retrieving a Valve server list via ValveServerLister.update_server_list from a local stub principal,
+crawling regions one after another and concurrently
+
+The stub principal runs in a separate process and lists [servers per region] servers in each region (three
+quarters of which are only listed in the respective region). It delays every response by [latency] milliseconds
+to mimic the round trip to Valve's principal.
+
+Usage: python -m benchmarks.valve [servers per region] [latency] [rate limit]
+"""
+import multiprocessing
+import socket
+import struct
+import sys
+import tempfile
+import time
+from typing import List, Tuple
+
+import pyvpsq
+
+from GameserverLister.common.types import ValveGame, ValvePrincipal, StoreBackend
+from GameserverLister.listers import ValveServerLister
+
+# Valve's principal returns up to 231 servers per page
+PAGE_SIZE = 231
+
+
+def build_region_servers(region: int, count: int) -> List[Tuple[str, int]]:
+    # Let regions overlap by a quarter (as servers are listed for multiple regions, e.g. "World")
+    shared = count // 4
+    return [
+        *[(f'1.0.{i // 256}.{i % 256}', 27015) for i in range(shared)],
+        *[(f'2.{region}.{i // 256}.{i % 256}', 27015) for i in range(count - shared)]
+    ]
+
+
+def serve(port: multiprocessing.Value, requests: multiprocessing.Value, count: int, latency: float) -> None:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(('127.0.0.1', 0))
+    port.value = sock.getsockname()[1]
+    servers = {region: build_region_servers(region, count) for region in pyvpsq.Region}
+    # Responses are sent once their latency has passed, so requests are answered concurrently
+    scheduled: List[Tuple[float, bytes, Tuple[str, int]]] = []
+    while True:
+        timeout = max(scheduled[0][0] - time.monotonic(), 0) if len(scheduled) > 0 else None
+        sock.settimeout(timeout)
+        try:
+            data, address = sock.recvfrom(1024)
+            with requests.get_lock():
+                requests.value += 1
+            scheduled.append((time.monotonic() + latency, build_response(servers, data), address))
+        except socket.timeout:
+            pass
+
+        while len(scheduled) > 0 and scheduled[0][0] <= time.monotonic():
+            _, response, address = scheduled.pop(0)
+            sock.sendto(response, address)
+
+
+def build_response(servers: dict, data: bytes) -> bytes:
+    region = data[1]
+    after = data[2:].split(b'\x00', 1)[0].decode()
+    region_servers = servers[region]
+    addresses = [f'{ip}:{port}' for ip, port in region_servers]
+    offset = addresses.index(after) + 1 if after in addresses else 0
+    page = region_servers[offset:offset + PAGE_SIZE]
+    if offset + PAGE_SIZE >= len(region_servers):
+        page = [*page, ('0.0.0.0', 0)]
+    response = b'\xff\xff\xff\xff\x66\x0a'
+    for ip, port in page:
+        response += socket.inet_aton(ip) + struct.pack('>H', port)
+    return response
+
+
+def bench(port: int, concurrency: int, rate_limit: float) -> Tuple[float, int]:
+    with tempfile.TemporaryDirectory() as list_dir:
+        lister = ValveServerLister(ValveGame.CounterStrike, ValvePrincipal.VALVE, 5.0, '', 100, concurrency,
+                                   rate_limit, False, 64, 3.0, 24.0, False, 12.0, False, False, False, False,
+                                   False, False, StoreBackend.JSON, list_dir)
+        lister.build_principal_server = lambda: pyvpsq.PrincipalServer('127.0.0.1', port, timeout=5.0)
+        started = time.perf_counter()
+        lister.update_server_list()
+        elapsed = time.perf_counter() - started
+        return elapsed, len(lister.servers)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    latency = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.1
+    rate_limit = float(sys.argv[3]) if len(sys.argv) > 3 else 0
+
+    port = multiprocessing.Value('i', 0)
+    requests = multiprocessing.Value('i', 0)
+    server = multiprocessing.Process(target=serve, args=(port, requests, count, latency), daemon=True)
+    server.start()
+    while port.value == 0:
+        time.sleep(0.01)
+
+    for concurrency in [1, 3, len(pyvpsq.Region)]:
+        requests.value = 0
+        elapsed, found = bench(port.value, concurrency, rate_limit)
+        print(f'concurrency {concurrency:>2} {elapsed:8.3f}s ({requests.value:>4} requests, {found:>6} servers)')
+
+    server.terminate()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from GameserverLister.common.changes import ChangeTracker, get_changed_fields, get_state
+from GameserverLister.common.servers import ClassicServer, FrostbiteServer, ViaStatus
+from GameserverLister.common.types import GamespyGame, GamespyPlatform, StoreBackend
+from GameserverLister.common.weblinks import WebLink
+from GameserverLister.listers.common import ServerLister
+
+
+class GetChangedFieldsTest(unittest.TestCase):
+    def test_volatile_ignored(self):
+        # GIVEN a server
+        seen_at = datetime(2024, 1, 1).astimezone()
+        server = ClassicServer('a-guid', '1.1.1.1', 23000, ViaStatus('a-principal', seen_at, seen_at), 16567,
+                               seen_at, seen_at)
+        server.add_links(WebLink('a-site', 'a-url', True, seen_at))
+        before = get_state(server)
+
+        # WHEN server is updated with only volatile attributes changed
+        later = seen_at + timedelta(hours=1)
+        server.update(ClassicServer('a-guid', '1.1.1.1', 23000, ViaStatus('a-principal', later, later), 16567,
+                                    later, later))
+        server.add_links(WebLink('a-site', 'a-url', True, later))
+
+        # THEN
+        # No fields changed
+        self.assertEqual([], get_changed_fields(before, get_state(server)))
+
+    def test_changed(self):
+        # GIVEN a server
+        server = ClassicServer('a-guid', '1.1.1.1', 23000, ViaStatus('a-principal'), 16567)
+        before = get_state(server)
+
+        # WHEN server is updated with a new game port and seen via another principal
+        server.update(ClassicServer('a-guid', '1.1.1.1', 23000, ViaStatus('b-principal'), 16568))
+
+        # THEN
+        # Changed fields are named as in the JSON representation
+        self.assertEqual(['gamePort', 'via'], sorted(get_changed_fields(before, get_state(server))))
+
+
+class ChangeTrackerTest(unittest.TestCase):
+    def test_record_updated_added(self):
+        # GIVEN a server added during the run
+        changes = ChangeTracker()
+        changes.record_added('a-guid')
+
+        # WHEN the server is updated
+        changes.record_updated('a-guid', ['name'])
+
+        # THEN
+        # Update is covered by the addition
+        self.assertEqual(['a-guid'], list(changes.added))
+        self.assertEqual({}, changes.updated)
+
+    def test_record_updated_unchanged(self):
+        changes = ChangeTracker()
+        changes.record_updated('a-guid', [])
+        self.assertEqual({}, changes.updated)
+
+    def test_record_updated_merged(self):
+        changes = ChangeTracker()
+        changes.record_updated('a-guid', ['name'])
+        changes.record_updated('a-guid', ['queryPort'])
+        self.assertEqual({'a-guid': {'name', 'queryPort'}}, changes.updated)
+
+    def test_record_expired(self):
+        # GIVEN an updated server
+        changes = ChangeTracker()
+        changes.record_updated('a-guid', ['name'])
+
+        # WHEN the server expires
+        changes.record_expired('a-guid')
+
+        # THEN
+        # Server is only tracked as expired
+        self.assertEqual({}, changes.updated)
+        self.assertEqual(['a-guid'], list(changes.expired))
+
+
+class ServerListerChangesTest(unittest.TestCase):
+    def test_add_update_remove(self):
+        with tempfile.TemporaryDirectory() as list_dir:
+            # GIVEN a lister with known servers, one of which is expired
+            lister = ServerLister(GamespyGame.BF2, GamespyPlatform.PC, FrostbiteServer, True, 12.0, False, False,
+                                  False, False, False, True, StoreBackend.JSON, list_dir)
+            expired_at = datetime.now().astimezone() - timedelta(hours=24)
+            lister.add_update_servers([
+                FrostbiteServer('a-guid', 'a-name', '1.1.1.1', 25200),
+                FrostbiteServer('b-guid', 'b-name', '1.1.1.2', 25200),
+                FrostbiteServer('c-guid', 'c-name', '1.1.1.3', 25200, last_seen_at=expired_at)
+            ])
+            lister.changes = ChangeTracker()
+
+            # WHEN servers are found and expired servers are removed
+            lister.add_update_servers([
+                FrostbiteServer('a-guid', 'a-name', '1.1.1.1', 25200),
+                FrostbiteServer('b-guid', 'b-new-name', '1.1.1.2', 25200),
+                FrostbiteServer('d-guid', 'd-name', '1.1.1.4', 25200)
+            ])
+            removed, recovered = lister.remove_expired_servers()
+
+            # THEN
+            # Changes are tracked
+            self.assertEqual(['d-guid'], list(lister.changes.added))
+            self.assertEqual({'b-guid': {'name'}}, lister.changes.updated)
+            self.assertEqual(['c-guid'], list(lister.changes.expired))
+            self.assertEqual({}, lister.changes.recovered)
+            self.assertEqual((1, 0), (removed, recovered))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import time
+import unittest
+
+from GameserverLister.common.concurrency import SharedBackoff, TokenBucket
+
+
+class SharedBackoffTest(unittest.TestCase):
+    def test_wait(self):
+        # GIVEN a backoff with a failed check recorded
+        timeouts = []
+        backoff = SharedBackoff(lambda checks_since_last_ok: timeouts.append(checks_since_last_ok) or 0)
+        backoff.record(False, 0, 1)
+
+        # WHEN waiting
+        checks_since_last_ok = backoff.wait()
+
+        # THEN
+        # Timeout is determined based on the shared number of checks since last ok
+        self.assertEqual(1, checks_since_last_ok)
+        self.assertEqual([1], timeouts)
+
+    def test_record_failed(self):
+        # GIVEN a backoff
+        backoff = SharedBackoff(lambda _: 0)
+
+        # WHEN concurrent checks fail
+        backoff.record(False, 0, 1)
+        backoff.record(False, 0, 1)
+
+        # THEN
+        # Failures of all checks are counted
+        self.assertEqual(2, backoff.checks_since_last_ok)
+
+    def test_record_ok(self):
+        # GIVEN a backoff with failed checks recorded
+        backoff = SharedBackoff(lambda _: 0)
+        backoff.record(False, 0, 1)
+        backoff.record(False, 1, 2)
+
+        # WHEN a check is ok
+        backoff.record(True, 2, 0)
+
+        # THEN
+        # Number of checks since last ok is reset
+        self.assertEqual(0, backoff.checks_since_last_ok)
+
+    def test_record_error(self):
+        # GIVEN a backoff with a failed check recorded
+        backoff = SharedBackoff(lambda _: 0)
+        backoff.record(False, 0, 1)
+
+        # WHEN a check errors without changing the number of checks since last ok
+        backoff.record(False, 1, 1)
+
+        # THEN
+        # Number of checks since last ok remains unchanged
+        self.assertEqual(1, backoff.checks_since_last_ok)
+
+
+class TokenBucketTest(unittest.TestCase):
+    def test_acquire_burst(self):
+        # GIVEN a full bucket
+        bucket = TokenBucket(1.0, 2.0)
+
+        # WHEN acquiring up to the bucket's capacity
+        timeouts = [bucket.acquire(), bucket.acquire()]
+
+        # THEN
+        # Tokens are available right away
+        self.assertEqual([0.0, 0.0], timeouts)
+
+    def test_acquire_empty(self):
+        # GIVEN an empty bucket
+        bucket = TokenBucket(50.0)
+        bucket.acquire()
+
+        # WHEN acquiring multiple tokens
+        started = time.monotonic()
+        timeouts = [bucket.acquire(), bucket.acquire()]
+        elapsed = time.monotonic() - started
+
+        # THEN
+        # Each acquisition waits for its own token to be refilled
+        self.assertAlmostEqual(0.02, timeouts[0], delta=0.005)
+        self.assertAlmostEqual(0.02, timeouts[1], delta=0.005)
+        self.assertGreaterEqual(elapsed, 0.035)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import random
+import unittest
+
+from GameserverLister.common.coverage import CoverageEstimator
+
+
+class CoverageEstimatorTest(unittest.TestCase):
+    def test_min_pages(self):
+        # GIVEN an estimator
+        estimator = CoverageEstimator(0.99)
+
+        # WHEN a single page is observed
+        estimator.observe(['a-guid', 'b-guid'])
+
+        # THEN
+        # No estimate is made
+        self.assertIsNone(estimator.estimate_total())
+        self.assertIsNone(estimator.estimate_coverage())
+        self.assertFalse(estimator.is_target_reached())
+
+    def test_estimate_total(self):
+        # GIVEN an estimator
+        estimator = CoverageEstimator(0.99)
+
+        # WHEN pages are observed (servers listed twice on a page being counted once)
+        estimator.observe(['a-guid', 'b-guid', 'c-guid', 'c-guid'])
+        estimator.observe(['a-guid', 'd-guid', 'e-guid'])
+
+        # THEN
+        # Total is estimated from the number of servers seen once (4) and twice (1): 5 + 4 * 3 / (2 * 2)
+        self.assertEqual(8.0, estimator.estimate_total())
+        self.assertEqual(5 / 8, estimator.estimate_coverage())
+        self.assertFalse(estimator.is_target_reached())
+
+    def test_target_reached(self):
+        # GIVEN an estimator
+        estimator = CoverageEstimator(0.99)
+
+        # WHEN random pages of a server list are observed until the target is reached
+        rnd = random.Random(0)
+        uids = [f'{i}-guid' for i in range(500)]
+        while not estimator.is_target_reached():
+            estimator.observe(rnd.sample(uids, 60))
+
+        # THEN
+        # Servers actually seen come close to the target
+        self.assertGreaterEqual(estimator.known, 490)
+
+    def test_target_disabled(self):
+        # GIVEN an estimator without a target
+        estimator = CoverageEstimator(0)
+
+        # WHEN the same page is observed repeatedly
+        for _ in range(3):
+            estimator.observe(['a-guid', 'b-guid'])
+
+        # THEN
+        # Estimated coverage is complete, but target is never reached
+        self.assertEqual(1.0, estimator.estimate_coverage())
+        self.assertFalse(estimator.is_target_reached())
+
+
+if __name__ == '__main__':
+    unittest.main()
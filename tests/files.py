@@ -0,0 +1,201 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime, timezone
+
+from GameserverLister.common.changes import ChangeTracker
+from GameserverLister.common.files import iter_json_array, iter_servers, atomic_write, write_servers_json, \
+    write_servers_txt, write_changes_ndjson
+from GameserverLister.common.servers import ClassicServer, ViaStatus, ObjectJSONEncoder, FrostbiteServer, \
+    GametoolsServer
+from GameserverLister.common.store import ServerStore
+from GameserverLister.common.weblinks import WebLink
+
+
+class IterJSONArrayTest(unittest.TestCase):
+    def test_objects(self):
+        # GIVEN a JSON array of objects
+        elements = [{'guid': f'guid-{i}', 'nested': [{'a': i}, {'b': 'x' * i}]} for i in range(50)]
+        document = json.dumps(elements, indent=2)
+
+        # WHEN elements are decoded using chunks much smaller than the elements
+        actual = list(iter_json_array(io.StringIO(document), chunk_size=7))
+
+        # THEN
+        # All elements are decoded
+        self.assertEqual(elements, actual)
+
+    def test_scalars_across_chunks(self):
+        actual = list(iter_json_array(io.StringIO('[12345, "abc", true, null, 1.5e3]'), chunk_size=2))
+        self.assertEqual([12345, 'abc', True, None, 1.5e3], actual)
+
+    def test_numbers_all_chunk_sizes(self):
+        # GIVEN a document containing numbers with fractions and exponents
+        document = '[1.5e3, 12, 1.25, -0.5E-2, 7e+1, [3.0], {"a": 2.5}, 0]'
+
+        # WHEN/THEN
+        # Numbers are decoded correctly regardless of where chunks are split
+        for chunk_size in range(1, len(document) + 1):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(json.loads(document), list(iter_json_array(io.StringIO(document), chunk_size)))
+
+    def test_empty(self):
+        self.assertEqual([], list(iter_json_array(io.StringIO(' [ ] \n'))))
+
+    def test_empty_document(self):
+        with self.assertRaises(json.JSONDecodeError):
+            list(iter_json_array(io.StringIO('')))
+
+    def test_not_an_array(self):
+        with self.assertRaises(json.JSONDecodeError):
+            list(iter_json_array(io.StringIO('{"guid": "a-guid"}')))
+
+    def test_truncated(self):
+        with self.assertRaises(json.JSONDecodeError):
+            list(iter_json_array(io.StringIO('[{"guid": "a-guid"}, {"guid": "b-'), chunk_size=4))
+
+    def test_missing_delimiter(self):
+        with self.assertRaises(json.JSONDecodeError):
+            list(iter_json_array(io.StringIO('[{"guid": "a-guid"} {"guid": "b-guid"}]')))
+
+    def test_extra_data(self):
+        with self.assertRaises(json.JSONDecodeError):
+            list(iter_json_array(io.StringIO('[{"guid": "a-guid"}] []')))
+
+
+class IterServersTest(unittest.TestCase):
+    def test_classic(self):
+        # GIVEN a JSON server list
+        seen_at = datetime(2024, 1, 1, 12, 30, 0, 15, tzinfo=timezone.utc)
+        servers = [
+            ClassicServer('a-guid', '1.1.1.1', 23000, ViaStatus('a-principal', seen_at, seen_at), 16567, seen_at,
+                          seen_at),
+            ClassicServer('b-guid', '1.0.0.1', 23000, ViaStatus('b-principal', seen_at, seen_at), -1, None, seen_at)
+        ]
+        servers[0].add_links(WebLink('a-site', 'a-url', True, seen_at))
+        document = json.dumps(servers, indent=2, cls=ObjectJSONEncoder)
+
+        # WHEN servers are loaded from the list
+        actual = list(iter_servers(io.StringIO(document), ClassicServer))
+
+        # THEN
+        # Servers are loaded including nested via statuses and links
+        self.assertEqual([s.dump() for s in servers], [s.dump() for s in actual])
+
+    def test_invalid_entries(self):
+        # GIVEN a JSON server list containing invalid entries
+        document = json.dumps([
+            {'guid': 'a-guid', 'name': 'a-name', 'ip': '1.1.1.1', 'gamePort': 25200, 'queryPort': 47200},
+            {'guid': 'b-guid'},
+            'not-a-server'
+        ])
+
+        # WHEN servers are loaded from the list
+        actual = list(iter_servers(io.StringIO(document), FrostbiteServer))
+
+        # THEN
+        # Invalid entries are skipped
+        self.assertEqual(['a-guid'], [s.uid for s in actual])
+
+
+class AtomicWriteTest(unittest.TestCase):
+    def test_write(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'list.json')
+            with open(path, 'w') as file:
+                file.write('old')
+
+            with atomic_write(path) as file:
+                file.write('new')
+
+            with open(path, 'r') as file:
+                self.assertEqual('new', file.read())
+            # No temporary files are left behind
+            self.assertEqual(['list.json'], os.listdir(directory))
+
+    def test_write_failed(self):
+        # GIVEN an existing file
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'list.json')
+            with open(path, 'w') as file:
+                file.write('old')
+
+            # WHEN writing fails midway
+            with self.assertRaises(RuntimeError):
+                with atomic_write(path) as file:
+                    file.write('ne')
+                    raise RuntimeError('interrupted')
+
+            # THEN
+            # Existing file remains untouched and no temporary files are left behind
+            with open(path, 'r') as file:
+                self.assertEqual('old', file.read())
+            self.assertEqual(['list.json'], os.listdir(directory))
+
+
+class WriteServersTest(unittest.TestCase):
+    servers = [
+        GametoolsServer('a-game-id', 'a-name'),
+        GametoolsServer('b-game-id', 'b-nämé', None),
+        GametoolsServer('c-game-id', 'c-name')
+    ]
+
+    def test_json(self):
+        for ensure_ascii in [True, False]:
+            file = io.StringIO()
+            write_servers_json(file, self.servers, ensure_ascii)
+            expected = json.dumps(self.servers, indent=2, ensure_ascii=ensure_ascii, cls=ObjectJSONEncoder)
+            self.assertEqual(expected, file.getvalue())
+
+    def test_json_compact(self):
+        file = io.StringIO()
+        write_servers_json(file, self.servers, compact=True)
+        expected = json.dumps(self.servers, separators=(',', ':'), cls=ObjectJSONEncoder)
+        self.assertEqual(expected, file.getvalue())
+
+    def test_json_empty(self):
+        for compact in [True, False]:
+            file = io.StringIO()
+            write_servers_json(file, [], compact=compact)
+            self.assertEqual('[]', file.getvalue())
+
+    def test_txt(self):
+        file = io.StringIO()
+        write_servers_txt(file, self.servers)
+        self.assertEqual('a-game-id\nb-game-id\nc-game-id', file.getvalue())
+
+
+class WriteChangesTest(unittest.TestCase):
+    def test_ndjson(self):
+        # GIVEN tracked changes
+        servers = ServerStore([
+            GametoolsServer('a-game-id', 'a-name'),
+            GametoolsServer('b-game-id', 'b-name'),
+            GametoolsServer('c-game-id', 'c-name')
+        ])
+        changes = ChangeTracker()
+        changes.record_added('a-game-id')
+        changes.record_updated('b-game-id', ['name', 'links'])
+        changes.record_recovered('c-game-id')
+        changes.record_expired('d-game-id')
+
+        # WHEN changes are written
+        file = io.StringIO()
+        write_changes_ndjson(file, changes, servers)
+
+        # THEN
+        # One line is written per change, including the current server state for all but expired servers
+        lines = [json.loads(line) for line in file.getvalue().splitlines()]
+        self.assertEqual([
+            {'change': 'added', 'uid': 'a-game-id', 'server': servers.get('a-game-id').dump()},
+            {'change': 'updated', 'uid': 'b-game-id', 'fields': ['links', 'name'],
+             'server': servers.get('b-game-id').dump()},
+            {'change': 'recovered', 'uid': 'c-game-id', 'server': servers.get('c-game-id').dump()},
+            {'change': 'expired', 'uid': 'd-game-id'}
+        ], lines)
+
+
+if __name__ == '__main__':
+    unittest.main()
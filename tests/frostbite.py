@@ -0,0 +1,251 @@
+import socket
+import struct
+import tempfile
+import threading
+import time
+import unittest
+from typing import List, Optional
+
+from GameserverLister.common.query_port_stats import QueryPortOffsetStats
+from GameserverLister.common.servers import FrostbiteServer, BadCompany2Server
+from GameserverLister.common.types import BattlelogGame, BattlelogPlatform, StoreBackend, QueryPortProber
+from GameserverLister.listers import BattlelogServerLister, BadCompany2ServerLister
+from GameserverLister.protocols.frostbite import FrostbiteQueryEngine, build_packet, parse_packet, parse_server_info
+
+BF4_SERVER_INFO = ['OK', 'A BF4 Server', '12', '64', 'ConquestLarge0', 'MP_Siege', '0', '2', '2', '412.5', '780',
+                   '0', '', 'true', 'true', 'false', '86400', '1200', '1.1.1.1:25200', 'v1.893 | A1390 C2.347',
+                   'false', 'EU', 'i3d-ams', 'NL', '12', 'IN_GAME']
+BC2_SERVER_INFO = ['OK', 'A BC2 Server', '8', '32', 'RUSH', 'levels/mp_005', '1', '2', '2', '75', '60', '0', '',
+                   'true', 'true', 'false', '3600', '300', 'BC2', '', '2.2.2.2:19567', 'v1.894', 'false', 'EU']
+OLD_SERVER_INFO = ['OK', 'An old Server', '0', '32', 'RUSH', 'levels/mp_005', '1', '2', '0', '0', '']
+MISCONFIGURED_SERVER_INFO = ['OK', 'A community Server', '', 'n/a', 'RUSH', 'levels/mp_005', '1', 'x', '2', '75']
+
+
+def build_response(words: List[str], sequence: int = 0) -> bytes:
+    packet = build_packet(words, sequence)
+    header, = struct.unpack('<I', packet[:4])
+    return struct.pack('<I', header | 0x80000000 | 0x40000000) + packet[4:]
+
+
+class StubFrostbiteServer:
+    """
+    Local Frostbite RCON server, responding to serverInfo requests with the given words
+    (in chunks, mimicking responses split across multiple segments)
+    """
+    sock: socket.socket
+    words: Optional[List[str]]
+    delay: float
+    connections: int
+
+    def __init__(self, words: Optional[List[str]], delay: float = 0.0):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.listen(16)
+        self.words = words
+        self.delay = delay
+        self.connections = 0
+        threading.Thread(target=self.serve, daemon=True).start()
+
+    @property
+    def port(self) -> int:
+        return self.sock.getsockname()[1]
+
+    def serve(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                return
+            self.connections += 1
+            threading.Thread(target=self.respond, args=(conn,), daemon=True).start()
+
+    def respond(self, conn: socket.socket):
+        with conn:
+            request = conn.recv(1024)
+            if self.words is None or parse_packet(request)[1] != ['serverInfo']:
+                return
+            time.sleep(self.delay)
+            response = build_response(self.words)
+            for i in range(0, len(response), 16):
+                conn.sendall(response[i:i + 16])
+                time.sleep(0.001)
+            # Keep connection open (as real servers do)
+            time.sleep(0.5)
+
+    def close(self):
+        self.sock.close()
+
+
+def get_free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class FrostbiteQueryEngineTest(unittest.TestCase):
+    def start_server(self, words: Optional[List[str]], delay: float = 0.0) -> StubFrostbiteServer:
+        server = StubFrostbiteServer(words, delay)
+        self.addCleanup(server.close)
+        return server
+
+    def test_query_all(self):
+        # GIVEN a responding, a silent and a slow server as well as a closed port
+        responding = self.start_server(BF4_SERVER_INFO)
+        silent = self.start_server(None)
+        slow = self.start_server(BC2_SERVER_INFO, 0.3)
+        closed = get_free_port()
+
+        # WHEN all addresses are queried
+        started = time.monotonic()
+        actual = FrostbiteQueryEngine(timeout=1.0).query_all([
+            ('127.0.0.1', silent.port),
+            ('127.0.0.1', closed),
+            ('127.0.0.1', slow.port),
+            ('127.0.0.1', responding.port)
+        ])
+        elapsed = time.monotonic() - started
+
+        # THEN
+        # Results are returned in order, with addresses being queried concurrently
+        self.assertEqual([None, None, '2.2.2.2:19567', '1.1.1.1:25200'],
+                         [result['connect'] if result is not None else None for result in actual])
+        self.assertLess(elapsed, 1.5)
+
+    def test_query_all_concurrency(self):
+        # GIVEN a slow server
+        slow = self.start_server(BF4_SERVER_INFO, 0.2)
+
+        # WHEN the server is queried with a single query in flight at a time
+        started = time.monotonic()
+        actual = FrostbiteQueryEngine(concurrency=1, timeout=1.0).query_all([('127.0.0.1', slow.port)] * 2)
+        elapsed = time.monotonic() - started
+
+        # THEN
+        # Duplicate addresses are only queried once
+        self.assertEqual(2, len([result for result in actual if result is not None]))
+        self.assertEqual(1, slow.connections)
+        self.assertLess(elapsed, 0.6)
+
+
+class ParseServerInfoTest(unittest.TestCase):
+    def test_parse_bf4(self):
+        actual = parse_server_info(BF4_SERVER_INFO[1:], '127.0.0.1', 47200)
+        self.assertEqual('A BF4 Server', actual['name'])
+        self.assertEqual('MP_Siege', actual['map'])
+        self.assertEqual(12, actual['numplayers'])
+        self.assertEqual(64, actual['maxplayers'])
+        self.assertFalse(actual['password'])
+        self.assertEqual([{'tickets': 412.5}, {'tickets': 780.0}], actual['raw']['teams'])
+        self.assertEqual('1.1.1.1:25200', actual['connect'])
+
+    def test_parse_bc2(self):
+        actual = parse_server_info(BC2_SERVER_INFO[1:], '127.0.0.1', 48888)
+        self.assertEqual('A BC2 Server', actual['name'])
+        self.assertEqual('2.2.2.2:19567', actual['connect'])
+
+    def test_parse_without_address(self):
+        # Default game port is assumed for default query ports, query address is used otherwise
+        self.assertEqual('127.0.0.1:7673', parse_server_info(OLD_SERVER_INFO[1:], '127.0.0.1', 48888)['connect'])
+        self.assertEqual('127.0.0.1:48889', parse_server_info(OLD_SERVER_INFO[1:], '127.0.0.1', 48889)['connect'])
+
+    def test_parse_lenient(self):
+        # Non-numeric fields are treated as absent and truncated responses are parsed as far as possible
+        actual = parse_server_info(MISCONFIGURED_SERVER_INFO[1:], '127.0.0.1', 48889)
+        self.assertEqual('A community Server', actual['name'])
+        self.assertIsNone(actual['numplayers'])
+        self.assertIsNone(actual['maxplayers'])
+        self.assertIsNone(actual['raw']['roundstotal'])
+        self.assertEqual([{'tickets': 75.0}, {'tickets': None}], actual['raw']['teams'])
+        self.assertIsNone(actual['raw']['status'])
+        self.assertEqual('127.0.0.1:48889', actual['connect'])
+
+    def test_parse_address_without_port(self):
+        actual = parse_server_info(BF4_SERVER_INFO[1:18] + ['1.1.1.1'], '127.0.0.1', 47200)
+        self.assertEqual('1.1.1.1:47200', actual['connect'])
+
+    def test_parse_packet_incomplete(self):
+        packet = build_packet(['serverInfo'])
+        self.assertIsNone(parse_packet(packet[:-1]))
+        self.assertEqual((0, ['serverInfo']), parse_packet(packet))
+
+
+class FrostbiteServerListerTest(unittest.TestCase):
+    def test_find_query_ports_native(self):
+        with tempfile.TemporaryDirectory() as list_dir:
+            # GIVEN a server with candidate ports being closed, used by another server and used by the server (twice)
+            other = StubFrostbiteServer(['OK', 'Other', '0', '64', 'RUSH', 'MP_001', '0', '2', '0', '0', '',
+                                         'true', 'true', 'false', '1', '1', '127.0.0.1:25201'])
+            matching = StubFrostbiteServer(['OK', 'Server', '0', '64', 'RUSH', 'MP_001', '0', '2', '0', '0', '',
+                                            'true', 'true', 'false', '1', '1', '127.0.0.1:25200'])
+            also_matching = StubFrostbiteServer(matching.words)
+            for stub in [other, matching, also_matching]:
+                self.addCleanup(stub.close)
+            lister = BattlelogServerLister(BattlelogGame.BF3, BattlelogPlatform.PC, 2, True, 12.0, False, False,
+                                           False, False, False, False, StoreBackend.JSON, list_dir, 0, 3, 1, 0, 0,
+                                           False)
+            server = FrostbiteServer('a-guid', 'Server', '127.0.0.1', 25200)
+            lister.servers.add(server)
+            ports_to_try = [get_free_port(), other.port, matching.port, also_matching.port]
+            lister.build_server_ports_to_try = lambda *_: ports_to_try
+            lister.get_query_port_offsets = lambda: [port - 25200 for port in ports_to_try]
+
+            # WHEN query ports are searched using the native prober
+            lister.find_query_ports(QueryPortProber.NATIVE, '', 1, 8, 12.0)
+
+            # THEN
+            # First candidate port whose response passes the validator is used
+            self.assertEqual(matching.port, server.query_port)
+            self.assertIsNotNone(server.last_queried_at)
+            self.assertEqual(['a-guid'], list(lister.changes.updated.keys()))
+            # All candidates were probed, with only the matching one being recorded as a hit
+            hit_offsets = {offset for (offset, counts) in lister.query_port_stats.game.items() if counts.hits > 0}
+            self.assertEqual({matching.port - 25200}, hit_offsets)
+            self.assertEqual(4, sum(counts.tries for counts in lister.query_port_stats.game.values()))
+
+    def test_find_query_ports_native_lenient(self):
+        with tempfile.TemporaryDirectory() as list_dir:
+            # GIVEN a Bad Company 2 server responding with non-numeric and missing fields
+            misconfigured = StubFrostbiteServer(MISCONFIGURED_SERVER_INFO)
+            self.addCleanup(misconfigured.close)
+            lister = BadCompany2ServerLister(True, 12.0, False, False, False, False, False, False, StoreBackend.JSON,
+                                             list_dir, 5.0)
+            server = BadCompany2Server('a-guid', 'A community Server', 1, 1, '127.0.0.1', 19567)
+            lister.servers.add(server)
+            lister.build_server_ports_to_try = lambda *_: [misconfigured.port]
+
+            # WHEN query ports are searched using the native prober
+            lister.find_query_ports(QueryPortProber.NATIVE, '', 1, 8, 12.0)
+
+            # THEN
+            # Response is still validated by the server's (unique) name, as it would be by gamedig
+            self.assertEqual(misconfigured.port, server.query_port)
+
+    def test_find_query_ports_native_first_candidate(self):
+        with tempfile.TemporaryDirectory() as list_dir:
+            # GIVEN a server whose first candidate port is its query port
+            matching = StubFrostbiteServer(['OK', 'Server', '0', '64', 'RUSH', 'MP_001', '0', '2', '0', '0', '',
+                                            'true', 'true', 'false', '1', '1', '127.0.0.1:25200'])
+            also_matching = StubFrostbiteServer(matching.words)
+            for stub in [matching, also_matching]:
+                self.addCleanup(stub.close)
+            lister = BattlelogServerLister(BattlelogGame.BF3, BattlelogPlatform.PC, 2, True, 12.0, False, False,
+                                           False, False, False, False, StoreBackend.JSON, list_dir, 0, 3, 1, 0, 0,
+                                           False)
+            server = FrostbiteServer('a-guid', 'Server', '127.0.0.1', 25200)
+            lister.servers.add(server)
+            lister.build_server_ports_to_try = lambda *_: [matching.port, also_matching.port]
+            lister.get_query_port_offsets = lambda: [matching.port - 25200, also_matching.port - 25200]
+
+            # WHEN query ports are searched using the native prober
+            lister.find_query_ports(QueryPortProber.NATIVE, '', 1, 8, 12.0)
+
+            # THEN
+            # Remaining candidates are not probed and the offset is persisted for future runs
+            self.assertEqual(matching.port, server.query_port)
+            self.assertEqual(0, also_matching.connections)
+            self.assertEqual([(matching.port - 25200, 1.0)],
+                             QueryPortOffsetStats(lister.query_port_stats.path).get_ranked_offsets('127.0.0.1'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from GameserverLister.common.game_port_cache import GamePortCache, GamePortCacheEntry
+
+
+class GamePortCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'game-ports.json')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_record(self):
+        # GIVEN an empty cache
+        cache = GamePortCache(self.path, 24.0)
+
+        # WHEN query results are recorded and persisted
+        cache.record('a', True, 2302)
+        cache.record('b', True)
+        cache.record('c', False)
+        cache.save()
+
+        # THEN
+        # Servers which responded are cached (even without a game port), failed servers need to be queried again
+        actual = GamePortCache(self.path, 24.0)
+        self.assertEqual({'a': 2302, 'b': None}, actual.get_fresh(['a', 'b', 'c', 'd']))
+        self.assertEqual(1, actual.entries['c'].failures)
+
+    def test_record_failure(self):
+        # GIVEN a cache containing a server's game port
+        cache = GamePortCache(self.path, 24.0)
+        cache.record('a', True, 2302)
+
+        # WHEN the server fails to respond twice
+        cache.record('a', False)
+        cache.record('a', False)
+
+        # THEN
+        # Last known game port is kept, but the server needs to be queried again
+        self.assertEqual(2302, cache.entries['a'].game_port)
+        self.assertEqual(2, cache.entries['a'].failures)
+        self.assertEqual({}, cache.get_fresh(['a']))
+
+        # WHEN the server responds again
+        cache.record('a', True, 2402)
+
+        # THEN
+        self.assertEqual({'a': 2402}, cache.get_fresh(['a']))
+
+    def test_stale(self):
+        # GIVEN a cache containing a fresh and a stale entry
+        cache = GamePortCache(self.path, 24.0)
+        now = datetime.now().astimezone()
+        cache.entries = {
+            'fresh': GamePortCacheEntry(2302, now - timedelta(hours=23)),
+            'stale': GamePortCacheEntry(2302, now - timedelta(hours=25))
+        }
+
+        # WHEN the cache is persisted
+        cache.save()
+
+        # THEN
+        # Stale entries are not used and not persisted
+        self.assertEqual({'fresh': 2302}, cache.get_fresh(['fresh', 'stale']))
+        self.assertEqual(['fresh'], list(GamePortCache(self.path, 24.0).entries.keys()))
+
+    def test_disabled(self):
+        # GIVEN a persisted cache
+        cache = GamePortCache(self.path, 24.0)
+        cache.record('a', True, 2302)
+        cache.save()
+
+        # WHEN the cache is loaded with caching disabled
+        actual = GamePortCache(self.path, 0)
+        actual.record('b', True, 2302)
+        actual.save()
+
+        # THEN
+        # Cache is neither used nor written
+        self.assertEqual({}, actual.get_fresh(['a', 'b']))
+        with open(self.path, 'r') as file:
+            self.assertEqual(['a'], list(json.load(file).keys()))
+
+    def test_invalid(self):
+        # GIVEN an invalid cache file
+        with open(self.path, 'w') as file:
+            file.write('{"a": {"gamePort": 2302}}')
+
+        # WHEN the cache is loaded
+        actual = GamePortCache(self.path, 24.0)
+
+        # THEN
+        # Cache is ignored
+        self.assertEqual({}, actual.entries)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,214 @@
+import socket
+import struct
+import threading
+import unittest
+from typing import Callable, Optional
+
+from GameserverLister.protocols.gamespy import ListCipher, ListParser, GamespyMasterError, build_validate, \
+    list_servers, list_servers_legacy, LIST_END_MARKER, NONSTANDARD_PORT_FLAG, HAS_KEYS_FLAG, PRIVATE_IP_FLAG
+
+GAME_KEY = 'hW6m9a'
+SERVER_KEY = b'a-server-key'
+
+
+class StubMaster:
+    """
+    Local master server, handing each connection to the given handler
+    """
+    sock: socket.socket
+    handler: Callable[[socket.socket], None]
+    thread: threading.Thread
+
+    def __init__(self, handler: Callable[[socket.socket], None]):
+        self.sock = socket.create_server(('127.0.0.1', 0))
+        self.handler = handler
+        self.thread = threading.Thread(target=self.serve, daemon=True)
+        self.thread.start()
+
+    @property
+    def address(self):
+        return self.sock.getsockname()
+
+    def serve(self):
+        connection, _ = self.sock.accept()
+        with connection:
+            self.handler(connection)
+
+    def close(self):
+        self.sock.close()
+        self.thread.join(5)
+
+
+def build_server_list(*entries: bytes, default_port: int = 29900) -> bytes:
+    # Header: requesting client's ip, default port, fields (hostname) and popular values
+    header = socket.inet_aton('127.0.0.1') + struct.pack('>H', default_port)
+    header += b'\x01' + b'\x00hostname\x00'
+    header += b'\x01' + b'a-popular-name\x00'
+    return header + b''.join(entries) + LIST_END_MARKER
+
+
+def build_server_entry(flags: int, ip: str, port: Optional[int] = None, hostname: Optional[bytes] = None) -> bytes:
+    entry = bytes([flags]) + socket.inet_aton(ip)
+    if flags & NONSTANDARD_PORT_FLAG:
+        entry += struct.pack('>H', port)
+    if flags & PRIVATE_IP_FLAG:
+        entry += socket.inet_aton('192.168.1.2')
+    if flags & HAS_KEYS_FLAG:
+        # Hostname is either sent inline or refers to a popular value
+        entry += b'\xff' + hostname + b'\x00' if hostname is not None else b'\x00'
+    return entry
+
+
+def receive_list_request(connection: socket.socket) -> bytes:
+    data = connection.recv(2)
+    length, = struct.unpack('>H', data)
+    while len(data) < length:
+        data += connection.recv(length - len(data))
+    return data
+
+
+def get_challenge(request: bytes) -> bytes:
+    # Skip length, request type, protocol/encoding version, game version and both game names
+    start = 9
+    for _ in range(2):
+        start = request.index(b'\x00', start) + 1
+    return request[start:start + 8]
+
+
+# Note: responses are encrypted with the cipher under test, so these tests only cover the protocol flow and the
+# cipher's self-consistency, not compatibility with real principals (no captured responses are available)
+def build_list_response(challenge: bytes, server_list: bytes) -> bytes:
+    header = bytes([4 ^ 0xEC]) + b'junk' + bytes([len(SERVER_KEY) ^ 0xEA]) + SERVER_KEY
+    return header + ListCipher(GAME_KEY.encode(), challenge, SERVER_KEY).encrypt(server_list)
+
+
+class ListCipherTest(unittest.TestCase):
+    def test_round_trip(self):
+        plain = bytes(range(256)) * 4
+        encrypted = ListCipher(b'a-key', b'12345678', SERVER_KEY).encrypt(plain)
+        self.assertNotEqual(plain, encrypted)
+        self.assertEqual(plain, ListCipher(b'a-key', b'12345678', SERVER_KEY).decrypt(encrypted))
+
+
+class BuildValidateTest(unittest.TestCase):
+    def test_enc_type_0(self):
+        actual = build_validate(b'ABCDEF', b'HpWx9z', 0)
+        self.assertEqual(8, len(actual))
+        # Same challenge and key, same validate
+        self.assertEqual(actual, build_validate(b'ABCDEF', b'HpWx9z', 0))
+
+    def test_enc_type_2(self):
+        self.assertNotEqual(build_validate(b'ABCDEF', b'HpWx9z', 0), build_validate(b'ABCDEF', b'HpWx9z', 2))
+
+    def test_unsupported(self):
+        self.assertRaises(GamespyMasterError, build_validate, b'ABCDEF', b'HpWx9z', 1)
+
+
+class ListParserTest(unittest.TestCase):
+    def test_feed_incremental(self):
+        # GIVEN a server list
+        server_list = build_server_list(
+            build_server_entry(0, '1.1.1.1'),
+            build_server_entry(NONSTANDARD_PORT_FLAG | HAS_KEYS_FLAG, '1.1.1.2', 29901, b'a-name'),
+            build_server_entry(PRIVATE_IP_FLAG | HAS_KEYS_FLAG, '1.1.1.3')
+        )
+
+        # WHEN the list is fed to the parser byte by byte
+        parser = ListParser()
+        actual = []
+        for i in range(len(server_list)):
+            actual.extend(parser.feed(server_list[i:i + 1]))
+
+        # THEN
+        # All servers are parsed
+        self.assertEqual([('1.1.1.1', 29900), ('1.1.1.2', 29901), ('1.1.1.3', 29900)], actual)
+        self.assertTrue(parser.done)
+
+    def test_feed_error(self):
+        parser = ListParser()
+        data = socket.inet_aton('127.0.0.1') + b'\xff\xff' + b'an-error\x00'
+        self.assertRaises(GamespyMasterError, list, parser.feed(data))
+
+
+class ListServersTest(unittest.TestCase):
+    def test_list_servers(self):
+        # GIVEN a master server responding with a server list in small chunks
+        requests = []
+
+        def handle(connection: socket.socket):
+            request = receive_list_request(connection)
+            requests.append(request)
+            response = build_list_response(get_challenge(request), build_server_list(
+                build_server_entry(HAS_KEYS_FLAG, '1.1.1.1', hostname=b'a-name'),
+                build_server_entry(NONSTANDARD_PORT_FLAG | HAS_KEYS_FLAG, '1.1.1.2', 29901)
+            ))
+            for i in range(0, len(response), 7):
+                connection.sendall(response[i:i + 7])
+
+        master = StubMaster(handle)
+        self.addCleanup(master.close)
+
+        # WHEN servers are listed
+        actual = list_servers(master.address, 'battlefield2', GAME_KEY, 'numplayers>0', '\\hostname', timeout=5)
+
+        # THEN
+        # All servers are returned, and the request contains the game, filter and fields
+        self.assertEqual([('1.1.1.1', 29900), ('1.1.1.2', 29901)], actual)
+        self.assertIn(b'battlefield2\x00battlefield2\x00', requests[0])
+        self.assertTrue(requests[0].endswith(b'numplayers>0\x00\\hostname\x00\x00\x00\x00\x01'))
+
+    def test_list_servers_closed(self):
+        # GIVEN a master server closing the connection without sending a complete list
+        def handle(connection: socket.socket):
+            request = receive_list_request(connection)
+            connection.sendall(build_list_response(get_challenge(request), build_server_list()[:-1]))
+
+        master = StubMaster(handle)
+        self.addCleanup(master.close)
+
+        # WHEN/THEN
+        self.assertRaises(GamespyMasterError, list_servers, master.address, 'battlefield2', GAME_KEY, timeout=5)
+
+
+class ListServersLegacyTest(unittest.TestCase):
+    def test_list_servers_legacy(self):
+        # GIVEN a master server validating the client and responding with a server list
+        requests = []
+
+        def handle(connection: socket.socket):
+            connection.sendall(b'\\basic\\\\secure\\ABCDEF')
+            request = b''
+            while not request.endswith(b'\\list\\cmp\\gamename\\ut\\final\\'):
+                request += connection.recv(1024)
+            requests.append(request)
+            connection.sendall(socket.inet_aton('1.1.1.1') + struct.pack('>H', 7778))
+            connection.sendall(socket.inet_aton('1.1.1.2') + struct.pack('>H', 7788) + b'\\final\\')
+
+        master = StubMaster(handle)
+        self.addCleanup(master.close)
+
+        # WHEN servers are listed
+        actual = list_servers_legacy(master.address, 'ut', 'Z5Nfb0', 0, timeout=5)
+
+        # THEN
+        # All servers are returned and the client validated itself
+        self.assertEqual([('1.1.1.1', 7778), ('1.1.1.2', 7788)], actual)
+        validate = build_validate(b'ABCDEF', b'Z5Nfb0', 0)
+        self.assertTrue(requests[0].startswith(b'\\gamename\\ut\\enctype\\0\\validate\\' + validate + b'\\final\\'))
+
+    def test_list_servers_legacy_error(self):
+        # GIVEN a master server rejecting the client
+        def handle(connection: socket.socket):
+            connection.sendall(b'\\basic\\\\secure\\ABCDEF')
+            connection.recv(1024)
+            connection.sendall(b'\\error\\invalid validate\\final\\')
+
+        master = StubMaster(handle)
+        self.addCleanup(master.close)
+
+        # WHEN/THEN
+        self.assertRaises(GamespyMasterError, list_servers_legacy, master.address, 'ut', 'Z5Nfb0', 0, timeout=5)
+
+
+if __name__ == '__main__':
+    unittest.main()
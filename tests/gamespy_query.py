@@ -0,0 +1,134 @@
+import socket
+import threading
+import time
+import unittest
+from typing import Callable, List
+
+from GameserverLister.protocols.gamespy_query import GamespyQueryEngine, parse_key_values, \
+    parse_backslash_key_values
+
+
+class StubServer:
+    """
+    Local UDP game server, replying to each packet with the packets returned by the given handler
+    """
+    sock: socket.socket
+    handler: Callable[[bytes], List[bytes]]
+    received: List[bytes]
+
+    def __init__(self, handler: Callable[[bytes], List[bytes]]):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(('127.0.0.1', 0))
+        self.handler = handler
+        self.received = []
+        threading.Thread(target=self.serve, daemon=True).start()
+
+    @property
+    def address(self):
+        return self.sock.getsockname()
+
+    def serve(self):
+        while True:
+            try:
+                data, address = self.sock.recvfrom(65535)
+            except OSError:
+                return
+            self.received.append(data)
+            for packet in self.handler(data):
+                self.sock.sendto(packet, address)
+
+    def close(self):
+        self.sock.close()
+
+
+class GamespyQueryEngineTest(unittest.TestCase):
+    def start_server(self, handler: Callable[[bytes], List[bytes]]) -> StubServer:
+        server = StubServer(handler)
+        self.addCleanup(server.close)
+        return server
+
+    def test_gamespy1(self):
+        # GIVEN a server responding with two packets (in reverse order)
+        server = self.start_server(lambda data: [
+            b'\\mapname\\dm-deck16\\final\\\\queryid\\42.2',
+            b'\\hostname\\A Server\\hostport\\7777\\queryid\\42.1'
+        ])
+
+        # WHEN the server is queried
+        actual = GamespyQueryEngine(0, timeout=1).query(server.address)
+
+        # THEN
+        # Response packets are combined
+        self.assertEqual({'hostname': 'A Server', 'hostport': '7777', 'mapname': 'dm-deck16'}, actual)
+        self.assertEqual([b'\\status\\'], server.received)
+
+    def test_gamespy2(self):
+        # GIVEN a server responding to info queries
+        def handle(data: bytes) -> List[bytes]:
+            return [b'\x00' + data[3:7] + b'hostname\x00A Server\x00gamename\x00battlefield2\x00\x00\x00\x01']
+
+        server = self.start_server(handle)
+
+        # WHEN the server is queried
+        actual = GamespyQueryEngine(8, timeout=1).query(server.address)
+
+        # THEN
+        # Server info is parsed
+        self.assertEqual({'hostname': 'A Server', 'gamename': 'battlefield2'}, actual)
+        self.assertEqual(b'\xfe\xfd\x00', server.received[0][:3])
+        self.assertEqual(b'\xff\x00\x00', server.received[0][7:])
+
+    def test_gamespy3(self):
+        # GIVEN a server requiring a challenge and responding with split packets
+        def handle(data: bytes) -> List[bytes]:
+            session_id = data[3:7]
+            if data[2] == 0x09:
+                return [b'\x09' + session_id + b'-123456\x00']
+            return [
+                b'\x00' + session_id + b'splitnum\x00\x81\x00' + b'p1073741826\x00b\x00\x00',
+                b'\x00' + session_id + b'splitnum\x00\x00\x00' + b'hostname\x00A Server\x00p1073741825\x00a\x00\x00'
+            ]
+
+        server = self.start_server(handle)
+
+        # WHEN the server is queried
+        actual = GamespyQueryEngine(11, timeout=1).query(server.address)
+
+        # THEN
+        # Challenge is sent back with the info query and all packets are combined
+        self.assertEqual({'hostname': 'A Server', 'p1073741825': 'a', 'p1073741826': 'b'}, actual)
+        self.assertEqual((-123456).to_bytes(4, 'big', signed=True), server.received[1][7:11])
+
+    def test_query_all(self):
+        # GIVEN a responding and a silent server
+        responding = self.start_server(lambda data: [b'\\hostname\\A Server\\final\\'])
+        silent = self.start_server(lambda data: [])
+
+        # WHEN both servers are queried (with more servers than concurrent queries)
+        started = time.monotonic()
+        actual = GamespyQueryEngine(0, concurrency=1, timeout=0.2).query_all(
+            [silent.address, responding.address, silent.address]
+        )
+        elapsed = time.monotonic() - started
+
+        # THEN
+        # Results are returned in order, with the silent server timing out once
+        self.assertEqual([None, {'hostname': 'A Server'}, None], actual)
+        self.assertLess(elapsed, 1.0)
+
+    def test_unsupported(self):
+        self.assertRaises(ValueError, GamespyQueryEngine, 1)
+
+
+class ParseKeyValuesTest(unittest.TestCase):
+    def test_parse_key_values(self):
+        self.assertEqual({'hostname': 'a', 'numplayers': '0'},
+                         parse_key_values(b'HostName\x00a\x00numplayers\x000\x00\x00\x01player_\x00'))
+
+    def test_parse_backslash_key_values(self):
+        self.assertEqual({'hostname': 'a', 'hostport': '7777'},
+                         parse_backslash_key_values(b'\\hostname\\a\\hostport\\7777\\final\\\\queryid\\1.1'))
+
+
+if __name__ == '__main__':
+    unittest.main()
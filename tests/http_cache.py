@@ -0,0 +1,79 @@
+import os
+import tempfile
+import unittest
+
+import requests
+
+from GameserverLister.common.http_cache import HttpCache
+
+
+def build_response(content: bytes, headers: dict) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response.headers.update(headers)
+    response._content = content
+    return response
+
+
+class HttpCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = HttpCache(os.path.join(self.directory.name, 'http-cache'))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_store(self):
+        # WHEN a response with validators is stored
+        self.cache.store('https://a-url', build_response(b'a-body', {
+            'ETag': '"a-etag"',
+            'Last-Modified': 'Mon, 01 Jan 2024 12:00:00 GMT'
+        }))
+
+        # THEN
+        # Requests are made conditional and the body is cached
+        self.assertEqual({
+            'If-None-Match': '"a-etag"',
+            'If-Modified-Since': 'Mon, 01 Jan 2024 12:00:00 GMT'
+        }, self.cache.get_conditional_headers('https://a-url'))
+        self.assertEqual(b'a-body', self.cache.load_body('https://a-url'))
+        # Other urls are not affected
+        self.assertEqual({}, self.cache.get_conditional_headers('https://b-url'))
+        self.assertIsNone(self.cache.load_body('https://b-url'))
+
+    def test_store_without_validators(self):
+        # WHEN a response without validators is stored
+        self.cache.store('https://a-url', build_response(b'a-body', {}))
+
+        # THEN
+        # Response is not cached
+        self.assertEqual({}, self.cache.get_conditional_headers('https://a-url'))
+        self.assertIsNone(self.cache.load_body('https://a-url'))
+
+    def test_missing_body(self):
+        # GIVEN a cached response
+        self.cache.store('https://a-url', build_response(b'a-body', {'ETag': '"a-etag"'}))
+
+        # WHEN the cached body is deleted
+        os.remove(self.cache.get_entry_path('https://a-url', 'body'))
+
+        # THEN
+        # Requests are no longer conditional
+        self.assertEqual({}, self.cache.get_conditional_headers('https://a-url'))
+
+    def test_invalidate(self):
+        # GIVEN a cached response
+        self.cache.store('https://a-url', build_response(b'a-body', {'ETag': '"a-etag"'}))
+
+        # WHEN the cached response is invalidated (twice)
+        self.cache.invalidate('https://a-url')
+        self.cache.invalidate('https://a-url')
+
+        # THEN
+        # Response is no longer cached
+        self.assertEqual({}, self.cache.get_conditional_headers('https://a-url'))
+        self.assertIsNone(self.cache.load_body('https://a-url'))
+
+
+if __name__ == '__main__':
+    unittest.main()
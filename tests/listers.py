@@ -0,0 +1,721 @@
+import json
+import os
+import socket
+import struct
+import tempfile
+import threading
+import time
+import unittest
+from collections import Counter
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import List, Dict, Union, Tuple
+
+import pyq3serverlist
+import pyvpsq
+
+from GameserverLister.common.game_port_cache import GamePortCache, GamePortCacheEntry
+from GameserverLister.common.servers import BadCompany2Server, GametoolsServer, ClassicServer, ViaStatus, \
+    FrostbiteServer
+from GameserverLister.common.store import ServerStore
+from GameserverLister.common.types import BattlelogGame, BattlelogPlatform, GametoolsGame, GametoolsPlatform, \
+    StoreBackend, Quake3Game, ValveGame, ValvePrincipal, QueryPortProber
+from GameserverLister.listers import BattlelogServerLister, GametoolsServerLister, BadCompany2ServerLister, \
+    Quake3ServerLister, ValveServerLister
+from GameserverLister.listers.bfbc2 import SERVER_LIST_URL
+
+
+class FakeResponse:
+    status_code: int
+    data: Union[dict, list]
+    headers: Dict[str, str]
+
+    def __init__(self, data: Union[dict, list], status_code: int = 200, headers: Dict[str, str] = None):
+        self.data = data
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    @property
+    def content(self) -> bytes:
+        return json.dumps(self.data).encode('utf-8')
+
+    def json(self) -> Union[dict, list]:
+        return self.data
+
+
+class FakeSession:
+    responses: List[FakeResponse]
+    requests: int
+    headers: List[Dict[str, str]]
+    lock: threading.Lock
+
+    def __init__(self, responses: List[FakeResponse]):
+        self.responses = responses
+        self.requests = 0
+        self.headers = []
+        self.lock = threading.Lock()
+
+    def get(self, url: str, headers: Dict[str, str] = None, **kwargs) -> FakeResponse:
+        # Pages are requested from multiple threads when crawling concurrently
+        with self.lock:
+            response = self.responses[min(self.requests, len(self.responses) - 1)]
+            self.requests += 1
+            self.headers.append(headers or {})
+        return response
+
+
+def battlelog_page(*guids: str) -> dict:
+    return {'data': [
+        {'guid': guid, 'name': f'{guid}-name', 'ip': '' if guid.startswith('private') else '1.1.1.1', 'port': 25200}
+        for guid in guids
+    ]}
+
+
+class BattlelogServerListerTest(unittest.TestCase):
+    def setUp(self):
+        self.list_dir = tempfile.TemporaryDirectory()
+        self.lister = self.build_lister(1)
+
+    def build_lister(self, concurrency: int, coverage_target: float = 0) -> BattlelogServerLister:
+        return BattlelogServerLister(BattlelogGame.BF3, BattlelogPlatform.PC, 2, True, 12.0, False, False, False,
+                                     False, False, False, StoreBackend.JSON, self.list_dir.name, 0, 3, concurrency, 0,
+                                     coverage_target, False)
+
+    def tearDown(self):
+        self.list_dir.cleanup()
+
+    def test_get_page_servers(self):
+        # WHEN a page containing a public and a private server is parsed
+        page_servers = self.lister.get_page_servers(battlelog_page('a-guid', 'private-guid'))
+
+        # THEN
+        # Private servers are ignored
+        self.assertEqual(['a-guid'], [server.uid for server in page_servers])
+
+    def test_add_page_found_servers(self):
+        # GIVEN servers found on a previous page
+        found_servers = self.lister.add_page_found_servers(
+            ServerStore(),
+            self.lister.get_page_servers(battlelog_page('a-guid', 'b-guid'))
+        )
+        seen_at = datetime.now().astimezone() - timedelta(minutes=5)
+        found_servers.get('a-guid').last_seen_at = seen_at
+
+        # WHEN a page containing duplicates, a new and a private server is added
+        found_servers = self.lister.add_page_found_servers(
+            found_servers,
+            self.lister.get_page_servers(battlelog_page('a-guid', 'c-guid', 'private-guid', 'c-guid'))
+        )
+
+        # THEN
+        # New servers are added once (in order), private servers are ignored
+        self.assertEqual(['a-guid', 'b-guid', 'c-guid'], list(found_servers.uids()))
+        # Last seen at of duplicates is updated
+        self.assertGreater(found_servers.get('a-guid').last_seen_at, seen_at)
+
+    def test_update_server_list_page_limit(self):
+        # GIVEN pages returning a new server on the second page and nothing but duplicates afterwards
+        self.lister.session = FakeSession([
+            FakeResponse(battlelog_page('a-guid', 'b-guid')),
+            FakeResponse(battlelog_page('b-guid', 'c-guid')),
+            FakeResponse(battlelog_page('a-guid', 'c-guid'))
+        ])
+
+        # WHEN the server list is updated
+        self.lister.update_server_list()
+
+        # THEN
+        # Retrieval stops after [page_limit] pages without any new servers
+        self.assertEqual(4, self.lister.session.requests)
+        self.assertEqual(['a-guid', 'b-guid', 'c-guid'], list(self.lister.servers.uids()))
+
+    def test_update_server_list_coverage_target(self):
+        # GIVEN a lister with a coverage target and pages returning the same servers over and over again
+        lister = self.build_lister(1, 0.99)
+        lister.session = FakeSession([FakeResponse(battlelog_page('a-guid', 'b-guid', 'c-guid'))])
+
+        # WHEN the server list is updated
+        lister.update_server_list()
+
+        # THEN
+        # Retrieval stops once all servers have been seen twice, well before reaching [page_limit]
+        self.assertEqual(2, lister.session.requests)
+        self.assertEqual(['a-guid', 'b-guid', 'c-guid'], list(lister.servers.uids()))
+
+    def test_update_server_list_concurrent(self):
+        # GIVEN a concurrent lister and pages returning new servers on the first ten pages
+        lister = self.build_lister(4)
+        lister.session = FakeSession(
+            [FakeResponse(battlelog_page(f'{i}-guid', 'a-guid')) for i in range(10)] +
+            [FakeResponse(battlelog_page('a-guid'))]
+        )
+
+        # WHEN the server list is updated
+        lister.update_server_list()
+
+        # THEN
+        # All servers are found and retrieval stops after [page_limit] pages without new servers
+        # (plus any requests in flight at that time)
+        self.assertEqual(11, len(lister.servers))
+        self.assertGreaterEqual(lister.session.requests, 12)
+        self.assertLessEqual(lister.session.requests, 12 + 3)
+
+    def test_session_pool_size(self):
+        # GIVEN a lister requesting pages concurrently
+        lister = self.build_lister(8)
+
+        # WHEN/THEN
+        # Session allows as many connections as pages requested in parallel
+        self.assertEqual(8, lister.session.get_adapter('https://battlelog.battlefield.com')._pool_maxsize)
+        self.assertEqual(4, lister.recovery_concurrency)
+
+    def test_build_query_port_offset_index(self):
+        # GIVEN servers on two ips, some with a known query port
+        self.lister.servers.add(FrostbiteServer('a', 'a', '1.1.1.1', 25200, 25300))
+        self.lister.servers.add(FrostbiteServer('b', 'b', '1.1.1.1', 25201, 25301))
+        self.lister.servers.add(FrostbiteServer('c', 'c', '1.1.1.1', 25202, 47200))
+        self.lister.servers.add(FrostbiteServer('d', 'd', '1.1.1.1', 25203))
+        self.lister.servers.add(FrostbiteServer('e', 'e', '2.2.2.2', 25200, 25206))
+
+        # WHEN the offset index is built
+        actual = self.lister.build_query_port_offset_index()
+
+        # THEN
+        self.assertEqual({'1.1.1.1': Counter({100: 2, 21998: 1}), '2.2.2.2': Counter({6: 1})}, actual)
+
+    def test_build_server_ports_to_try(self):
+        # GIVEN a server with a known query port on an ip whose servers use various offsets
+        server = FrostbiteServer('a', 'a', '1.1.1.1', 25200, 25250)
+
+        # WHEN candidate ports are built
+        actual = self.lister.build_server_ports_to_try(server, Counter({5: 1, 100: 3, 50: 1, 21998: 2}))
+
+        # THEN
+        # Current query port is tried first, then offsets by how often they are used and the default port
+        # (without duplicates)
+        self.assertEqual([25250, 25300, 47198, 25205, 47200], actual[:5])
+        self.assertEqual(6, len(actual))
+        self.assertEqual(len(actual), len(set(actual)))
+
+    def test_build_server_ports_to_try_learned(self):
+        # GIVEN offset statistics from previous runs, with the server's subnet using an offset rarely used elsewhere
+        for _ in range(10):
+            self.lister.query_port_stats.record('2.2.2.2', 22000, True)
+            self.lister.query_port_stats.record('3.3.3.3', 22000, False)
+        for _ in range(5):
+            self.lister.query_port_stats.record('1.1.1.1', 22000, False)
+            self.lister.query_port_stats.record('1.1.1.1', 6, True)
+        self.lister.query_port_stats.record('4.4.4.4', 6, False)
+        server = FrostbiteServer('a', 'a', '1.1.1.2', 25200)
+
+        # WHEN candidate ports are built
+        actual = self.lister.build_server_ports_to_try(server, Counter())
+
+        # THEN
+        # Learned offsets are tried by their probability for the server's subnet, before any remaining ports
+        self.assertEqual([25206, 47200], actual[:2])
+        self.assertEqual(6, len(set(actual)))
+
+    def test_build_server_ports_to_try_unknown(self):
+        # GIVEN a server without a query port on an ip without any known offsets
+        server = FrostbiteServer('a', 'a', '1.1.1.1', 25200)
+
+        # WHEN candidate ports are built
+        actual = self.lister.build_server_ports_to_try(server, Counter())
+
+        # THEN
+        # Default port is tried first, followed by (valid) ports from the port to try list
+        self.assertEqual(47200, actual[0])
+        self.assertEqual(6, len(set(actual)))
+        self.assertTrue(all(0 < port < 65536 for port in actual))
+
+    def test_record_query_port_offsets(self):
+        # GIVEN a server whose known query port is found again and a server found via an absolute port
+        known = FrostbiteServer('a', 'a', '1.1.1.1', 25200, 25300)
+        moved = FrostbiteServer('b', 'b', '1.1.1.2', 25300)
+
+        # WHEN the search results are recorded
+        self.lister.record_query_port_offsets([known, moved], [[25300, 47200], [25305, 34567, 47200]], [25300, 47200],
+                                              QueryPortProber.NATIVE, {})
+
+        # THEN
+        # Re-confirmed query ports as well as absolute/random candidates are not recorded, misses of offsets are
+        self.assertEqual({5: (1, 0)}, {offset: (counts.tries, counts.hits)
+                                       for (offset, counts) in self.lister.query_port_stats.game.items()})
+
+    def test_record_query_port_offsets_bounded(self):
+        # GIVEN servers in a few subnets, some of which are found via offsets and some via absolute/random ports
+        for i in range(60):
+            self.lister.servers.add(FrostbiteServer(f'{i}-guid', str(i), f'1.1.{i % 6}.{i}', 25200 + i))
+
+        def probe_query_ports(servers: List[FrostbiteServer], ports_to_try: List[List[int]], _) -> List[int]:
+            return [
+                [server.game_port + 100, server_ports[-1], -1][int(server.uid.split('-')[0]) % 3]
+                for server, server_ports in zip(servers, ports_to_try)
+            ]
+
+        self.lister.probe_query_ports = probe_query_ports
+
+        # WHEN query ports are searched repeatedly (with servers having lost their query port in between)
+        sizes = []
+        for _ in range(10):
+            for server in self.lister.servers:
+                server.query_port = -1
+            self.lister.find_query_ports(QueryPortProber.NATIVE, '', 1, 8, 12.0)
+            sizes.append(os.path.getsize(self.lister.query_port_stats.path))
+
+        # THEN
+        # Statistics only contain fixed offsets which matched and stop growing (beyond counts gaining digits)
+        with open(self.lister.query_port_stats.path, 'r') as file:
+            parsed = json.load(file)
+        self.assertTrue({int(offset) for offset in parsed['game']}.issubset(self.lister.get_query_port_offsets()))
+        self.assertLessEqual(len(parsed['subnets']), 6)
+        self.assertLessEqual(sizes[-1], sizes[4] * 1.1, sizes)
+
+    def test_update_server_list_max_attempts(self):
+        # GIVEN a server responding with errors only
+        self.lister.session = FakeSession([FakeResponse({}, 403)])
+
+        # WHEN the server list is updated
+        self.lister.update_server_list()
+
+        # THEN
+        # Retrieval stops after [max_attempts] attempts
+        self.assertEqual(3, self.lister.session.requests)
+
+
+class GametoolsServerListerTest(unittest.TestCase):
+    def test_add_page_found_servers(self):
+        with tempfile.TemporaryDirectory() as list_dir:
+            # GIVEN a lister ignoring official servers
+            lister = GametoolsServerLister(GametoolsGame.BF1, GametoolsPlatform.PC, 2, True, 12.0, False, False,
+                                           False, False, False, False, StoreBackend.JSON, list_dir, 0, 3, 1, 0, 0,
+                                           False, False)
+
+            # WHEN a page containing duplicates and official servers is added
+            found_servers = lister.add_page_found_servers(ServerStore(), lister.get_page_servers({'servers': [
+                {'gameId': 'a-game-id', 'prefix': 'a-name', 'official': False},
+                {'gameId': 'b-game-id', 'prefix': 'b-name', 'official': True},
+                {'gameId': 'a-game-id', 'prefix': 'a-name', 'official': False}
+            ]}))
+
+            # THEN
+            # Only non-official servers are added (once)
+            self.assertEqual(['a-game-id'], list(found_servers.uids()))
+
+    def test_check_expired_servers(self):
+        with tempfile.TemporaryDirectory() as list_dir:
+            # GIVEN a lister ignoring official servers, which has seen an official server
+            lister = GametoolsServerLister(GametoolsGame.BF1, GametoolsPlatform.PC, 2, True, 12.0, False, False,
+                                           False, False, False, False, StoreBackend.JSON, list_dir, 0, 3, 1, 0, 0,
+                                           False, False)
+            lister.session = FakeSession([FakeResponse({'official': False})])
+            lister.get_page_servers({'servers': [{'gameId': 'a-game-id', 'prefix': 'a-name', 'official': True}]})
+
+            # WHEN expired servers are checked
+            actual = lister.check_expired_servers([
+                GametoolsServer('a-game-id', 'a-name'),
+                GametoolsServer('b-game-id', 'b-name')
+            ])
+
+            # THEN
+            # Official server is not found without sending a request, other server is checked individually
+            self.assertEqual([(True, False), (True, True)], actual)
+            self.assertEqual(1, lister.session.requests)
+
+
+class BadCompany2ServerListerTest(unittest.TestCase):
+    def setUp(self):
+        self.list_dir = tempfile.TemporaryDirectory()
+        self.servers = [
+            {'LID': 257, 'GID': 1, 'N': 'a-name', 'I': '1.1.1.1', 'P': 19567},
+            {'LID': 257, 'GID': 2, 'N': 'b-name', 'I': '1.1.1.2', 'P': 19567}
+        ]
+
+    def tearDown(self):
+        self.list_dir.cleanup()
+
+    def build_lister(self, session: FakeSession) -> BadCompany2ServerLister:
+        lister = BadCompany2ServerLister(True, 12.0, True, False, False, False, False, False, StoreBackend.JSON,
+                                         self.list_dir.name, 5.0)
+        lister.session = session
+        return lister
+
+    def test_update_server_list_not_modified(self):
+        # GIVEN a server list retrieved (and cached) in a previous run
+        lister = self.build_lister(FakeSession([FakeResponse(self.servers, headers={'ETag': '"a-etag"'})]))
+        lister.update_server_list()
+        lister.write_to_file()
+        seen_at = datetime.now().astimezone() - timedelta(minutes=5)
+        for server in lister.servers:
+            server.last_seen_at = seen_at
+        lister.write_to_file()
+
+        # WHEN the list is requested again and was not modified
+        lister = self.build_lister(FakeSession([FakeResponse({}, 304)]))
+        lister.update_server_list()
+
+        # THEN
+        # Request was conditional
+        self.assertEqual({'If-None-Match': '"a-etag"'}, lister.session.headers[0])
+        # Cached servers are marked as seen without any changes
+        self.assertEqual(2, len(lister.servers))
+        self.assertTrue(all(server.last_seen_at > seen_at for server in lister.servers))
+        self.assertEqual({}, lister.changes.added)
+        self.assertEqual({}, lister.changes.updated)
+
+    def test_update_server_list_not_modified_unknown(self):
+        # GIVEN a cached server list, with servers no longer being in the list file
+        lister = self.build_lister(FakeSession([FakeResponse(self.servers, headers={'ETag': '"a-etag"'})]))
+        lister.update_server_list()
+
+        # WHEN the list is requested again and was not modified
+        lister = self.build_lister(FakeSession([FakeResponse({}, 304)]))
+        lister.update_server_list()
+
+        # THEN
+        # Servers are added from the cached list
+        self.assertEqual(2, len(lister.servers))
+        self.assertEqual(2, len(lister.changes.added))
+
+    def test_update_server_list_not_modified_without_cache(self):
+        # GIVEN no cached server list
+        # WHEN the list is requested and the API responds with "not modified"
+        lister = self.build_lister(FakeSession([FakeResponse({}, 304), FakeResponse(self.servers)]))
+        lister.update_server_list()
+
+        # THEN
+        # List is requested again (unconditionally) and servers are added
+        self.assertEqual(2, lister.session.requests)
+        self.assertEqual({}, lister.session.headers[1])
+        self.assertEqual(2, len(lister.servers))
+
+    def test_update_server_list_not_modified_corrupt_cache(self):
+        # GIVEN a cached server list whose body got corrupted
+        lister = self.build_lister(FakeSession([FakeResponse(self.servers, headers={'ETag': '"a-etag"'})]))
+        lister.update_server_list()
+        with open(lister.http_cache.get_entry_path(SERVER_LIST_URL, 'body'), 'wb') as file:
+            file.write(b'[{"LID": 257, "GI')
+
+        # WHEN the list is requested again and the API responds with "not modified"
+        lister = self.build_lister(FakeSession([FakeResponse({}, 304), FakeResponse(self.servers)]))
+        lister.update_server_list()
+
+        # THEN
+        # Cache entry is dropped and the list is requested again (unconditionally)
+        self.assertEqual({'If-None-Match': '"a-etag"'}, lister.session.headers[0])
+        self.assertEqual({}, lister.session.headers[1])
+        self.assertEqual(2, len(lister.servers))
+
+    def test_update_server_list_not_modified_attempts(self):
+        # GIVEN no cached server list
+        # WHEN the API keeps responding with "not modified"
+        lister = self.build_lister(FakeSession([FakeResponse({}, 304)]))
+
+        # THEN
+        # Retrieval gives up after [max_attempts] attempts
+        with self.assertRaises(SystemExit):
+            lister.update_server_list()
+        self.assertEqual(3, lister.session.requests)
+
+    def test_check_expired_servers(self):
+        # GIVEN a retrieved server list
+        lister = self.build_lister(FakeSession([FakeResponse(self.servers), FakeResponse({}, 404)]))
+        lister.update_server_list()
+
+        # WHEN expired servers are checked, one of which has the lobby and game id of a listed server
+        actual = lister.check_expired_servers([
+            BadCompany2Server('a-guid', 'a-name', 257, 1, '1.1.1.3', 19567),
+            BadCompany2Server('c-guid', 'c-name', 257, 3, '1.1.1.4', 19567)
+        ])
+
+        # THEN
+        # Listed server is found without sending another request, other server is checked individually
+        self.assertEqual([(True, True), (True, False)], actual)
+        self.assertEqual(2, lister.session.requests)
+
+
+class StubQuake3Principal:
+    """
+    Local Quake3 principal, responding to getservers requests with the servers listed for the requested protocol
+    (after the given delay)
+    """
+    sock: socket.socket
+    servers: Dict[int, List[Tuple[str, int]]]
+    delay: float
+
+    def __init__(self, servers: Dict[int, List[Tuple[str, int]]], delay: float):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(('127.0.0.1', 0))
+        self.servers = servers
+        self.delay = delay
+        threading.Thread(target=self.serve, daemon=True).start()
+
+    @property
+    def port(self) -> int:
+        return self.sock.getsockname()[1]
+
+    def serve(self):
+        while True:
+            try:
+                data, address = self.sock.recvfrom(1024)
+            except OSError:
+                return
+            threading.Thread(target=self.respond, args=(data, address), daemon=True).start()
+
+    def respond(self, data: bytes, address: Tuple[str, int]):
+        protocol = int(data.split(b' ')[1])
+        response = b'\xff' * 4 + b'getserversResponse'
+        for ip, port in self.servers[protocol]:
+            response += b'\\' + socket.inet_aton(ip) + struct.pack('>H', port)
+        time.sleep(self.delay)
+        self.sock.sendto(response + b'\\EOF', address)
+
+    def close(self):
+        self.sock.close()
+
+
+class Quake3ServerListerTest(unittest.TestCase):
+    def test_update_server_list(self):
+        with tempfile.TemporaryDirectory() as list_dir:
+            # GIVEN a principal responding slowly, listing some servers for multiple protocols
+            principal = StubQuake3Principal({
+                1: [('1.1.1.1', 28960), ('1.1.1.2', 28960)],
+                2: [('1.1.1.2', 28960), ('1.1.1.3', 28960)],
+                4: [('1.1.1.1', 28960), ('0.0.0.0', 0)]
+            }, 0.3)
+            self.addCleanup(principal.close)
+            lister = Quake3ServerLister(Quake3Game.CoD, ['activision'], True, 12.0, False, False, False, False,
+                                        False, False, StoreBackend.JSON, list_dir)
+            lister.protocols = [1, 2, 4]
+            lister.build_principal_server = lambda _: pyq3serverlist.PrincipalServer('127.0.0.1', principal.port)
+
+            # WHEN the server list is updated
+            started = time.monotonic()
+            lister.update_server_list()
+            elapsed = time.monotonic() - started
+
+            # THEN
+            # Protocols are queried concurrently and servers are merged without duplicates
+            self.assertLess(elapsed, 0.8)
+            self.assertEqual(['1.1.1.1', '1.1.1.2', '1.1.1.3'], sorted(server.ip for server in lister.servers))
+
+    def test_update_server_list_multiple_principals(self):
+        with tempfile.TemporaryDirectory() as list_dir:
+            # GIVEN two principals responding slowly, listing some of the same servers
+            principals = {
+                'activision': StubQuake3Principal({
+                    1: [('1.1.1.1', 28960), ('1.1.1.2', 28960)],
+                    2: [('1.1.1.2', 28960)]
+                }, 0.3),
+                'cod.pm': StubQuake3Principal({
+                    1: [('1.1.1.2', 28960)],
+                    2: [('1.1.1.3', 28960)]
+                }, 0.3)
+            }
+            for principal in principals.values():
+                self.addCleanup(principal.close)
+            lister = Quake3ServerLister(Quake3Game.CoD, list(principals.keys()), True, 12.0, False, True, False,
+                                        False, False, False, StoreBackend.JSON, list_dir)
+            lister.protocols = [1, 2]
+            lister.build_principal_server = \
+                lambda name: pyq3serverlist.PrincipalServer('127.0.0.1', principals[name].port)
+
+            # WHEN the server list is updated
+            started = time.monotonic()
+            lister.update_server_list()
+            elapsed = time.monotonic() - started
+
+            # THEN
+            # Principals are queried concurrently and servers are merged, keeping track of every principal listing them
+            self.assertLess(elapsed, 0.8)
+            vias = {server.ip: sorted(via.principal for via in server.via) for server in lister.servers}
+            self.assertEqual({
+                '1.1.1.1': ['activision'],
+                '1.1.1.2': ['activision', 'cod.pm'],
+                '1.1.1.3': ['cod.pm']
+            }, vias)
+            # Principal-scoped links are only added for servers listed by the respective principal
+            links = {server.ip: [link.site for link in server.links] for server in lister.servers}
+            self.assertEqual({'1.1.1.1': ['cod.pm'], '1.1.1.2': ['cod.pm'], '1.1.1.3': []}, links)
+
+
+class StubValvePrincipal:
+    """
+    Local Valve principal, responding to server list requests with pages of the servers listed for the requested region
+    (after the given delay)
+    """
+    sock: socket.socket
+    servers: Dict[int, List[Tuple[str, int]]]
+    page_size: int
+    delay: float
+    requests: int
+
+    def __init__(self, servers: Dict[int, List[Tuple[str, int]]], page_size: int, delay: float):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(('127.0.0.1', 0))
+        self.servers = servers
+        self.page_size = page_size
+        self.delay = delay
+        self.requests = 0
+        threading.Thread(target=self.serve, daemon=True).start()
+
+    @property
+    def port(self) -> int:
+        return self.sock.getsockname()[1]
+
+    def serve(self):
+        while True:
+            try:
+                data, address = self.sock.recvfrom(1024)
+            except OSError:
+                return
+            self.requests += 1
+            threading.Thread(target=self.respond, args=(data, address), daemon=True).start()
+
+    def respond(self, data: bytes, address: Tuple[str, int]):
+        region = data[1]
+        after = data[2:].split(b'\x00', 1)[0].decode()
+        servers = self.servers.get(region, [])
+        addresses = [f'{ip}:{port}' for ip, port in servers]
+        offset = addresses.index(after) + 1 if after in addresses else 0
+        page = servers[offset:offset + self.page_size]
+        # Terminate list with a zero address after the last page
+        if offset + self.page_size >= len(servers):
+            page = [*page, ('0.0.0.0', 0)]
+        response = b'\xff\xff\xff\xff\x66\x0a'
+        for ip, port in page:
+            response += socket.inet_aton(ip) + struct.pack('>H', port)
+        time.sleep(self.delay)
+        self.sock.sendto(response, address)
+
+    def close(self):
+        self.sock.close()
+
+
+class ValveServerListerTest(unittest.TestCase):
+    def build_lister(self, list_dir: str, principal: StubValvePrincipal, concurrency: int,
+                     rate_limit: float) -> ValveServerLister:
+        lister = ValveServerLister(ValveGame.CounterStrike, ValvePrincipal.VALVE, 2.0, '', 10, concurrency, rate_limit,
+                                   False, 64, 1.0, 24.0, True, 12.0, False, False, False, False, False, False,
+                                   StoreBackend.JSON, list_dir)
+        lister.build_principal_server = lambda: pyvpsq.PrincipalServer('127.0.0.1', principal.port, timeout=2.0)
+        return lister
+
+    def test_update_server_list(self):
+        with tempfile.TemporaryDirectory() as list_dir:
+            # GIVEN a principal responding slowly, listing some servers in multiple regions
+            principal = StubValvePrincipal({
+                pyvpsq.Region.USEast: [('1.1.1.1', 27015), ('1.1.1.2', 27015), ('1.1.1.3', 27015)],
+                pyvpsq.Region.Europe: [('1.1.1.3', 27015), ('1.1.1.4', 27015), ('0.0.0.1', 0)],
+                pyvpsq.Region.World: [('1.1.1.1', 27015), ('1.1.1.4', 27015)]
+            }, 2, 0.2)
+            self.addCleanup(principal.close)
+            lister = self.build_lister(list_dir, principal, len(pyvpsq.Region), 0)
+
+            # WHEN the server list is updated
+            started = time.monotonic()
+            lister.update_server_list()
+            elapsed = time.monotonic() - started
+
+            # THEN
+            # Regions are crawled concurrently (two pages each for US East and Europe, one page for other regions)
+            # and servers are merged without duplicates
+            self.assertLess(elapsed, 1.0)
+            self.assertEqual(len(pyvpsq.Region) + 2, principal.requests)
+            self.assertEqual(['1.1.1.1', '1.1.1.2', '1.1.1.3', '1.1.1.4'],
+                             sorted(server.ip for server in lister.servers))
+
+    def test_update_server_list_duplicates(self):
+        with tempfile.TemporaryDirectory() as list_dir:
+            # GIVEN a principal listing the same servers in multiple regions
+            principal = StubValvePrincipal({
+                pyvpsq.Region.USEast: [('1.1.1.1', 27015), ('1.1.1.2', 27015)],
+                pyvpsq.Region.Europe: [('1.1.1.2', 27015), ('1.1.1.2', 27016)],
+                pyvpsq.Region.World: [('1.1.1.1', 27015), ('1.1.1.2', 27015), ('1.1.1.2', 27016)]
+            }, 10, 0)
+            self.addCleanup(principal.close)
+            lister = self.build_lister(list_dir, principal, len(pyvpsq.Region), 0)
+            lister.add_game_port = True
+            queried = []
+
+            def get_game_ports(servers: List[ClassicServer]) -> Dict[str, int]:
+                queried.extend(server.uid for server in servers)
+                return {server.uid: server.query_port + 1 for server in servers}
+
+            lister.get_game_ports = get_game_ports
+
+            # WHEN the server list is updated
+            lister.update_server_list()
+
+            # THEN
+            # Servers are deduplicated by ip and query port before querying them for their game port
+            self.assertEqual(3, len(queried))
+            self.assertEqual(sorted(queried), sorted(lister.servers.uids()))
+            self.assertEqual([27016, 27016, 27017], sorted(server.game_port for server in lister.servers))
+
+    def test_get_game_ports(self):
+        with tempfile.TemporaryDirectory() as list_dir:
+            # GIVEN a game using distinct query ports and cached game ports (fresh, stale and failing)
+            lister = ValveServerLister(ValveGame.Arma3, ValvePrincipal.VALVE, 2.0, '', 10, 1, 0, True, 64, 1.0, 24.0,
+                                       True, 12.0, False, False, False, False, False, False, StoreBackend.JSON,
+                                       list_dir)
+            now = datetime.now().astimezone()
+            lister.game_port_cache.entries = {
+                'fresh': GamePortCacheEntry(2302, now - timedelta(hours=1)),
+                'stale': GamePortCacheEntry(2302, now - timedelta(hours=25)),
+                'failing': GamePortCacheEntry(2302, now - timedelta(hours=1), 1)
+            }
+            queried = []
+
+            def query_all(addresses: List[Tuple[str, int]]) -> list:
+                queried.extend(addresses)
+                return [SimpleNamespace(game_port=2402) if ip != '1.1.1.4' else None for ip, _ in addresses]
+
+            lister.query_engine.query_all = query_all
+            servers = [
+                ClassicServer('fresh', '1.1.1.1', 2303, ViaStatus('valve')),
+                ClassicServer('stale', '1.1.1.2', 2303, ViaStatus('valve')),
+                ClassicServer('failing', '1.1.1.3', 2303, ViaStatus('valve')),
+                ClassicServer('new', '1.1.1.4', 2303, ViaStatus('valve'))
+            ]
+
+            # WHEN game ports are retrieved
+            actual = lister.get_game_ports(servers)
+
+            # THEN
+            # Only servers without a fresh cached game port are queried (at once), servers not responding are left out
+            self.assertEqual([('1.1.1.2', 2303), ('1.1.1.3', 2303), ('1.1.1.4', 2303)], queried)
+            self.assertEqual({'fresh': 2302, 'stale': 2402, 'failing': 2402}, actual)
+            # Query results are persisted
+            cache = GamePortCache(lister.game_port_cache.path, 24.0)
+            self.assertEqual({'fresh': 2302, 'stale': 2402, 'failing': 2402}, cache.get_fresh(list(actual.keys())))
+            self.assertEqual(1, cache.entries['new'].failures)
+
+    def test_update_server_list_rate_limit(self):
+        with tempfile.TemporaryDirectory() as list_dir:
+            # GIVEN a principal listing servers in a single region
+            principal = StubValvePrincipal({
+                pyvpsq.Region.USEast: [('1.1.1.1', 27015), ('1.1.1.2', 27015), ('1.1.1.3', 27015)]
+            }, 1, 0)
+            self.addCleanup(principal.close)
+            lister = self.build_lister(list_dir, principal, len(pyvpsq.Region), 20)
+
+            # WHEN the server list is updated with a rate limit
+            started = time.monotonic()
+            lister.update_server_list()
+            elapsed = time.monotonic() - started
+
+            # THEN
+            # Requests across all regions are limited to the given rate (first request is sent right away)
+            self.assertEqual(len(pyvpsq.Region) + 2, principal.requests)
+            self.assertGreaterEqual(elapsed, (principal.requests - 1) / 20 - 0.05)
+            self.assertEqual(['1.1.1.1', '1.1.1.2', '1.1.1.3'], sorted(server.ip for server in lister.servers))
+
+
+if __name__ == '__main__':
+    unittest.main()
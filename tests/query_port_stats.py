@@ -0,0 +1,100 @@
+import os
+import tempfile
+import unittest
+
+from GameserverLister.common.query_port_stats import QueryPortOffsetStats
+
+
+class QueryPortOffsetStatsTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'query-port-offsets.json')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_record(self):
+        # GIVEN empty statistics
+        stats = QueryPortOffsetStats(self.path)
+
+        # WHEN attempts on servers in two subnets are recorded and persisted
+        stats.record('1.1.1.1', 100, True)
+        stats.record('1.1.1.2', 100, False)
+        stats.record('2.2.2.2', 22000, True)
+        stats.save()
+
+        # THEN
+        # Attempts are counted game-wide and per /24 subnet
+        actual = QueryPortOffsetStats(self.path)
+        self.assertEqual({100: (2, 1), 22000: (1, 1)},
+                         {offset: (counts.tries, counts.hits) for (offset, counts) in actual.game.items()})
+        self.assertEqual({'1.1.1': {100: 2}, '2.2.2': {22000: 1}},
+                         {subnet: {offset: counts.tries for (offset, counts) in subnet_counts.items()}
+                          for (subnet, subnet_counts) in actual.subnets.items()})
+
+    def test_get_probability(self):
+        # GIVEN statistics for an offset which is often but not always correct game-wide
+        stats = QueryPortOffsetStats(self.path)
+        for _ in range(3):
+            stats.record('1.1.1.1', 100, True)
+        stats.record('2.2.2.2', 100, False)
+
+        # WHEN probabilities are estimated for subnets with and without their own statistics
+        # THEN
+        # Game-wide rate is used for unknown subnets and adjusted by a subnet's own statistics
+        self.assertAlmostEqual(0.75, stats.get_probability('3.3.3.3', 100))
+        self.assertAlmostEqual((3 + 2 * 0.75) / (3 + 2), stats.get_probability('1.1.1.2', 100))
+        self.assertAlmostEqual((0 + 2 * 0.75) / (1 + 2), stats.get_probability('2.2.2.2', 100))
+        self.assertIsNone(stats.get_probability('1.1.1.1', 5))
+
+    def test_get_ranked_offsets(self):
+        # GIVEN a subnet using an offset which is rarely used elsewhere
+        stats = QueryPortOffsetStats(self.path)
+        for _ in range(5):
+            stats.record('1.1.1.1', 22000, True)
+            stats.record('2.2.2.2', 22000, False)
+            stats.record('2.2.2.2', 6, True)
+            stats.record('1.1.1.1', 6, False)
+        stats.record('1.1.1.1', 7, False)
+
+        # WHEN offsets are ranked for servers in either subnet
+        # THEN
+        # Offsets are ranked by their probability for the server's subnet, offsets which never matched are left out
+        self.assertEqual([22000, 6], [offset for (offset, _) in stats.get_ranked_offsets('1.1.1.2')])
+        self.assertEqual([6, 22000], [offset for (offset, _) in stats.get_ranked_offsets('2.2.2.3')])
+
+    def test_save_unmatched(self):
+        # GIVEN statistics containing offsets which never matched
+        stats = QueryPortOffsetStats(self.path)
+        stats.record('1.1.1.1', 100, True)
+        stats.record('1.1.1.1', 5, False)
+        stats.record('2.2.2.2', 5, False)
+        stats.record('2.2.2.2', 100, False)
+        stats.record('3.3.3.3', 1, False)
+
+        # WHEN the statistics are persisted
+        stats.save()
+
+        # THEN
+        # Only offsets which matched are persisted (including subnet misses), subnets without any are dropped
+        actual = QueryPortOffsetStats(self.path)
+        self.assertEqual([100], list(actual.game.keys()))
+        self.assertEqual({'1.1.1': [100], '2.2.2': [100]},
+                         {subnet: list(subnet_counts.keys()) for (subnet, subnet_counts) in actual.subnets.items()})
+
+    def test_invalid(self):
+        # GIVEN an invalid statistics file
+        with open(self.path, 'w') as file:
+            file.write('{"game": {"100": {"tries": 1}}, "subnets": {}}')
+
+        # WHEN the statistics are loaded
+        actual = QueryPortOffsetStats(self.path)
+
+        # THEN
+        # Statistics are ignored
+        self.assertEqual({}, actual.game)
+        self.assertEqual({}, actual.subnets)
+
+
+if __name__ == '__main__':
+    unittest.main()
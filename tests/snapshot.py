@@ -0,0 +1,167 @@
+import io
+import os
+import tempfile
+import time
+import unittest
+from datetime import datetime, timezone, timedelta
+
+from GameserverLister.common.files import atomic_write, write_servers_json
+from GameserverLister.common.servers import ClassicServer, FrostbiteServer, BadCompany2Server, GametoolsServer, \
+    ViaStatus, Server
+from GameserverLister.common.snapshot import write_snapshot, read_snapshot, SnapshotError
+from GameserverLister.common.types import GamespyGame, GamespyPlatform, StoreBackend
+from GameserverLister.common.weblinks import WebLink
+from GameserverLister.listers.common import ServerLister
+
+SEEN_AT = datetime(2024, 1, 1, 12, 30, 0, 15, tzinfo=timezone(timedelta(hours=2)))
+EARLIER = datetime(1969, 12, 31, 23, 59, 59, 999999, tzinfo=timezone.utc)
+NAIVE = datetime(2000, 6, 1, 8, 0, 0)
+
+
+def round_trip(servers: list, server_class: type) -> list:
+    file = io.BytesIO()
+    write_snapshot(file, servers, server_class)
+    file.seek(0)
+    return read_snapshot(file, server_class)
+
+
+def with_links(server: Server) -> Server:
+    server.add_links([
+        WebLink('a-site', 'a-url', True, SEEN_AT),
+        WebLink('b-site', 'b-ürl', False, EARLIER)
+    ])
+    return server
+
+
+class SnapshotTest(unittest.TestCase):
+    def assertRoundTrip(self, servers: list, server_class: type):
+        actual = round_trip(servers, server_class)
+        self.assertEqual([s.dump() for s in servers], [s.dump() for s in actual])
+        self.assertEqual([type(s) for s in servers], [type(s) for s in actual])
+        self.assertEqual([sorted(vars(s)) for s in servers], [sorted(vars(s)) for s in actual])
+
+    def test_classic(self):
+        servers = [
+            with_links(ClassicServer('a-guid', '1.1.1.1', 23000, [
+                ViaStatus('a-principal', SEEN_AT, SEEN_AT),
+                ViaStatus('b-principal', EARLIER, NAIVE)
+            ], 16567, SEEN_AT, SEEN_AT)),
+            ClassicServer('b-guid', '1.0.0.1', 23000, ViaStatus('a-principal', SEEN_AT, SEEN_AT), -1, None, NAIVE),
+            ClassicServer('c-guid', '1.0.0.2', 23000, [], -1, EARLIER, EARLIER)
+        ]
+        self.assertRoundTrip(servers, ClassicServer)
+
+    def test_frostbite(self):
+        servers = [
+            with_links(FrostbiteServer('a-guid', 'a-näme', '1.1.1.1', 25200, 47200, SEEN_AT, SEEN_AT, SEEN_AT)),
+            FrostbiteServer('b-guid', '\ud83d', '1.0.0.1', 25200, -1, None, EARLIER, None),
+            FrostbiteServer('c-guid', None, None, None, None, None, EARLIER, None)
+        ]
+        self.assertRoundTrip(servers, FrostbiteServer)
+
+    def test_bfbc2(self):
+        servers = [
+            BadCompany2Server('a-guid', 'a-name', 257, 123456, '1.1.1.1', 19567, 48888, SEEN_AT, SEEN_AT, None),
+            with_links(BadCompany2Server('b-guid', 'b-name', -1, -1, '1.0.0.1', 19567, -1, None, NAIVE, EARLIER)),
+            BadCompany2Server('c-guid', None, None, 0, '1.0.0.2', 19567, -1, None, NAIVE, None)
+        ]
+        self.assertRoundTrip(servers, BadCompany2Server)
+
+    def test_gametools(self):
+        servers = [
+            with_links(GametoolsServer('a-game-id', 'a-name', SEEN_AT, SEEN_AT)),
+            GametoolsServer('b-game-id', '', None, EARLIER),
+            GametoolsServer('c-game-id', None, None, EARLIER)
+        ]
+        self.assertRoundTrip(servers, GametoolsServer)
+
+    def test_none_link_fields(self):
+        server = GametoolsServer('a-game-id', 'a-name', SEEN_AT, SEEN_AT)
+        server.add_links([WebLink('a-site', None, None, SEEN_AT), WebLink('b-site', 'b-url', True, SEEN_AT)])
+        self.assertRoundTrip([server], GametoolsServer)
+
+    def test_empty(self):
+        self.assertEqual([], round_trip([], GametoolsServer))
+
+    def test_strings_interned(self):
+        # GIVEN servers sharing principals and link sites
+        servers = [
+            with_links(ClassicServer(f'guid-{i}', '1.1.1.1', 23000, ViaStatus('a-principal', SEEN_AT, SEEN_AT)))
+            for i in range(2)
+        ]
+
+        # WHEN the servers are loaded from a snapshot
+        actual = round_trip(servers, ClassicServer)
+
+        # THEN
+        # Loaded servers share the string objects
+        self.assertIs(actual[0].via[0].principal, actual[1].via[0].principal)
+        self.assertIs(actual[0].links[0].site, actual[1].links[0].site)
+
+    def test_wrong_class(self):
+        file = io.BytesIO()
+        write_snapshot(file, [GametoolsServer('a-game-id', 'a-name')], GametoolsServer)
+        file.seek(0)
+        with self.assertRaises(SnapshotError):
+            read_snapshot(file, FrostbiteServer)
+
+    def test_not_a_snapshot(self):
+        with self.assertRaises(SnapshotError):
+            read_snapshot(io.BytesIO(b'[]'), GametoolsServer)
+
+    def test_truncated(self):
+        file = io.BytesIO()
+        write_snapshot(file, [with_links(GametoolsServer('a-game-id', 'a-name'))], GametoolsServer)
+        with self.assertRaises(SnapshotError):
+            read_snapshot(io.BytesIO(file.getvalue()[:-3]), GametoolsServer)
+
+
+class SnapshotListerTest(unittest.TestCase):
+    def build_lister(self, list_dir: str) -> ServerLister:
+        return ServerLister(GamespyGame.BF2, GamespyPlatform.PC, GametoolsServer, True, 12.0, False, False, False,
+                            False, True, False, StoreBackend.JSON, list_dir)
+
+    def test_write_and_load(self):
+        with tempfile.TemporaryDirectory() as list_dir:
+            # GIVEN a lister which wrote both a JSON list and a snapshot
+            lister = self.build_lister(list_dir)
+            lister.add_update_servers([GametoolsServer('a-game-id', 'a-name', SEEN_AT, SEEN_AT)])
+            lister.write_to_file()
+
+            # WHEN the JSON list is modified without updating the snapshot
+            with atomic_write(lister.server_list_file_path) as file:
+                write_servers_json(file, [GametoolsServer('b-game-id', 'b-name', SEEN_AT, SEEN_AT)])
+            modified_at = os.path.getmtime(lister.snapshot_file_path) + 10
+            os.utime(lister.server_list_file_path, (modified_at, modified_at))
+
+            # THEN
+            # Newer JSON list is loaded
+            self.assertEqual(['b-game-id'], list(self.build_lister(list_dir).servers.uids()))
+
+            # WHEN the lister writes both files again
+            lister.write_to_file()
+
+            # THEN
+            # (Newer) snapshot is loaded
+            self.assertEqual(['a-game-id'], list(self.build_lister(list_dir).servers.uids()))
+
+    def test_load_invalid_snapshot(self):
+        with tempfile.TemporaryDirectory() as list_dir:
+            # GIVEN a valid JSON list but an invalid (newer) snapshot
+            lister = self.build_lister(list_dir)
+            lister.add_update_servers([GametoolsServer('a-game-id', 'a-name', SEEN_AT, SEEN_AT)])
+            lister.write_to_file()
+            with open(lister.snapshot_file_path, 'wb') as file:
+                file.write(b'invalid')
+            os.utime(lister.snapshot_file_path, (time.time() + 10, time.time() + 10))
+
+            # WHEN servers are loaded
+            actual = self.build_lister(list_dir)
+
+            # THEN
+            # Lister falls back to JSON list
+            self.assertEqual(['a-game-id'], list(actual.servers.uids()))
+
+
+if __name__ == '__main__':
+    unittest.main()
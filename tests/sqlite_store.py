@@ -0,0 +1,134 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from GameserverLister.common.servers import ClassicServer, FrostbiteServer, ViaStatus
+from GameserverLister.common.sqlite_store import SqliteServerStore
+from GameserverLister.common.types import GamespyGame, GamespyPlatform, StoreBackend
+from GameserverLister.common.weblinks import WebLink
+from GameserverLister.listers.common import ServerLister
+
+SEEN_AT = datetime(2024, 1, 1, 12, 30, 0, 15, tzinfo=timezone.utc)
+
+
+class SqliteServerStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'servers.sqlite3')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def open(self, server_class: type = ClassicServer) -> SqliteServerStore:
+        store = SqliteServerStore(self.path, 'bf2-servers-pc', server_class)
+        self.addCleanup(store.close)
+        store.load()
+        return store
+
+    def test_commit_load(self):
+        # GIVEN a store with servers including via statuses and links
+        store = self.open()
+        a = ClassicServer('a-guid', '1.1.1.1', 23000, [
+            ViaStatus('a-principal', SEEN_AT, SEEN_AT),
+            ViaStatus('b-principal', SEEN_AT, SEEN_AT)
+        ], 16567, SEEN_AT, SEEN_AT)
+        a.add_links(WebLink('a-site', 'a-url', True, SEEN_AT))
+        b = ClassicServer('b-guid', '1.0.0.1', 23000, ViaStatus('a-principal', SEEN_AT, SEEN_AT), -1, None, SEEN_AT)
+        store.add_all([a, b])
+
+        # WHEN the store is committed and loaded again
+        store.commit()
+        actual = self.open()
+
+        # THEN
+        # All servers are loaded as they were stored (in order)
+        self.assertEqual([a.dump(), b.dump()], [s.dump() for s in actual])
+
+    def test_commit_changes(self):
+        # GIVEN a committed store
+        store = self.open(FrostbiteServer)
+        store.add_all([
+            FrostbiteServer('a-guid', 'a-name', '1.1.1.1', 25200, 47200, SEEN_AT, SEEN_AT),
+            FrostbiteServer('b-guid', 'b-name', '1.1.1.2', 25200, 47200, SEEN_AT, SEEN_AT),
+            FrostbiteServer('c-guid', 'c-name', '1.1.1.3', 25200, 47200, SEEN_AT, SEEN_AT)
+        ])
+        store.commit()
+
+        # WHEN servers are updated, removed and added
+        store.upsert(FrostbiteServer('b-guid', 'b-new-name', '1.1.1.2', 25200, 47200, SEEN_AT, SEEN_AT))
+        store.remove('c-guid')
+        store.add(FrostbiteServer('d-guid', 'd-name', '1.1.1.4', 25200, 47200, SEEN_AT, SEEN_AT))
+        store.commit()
+
+        # THEN
+        # Only changes were written and loaded store reflects all changes
+        actual = self.open(FrostbiteServer)
+        self.assertEqual(['a-guid', 'b-guid', 'd-guid'], list(actual.uids()))
+        self.assertEqual('b-new-name', actual.get('b-guid').name)
+
+    def test_commit_unchanged(self):
+        # GIVEN a loaded store
+        store = self.open()
+        store.add(ClassicServer('a-guid', '1.1.1.1', 23000, ViaStatus('a-principal', SEEN_AT, SEEN_AT), 16567,
+                                SEEN_AT, SEEN_AT))
+        store.commit()
+        store = self.open()
+
+        # WHEN the store is committed without any changes
+        store.commit()
+
+        # THEN
+        # Nothing is written
+        self.assertEqual(0, store.connection.total_changes)
+
+    def test_find_expired(self):
+        # GIVEN a committed store containing a recent and an expired server
+        store = self.open(FrostbiteServer)
+        expired_at = SEEN_AT - timedelta(hours=24)
+        store.add_all([
+            FrostbiteServer('a-guid', 'a-name', '1.1.1.1', 25200, 47200, SEEN_AT, SEEN_AT),
+            FrostbiteServer('b-guid', 'b-name', '1.1.1.2', 25200, 47200, SEEN_AT, expired_at),
+            FrostbiteServer('c-guid', 'c-name', '1.1.1.3', 25200, 47200, SEEN_AT, expired_at)
+        ])
+        store.commit()
+
+        # WHEN one expired server is seen again and an expired server is added (both not committed yet)
+        store.upsert(FrostbiteServer('c-guid', 'c-name', '1.1.1.3', 25200, 47200, SEEN_AT, SEEN_AT))
+        store.add(FrostbiteServer('d-guid', 'd-name', '1.1.1.4', 25200, 47200, SEEN_AT, expired_at))
+        actual = store.find_expired(SEEN_AT - timedelta(hours=12))
+
+        # THEN
+        # Expired servers are found based on both persisted and in-memory state
+        self.assertEqual(['b-guid', 'd-guid'], [s.uid for s in actual])
+
+
+class SqliteServerListerTest(unittest.TestCase):
+    def build_lister(self, list_dir: str, store: StoreBackend) -> ServerLister:
+        lister = ServerLister(GamespyGame.BF2, GamespyPlatform.PC, FrostbiteServer, True, 12.0, False, False, False,
+                              False, False, False, store, list_dir)
+        if isinstance(lister.servers, SqliteServerStore):
+            self.addCleanup(lister.servers.close)
+        return lister
+
+    def test_seed_from_list(self):
+        with tempfile.TemporaryDirectory() as list_dir:
+            # GIVEN an existing JSON server list
+            lister = self.build_lister(list_dir, StoreBackend.JSON)
+            lister.add_update_servers([FrostbiteServer('a-guid', 'a-name', '1.1.1.1', 25200)])
+            lister.write_to_file()
+
+            # WHEN the lister is switched to SQLite and writes servers
+            lister = self.build_lister(list_dir, StoreBackend.SQLITE)
+            lister.add_update_servers([FrostbiteServer('b-guid', 'b-name', '1.1.1.2', 25200)])
+            lister.write_to_file()
+            os.remove(lister.server_list_file_path)
+
+            # THEN
+            # Database is seeded from the existing list and servers are loaded from the database
+            actual = self.build_lister(list_dir, StoreBackend.SQLITE)
+            self.assertEqual(['a-guid', 'b-guid'], list(actual.servers.uids()))
+
+
+if __name__ == '__main__':
+    unittest.main()
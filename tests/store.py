@@ -0,0 +1,101 @@
+import unittest
+from datetime import datetime
+
+from GameserverLister.common.servers import ClassicServer, ViaStatus
+from GameserverLister.common.store import ServerStore
+
+
+class ServerStoreTest(unittest.TestCase):
+    def test_init(self):
+        # GIVEN servers
+        a = ClassicServer('a-guid', '1.1.1.1', 23000, ViaStatus('a-principal'))
+        b = ClassicServer('b-guid', '1.0.0.1', 23000, ViaStatus('a-principal'))
+
+        # WHEN a store is created from the servers
+        store = ServerStore([a, b])
+
+        # THEN
+        # All servers are contained in insertion order
+        self.assertEqual(2, len(store))
+        self.assertEqual([a, b], list(store))
+        self.assertEqual(['a-guid', 'b-guid'], list(store.uids()))
+
+    def test_upsert_new(self):
+        # GIVEN a store containing a server
+        a = ClassicServer('a-guid', '1.1.1.1', 23000, ViaStatus('a-principal'))
+        store = ServerStore([a])
+
+        # WHEN an unknown server is upserted
+        b = ClassicServer('b-guid', '1.0.0.1', 23000, ViaStatus('a-principal'))
+        stored, added = store.upsert(b)
+
+        # THEN
+        # Server is added after the existing server
+        self.assertTrue(added)
+        self.assertIs(b, stored)
+        self.assertEqual([a, b], list(store))
+
+    def test_upsert_known(self):
+        # GIVEN a store containing servers
+        a = ClassicServer('a-guid', '1.1.1.1', 23000, ViaStatus('a-principal'), first_seen_at=datetime(2000, 1, 1))
+        b = ClassicServer('b-guid', '1.0.0.1', 23000, ViaStatus('a-principal'))
+        store = ServerStore([a, b])
+
+        # WHEN a known server is upserted
+        updated = ClassicServer('a-guid', '1.1.1.1', 23000, ViaStatus('b-principal'), 29900,
+                                last_seen_at=datetime(2010, 1, 1))
+        stored, added = store.upsert(updated)
+
+        # THEN
+        # Known server is updated in place
+        self.assertFalse(added)
+        self.assertIs(a, stored)
+        self.assertEqual(2, len(store))
+        self.assertEqual(['a-guid', 'b-guid'], list(store.uids()))
+        self.assertEqual(29900, a.game_port)
+        self.assertEqual(datetime(2000, 1, 1), a.first_seen_at)
+        self.assertEqual(datetime(2010, 1, 1), a.last_seen_at)
+        self.assertEqual(['a-principal', 'b-principal'], [v.principal for v in a.via])
+
+    def test_get(self):
+        a = ClassicServer('a-guid', '1.1.1.1', 23000, ViaStatus('a-principal'))
+        store = ServerStore([a])
+        self.assertIs(a, store.get('a-guid'))
+        self.assertIsNone(store.get('b-guid'))
+        self.assertIn('a-guid', store)
+        self.assertNotIn('b-guid', store)
+
+    def test_remove(self):
+        # GIVEN a store containing servers
+        a = ClassicServer('a-guid', '1.1.1.1', 23000, ViaStatus('a-principal'))
+        b = ClassicServer('b-guid', '1.0.0.1', 23000, ViaStatus('a-principal'))
+        store = ServerStore([a, b])
+
+        # WHEN servers are removed
+        removed = store.remove('a-guid')
+        missing = store.remove('c-guid')
+
+        # THEN
+        # Only the known server is removed
+        self.assertIs(a, removed)
+        self.assertIsNone(missing)
+        self.assertEqual([b], list(store))
+
+    def test_remove_all(self):
+        # GIVEN a store containing servers
+        a = ClassicServer('a-guid', '1.1.1.1', 23000, ViaStatus('a-principal'))
+        b = ClassicServer('b-guid', '1.0.0.1', 23000, ViaStatus('a-principal'))
+        c = ClassicServer('c-guid', '1.0.0.2', 23000, ViaStatus('a-principal'))
+        store = ServerStore([a, b, c])
+
+        # WHEN known and unknown servers are removed
+        removed = store.remove_all(['a-guid', 'c-guid', 'd-guid'])
+
+        # THEN
+        # Only known servers are removed/counted
+        self.assertEqual(2, removed)
+        self.assertEqual([b], list(store))
+
+
+if __name__ == '__main__':
+    unittest.main()
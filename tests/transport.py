@@ -0,0 +1,76 @@
+import threading
+import unittest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from gevent.threadpool import ThreadPool
+from requests.adapters import HTTPAdapter
+
+from GameserverLister.common.transport import build_session, supports_http2, Http2Adapter
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        # Called once per connection
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        body = b'{"servers": []}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class BuildSessionTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+        self.server.daemon_threads = True
+        self.server.lock = threading.Lock()
+        self.server.connections = 0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}/servers'
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_connections_reused(self):
+        # GIVEN a session with a pool of four connections per host
+        session = build_session(4)
+
+        # WHEN requests are sent from more threads than there are connections
+        pool = ThreadPool(8)
+        responses = pool.map(lambda _: session.get(self.url, timeout=5), range(64))
+        pool.kill()
+        session.close()
+
+        # THEN
+        # All requests succeed using no more connections than the pool size
+        self.assertEqual([200] * 64, [response.status_code for response in responses])
+        self.assertEqual({'servers': []}, responses[0].json())
+        self.assertLessEqual(self.server.connections, 4)
+
+    def test_accept_encoding(self):
+        session = build_session()
+        self.assertIn('gzip', session.headers['Accept-Encoding'])
+
+    def test_http2(self):
+        # WHEN a session using HTTP/2 is built
+        session = build_session(http2=True)
+
+        # THEN
+        # HTTP/2 is used if available, with HTTP/1.1 being used as a fallback
+        adapter_class = Http2Adapter if supports_http2() else HTTPAdapter
+        self.assertIsInstance(session.get_adapter(self.url), adapter_class)
+
+
+if __name__ == '__main__':
+    unittest.main()
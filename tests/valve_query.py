@@ -0,0 +1,118 @@
+import socket
+import struct
+import threading
+import time
+import unittest
+from typing import Callable, List
+
+import pyvpsq
+
+from GameserverLister.protocols.valve_query import ValveQueryEngine, parse_info
+
+INFO_REQUEST = b'\xff\xff\xff\xffTSource Engine Query\x00'
+CHALLENGE = b'\x01\x02\x03\x04'
+INFO = b'\x11A Server\x00Altis\x00Arma3\x00Arma 3\x00\x8a\x19\x02\x10\x00dw\x00\x002.14\x00'
+
+
+def build_info_response(game_port: int) -> bytes:
+    return b'\xff\xff\xff\xffI' + INFO + b'\x80' + struct.pack('<H', game_port)
+
+
+class StubServer:
+    """
+    Local UDP game server, replying to each packet with the packets returned by the given handler
+    """
+    sock: socket.socket
+    handler: Callable[[bytes], List[bytes]]
+    received: List[bytes]
+
+    def __init__(self, handler: Callable[[bytes], List[bytes]]):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(('127.0.0.1', 0))
+        self.handler = handler
+        self.received = []
+        threading.Thread(target=self.serve, daemon=True).start()
+
+    @property
+    def address(self):
+        return self.sock.getsockname()
+
+    def serve(self):
+        while True:
+            try:
+                data, address = self.sock.recvfrom(65535)
+            except OSError:
+                return
+            self.received.append(data)
+            for packet in self.handler(data):
+                self.sock.sendto(packet, address)
+
+    def close(self):
+        self.sock.close()
+
+
+class ValveQueryEngineTest(unittest.TestCase):
+    def start_server(self, handler: Callable[[bytes], List[bytes]]) -> StubServer:
+        server = StubServer(handler)
+        self.addCleanup(server.close)
+        return server
+
+    def test_query(self):
+        # GIVEN a server responding to info requests
+        server = self.start_server(lambda data: [build_info_response(2302)])
+
+        # WHEN the server is queried
+        actual = ValveQueryEngine(timeout=1).query(server.address)
+
+        # THEN
+        self.assertEqual('A Server', actual.name)
+        self.assertEqual(2302, actual.game_port)
+        self.assertEqual([INFO_REQUEST], server.received)
+
+    def test_query_challenge(self):
+        # GIVEN a server requiring a challenge to be included in info requests
+        server = self.start_server(
+            lambda data: [build_info_response(2302)] if data.endswith(CHALLENGE) else [b'\xff\xff\xff\xffA' + CHALLENGE]
+        )
+
+        # WHEN the server is queried
+        actual = ValveQueryEngine(timeout=1).query(server.address)
+
+        # THEN
+        # Query is re-sent including the challenge
+        self.assertEqual(2302, actual.game_port)
+        self.assertEqual([INFO_REQUEST, INFO_REQUEST + CHALLENGE], server.received)
+
+    def test_query_all(self):
+        # GIVEN a responding, a silent and a slow server
+        responding = self.start_server(lambda data: [build_info_response(2302)])
+        silent = self.start_server(lambda data: [])
+        slow = self.start_server(lambda data: time.sleep(0.3) or [build_info_response(2402)])
+
+        # WHEN all servers are queried concurrently
+        started = time.monotonic()
+        actual = ValveQueryEngine(timeout=0.5).query_all([silent.address, slow.address, responding.address])
+        elapsed = time.monotonic() - started
+
+        # THEN
+        # Results are returned in order, with the silent server not holding up the others
+        self.assertEqual([None, 2402, 2302], [info.game_port if info is not None else None for info in actual])
+        self.assertLess(elapsed, 0.9)
+
+
+class ParseInfoTest(unittest.TestCase):
+    def test_parse_info(self):
+        actual = parse_info(INFO + b'\x80' + struct.pack('<H', 2302))
+        self.assertEqual(pyvpsq.ServerInfo(17, 'A Server', 'Altis', 'Arma3', 'Arma 3', 6538, 2, 16, 0, 'd', 'w',
+                                           False, False, '2.14', 2302), actual)
+
+    def test_parse_info_without_extra_data(self):
+        actual = parse_info(INFO)
+        self.assertIsNone(actual.game_port)
+
+    def test_parse_info_truncated(self):
+        self.assertRaises(pyvpsq.Error, parse_info, INFO[:10])
+
+
+if __name__ == '__main__':
+    unittest.main()